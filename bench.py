@@ -0,0 +1,296 @@
+import asyncio
+import datetime
+import json
+import platform
+import random
+import subprocess
+from collections import Counter, deque
+from dataclasses import asdict, dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+import aiohttp
+import websockets
+
+from configs import BASE_URL, PORT, WS_URL, setup_logging
+from helper_class import LatencySketch
+
+logger = setup_logging("client")
+
+OPERATIONS = ("submit", "list", "stop", "watch")
+QUANTILES = {"p50": 0.5, "p90": 0.9, "p99": 0.99, "p999": 0.999}
+
+
+@dataclass
+class BenchConfig:
+    """
+    ``closed`` mode runs ``concurrency`` users that each wait for a response before the
+    next request, paced at ``rate`` requests/s overall if given. ``open`` mode starts
+    requests at ``rate`` per second whether or not earlier ones have finished, over at
+    most ``concurrency`` pooled connections. Requests started during ``warmup`` are not
+    counted.
+    """
+
+    mode: str = "closed"
+    concurrency: int = 10
+    rate: Optional[float] = None
+    duration: float = 30.0
+    warmup: float = 5.0
+    mix: Dict[str, float] = field(default_factory=lambda: {"submit": 1.0})
+    spec: Dict[str, Any] = field(default_factory=lambda: {"type": "sleep", "payload": {"duration": 0.1}})
+    timeout: float = 10.0
+    base_url: str = f"{BASE_URL}:{PORT}"
+    ws_url: str = WS_URL
+
+    def __post_init__(self) -> None:
+        if self.mode not in ("closed", "open"):
+            raise ValueError("mode must be 'closed' or 'open'")
+        if self.mode == "open" and not self.rate:
+            raise ValueError("open mode needs a rate")
+        unknown = set(self.mix) - set(OPERATIONS)
+        if unknown or not any(weight > 0 for weight in self.mix.values()):
+            raise ValueError(f"mix needs positive weights for {', '.join(OPERATIONS)}, got {self.mix}")
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    """ "submit=70,list=20,stop=5,watch=5" -> weights """
+    mix: Dict[str, float] = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight) if weight else 1.0
+    return mix
+
+
+class OperationStats:
+    """
+    Latencies of one operation: ``service`` from the moment the request was sent, and
+    ``corrected`` from the moment it was meant to be sent per the schedule, which counts
+    the time a stalled server kept later requests from going out (coordinated omission).
+    """
+
+    def __init__(self) -> None:
+        self.service = LatencySketch()
+        self.corrected = LatencySketch()
+        self.statuses: Counter = Counter()
+        self.errors = 0
+
+    def record(self, intended: float, started: float, ended: float, status: Optional[int]) -> None:
+        self.statuses[str(status) if status is not None else "error"] += 1
+        if status is None or status >= 400:
+            self.errors += 1
+            return
+        self.service.add(ended - started)
+        self.corrected.add(ended - intended)
+
+    def report(self, elapsed: float) -> Dict[str, Any]:
+        count = sum(self.statuses.values())
+        return {
+            "requests": count,
+            "errors": self.errors,
+            "throughput": (count - self.errors) / elapsed if elapsed else 0.0,
+            "statuses": dict(self.statuses),
+            "service": sketch_report(self.service),
+            "corrected": sketch_report(self.corrected),
+        }
+
+
+def sketch_report(sketch: LatencySketch) -> Dict[str, float]:
+    report = {name: sketch.quantile(q) for name, q in QUANTILES.items()}
+    report["mean"] = sketch.sum / sketch.count if sketch.count else 0.0
+    report["max"] = sketch.max
+    return report
+
+
+class BenchRun:
+    """ one benchmark: the shared connection pool, the task ids submitted so far and the stats """
+
+    def __init__(self, config: BenchConfig, session: aiohttp.ClientSession, seed: Optional[int] = None) -> None:
+        self.config = config
+        self.session = session
+        self.rng = random.Random(seed)
+        self.stats = {name: OperationStats() for name in config.mix}
+        # recently submitted ids, the targets of stop and watch
+        self.submitted: Deque[str] = deque(maxlen=10_000)
+        self.operations: Dict[str, Callable[[], Awaitable[Optional[int]]]] = {
+            "submit": self.submit,
+            "list": self.list,
+            "stop": self.stop,
+            "watch": self.watch,
+        }
+        self._names = list(config.mix)
+        self._weights = [config.mix[name] for name in self._names]
+        self.measure_from = 0.0
+        self.deadline = 0.0
+
+    def choose(self) -> str:
+        return self.rng.choices(self._names, self._weights)[0]
+
+    async def submit(self) -> int:
+        url = f"{self.config.base_url}/tasks/batch"
+        async with self.session.post(url, json=[self.config.spec]) as response:
+            if response.status == 200:
+                self.submitted.extend((await response.json())["task_ids"])
+            else:
+                await response.read()
+            return response.status
+
+    async def list(self) -> int:
+        url = f"{self.config.base_url}/tasks/list"
+        async with self.session.get(url, params={"limit": 100}) as response:
+            await response.read()
+            return response.status
+
+    async def stop(self) -> int:
+        task_id = self.submitted.popleft()
+        async with self.session.post(f"{self.config.base_url}/tasks/stop/{task_id}") as response:
+            await response.read()
+            return response.status
+
+    async def watch(self) -> int:
+        """
+        Connect, subscribe to a submitted task and wait for its current status: 101 when it
+        arrives, 404 if the server no longer knows the task, 502 for any other reply.
+        """
+        task_id = self.submitted[-1]
+        async with websockets.connect(self.config.ws_url) as ws:
+            await ws.send(json.dumps({"action": "subscribe", "task_ids": [task_id]}))
+            reply = json.loads(await ws.recv())
+        updates = reply.get("updates") if isinstance(reply, dict) else None
+        for update in updates or []:
+            if isinstance(update, dict) and update.get("task_id") == task_id:
+                return 101 if update.get("status") else 404
+        logger.debug("Unexpected watch reply for %s: %s", task_id, reply)
+        return 502
+
+    async def execute(self, intended: float) -> None:
+        name = self.choose()
+        if name in ("stop", "watch") and not self.submitted:
+            # nothing to stop or watch yet
+            name = "submit"
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        try:
+            async with asyncio.timeout(self.config.timeout):
+                status = await self.operations[name]()
+        except asyncio.CancelledError:
+            # still outstanding when the run ended: as much of a timeout as any
+            self.record(name, intended, started, loop.time(), None)
+            raise
+        except Exception as e:
+            logger.debug("%s failed: %s", name, e)
+            status = None
+        self.record(name, intended, started, loop.time(), status)
+
+    def record(self, name: str, intended: float, started: float, ended: float, status: Optional[int]) -> None:
+        if intended >= self.measure_from:
+            self.stats.setdefault(name, OperationStats()).record(intended, started, ended, status)
+
+    async def closed_user(self, interval: Optional[float], offset: float) -> None:
+        loop = asyncio.get_running_loop()
+        intended = loop.time() + offset
+        while intended < self.deadline:
+            if interval:
+                await asyncio.sleep(max(0.0, intended - loop.time()))
+            else:
+                intended = loop.time()
+            await self.execute(intended)
+            if interval:
+                # the schedule does not slip when a response is late
+                intended += interval
+            else:
+                intended = loop.time()
+
+    async def open_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        pending = set()
+        sent = 0
+        while True:
+            intended = start + sent / self.config.rate
+            if intended >= self.deadline:
+                break
+            await asyncio.sleep(max(0.0, intended - loop.time()))
+            request = asyncio.create_task(self.execute(intended))
+            pending.add(request)
+            request.add_done_callback(pending.discard)
+            sent += 1
+        if pending:
+            _, stragglers = await asyncio.wait(pending, timeout=self.config.timeout)
+            # the stalled tail is what the corrected latencies are for, so it is recorded too
+            for request in stragglers:
+                request.cancel()
+            await asyncio.gather(*stragglers, return_exceptions=True)
+
+    async def run(self) -> Dict[str, Any]:
+        config = self.config
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        self.measure_from = start + config.warmup
+        self.deadline = self.measure_from + config.duration
+        if config.mode == "open":
+            await self.open_loop()
+        else:
+            interval = config.concurrency / config.rate if config.rate else None
+            await asyncio.gather(*(
+                self.closed_user(interval, interval * i / config.concurrency if interval else 0.0)
+                for i in range(config.concurrency)
+            ))
+        elapsed = min(loop.time(), self.deadline) - self.measure_from
+        return self.report(elapsed)
+
+    def report(self, elapsed: float) -> Dict[str, Any]:
+        operations = {name: stats.report(elapsed) for name, stats in self.stats.items()}
+        requests = sum(op["requests"] for op in operations.values())
+        errors = sum(op["errors"] for op in operations.values())
+        return {
+            "elapsed": elapsed,
+            "requests": requests,
+            "errors": errors,
+            "throughput": (requests - errors) / elapsed if elapsed else 0.0,
+            "operations": operations,
+        }
+
+
+def version() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "describe", "--always", "--dirty"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run_bench(config: BenchConfig, output: Optional[str] = None) -> Dict[str, Any]:
+    """ run one benchmark over a single pooled session; the JSON report is written to ``output`` """
+    connector = aiohttp.TCPConnector(limit=config.concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        results = await BenchRun(config, session).run()
+    report = {
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "version": version(),
+        "host": platform.node(),
+        "config": asdict(config),
+        "results": results,
+    }
+    log_report(results)
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        logger.info("Benchmark report written to %s", output)
+    return report
+
+
+def log_report(results: Dict[str, Any]) -> None:
+    logger.info(
+        "%s requests in %.1fs, %s errors, %.1f req/s",
+        results["requests"], results["elapsed"], results["errors"], results["throughput"],
+    )
+    for name, op in results["operations"].items():
+        service, corrected = op["service"], op["corrected"]
+        logger.info(
+            "%s: %s requests, %.1f req/s, p50 %.4fs p99 %.4fs p99.9 %.4fs (corrected p99 %.4fs), statuses %s",
+            name, op["requests"], op["throughput"], service["p50"], service["p99"], service["p999"],
+            corrected["p99"], op["statuses"],
+        )
+
+
+__all__: List[str] = ["BenchConfig", "BenchRun", "OperationStats", "parse_mix", "run_bench"]
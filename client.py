@@ -3,12 +3,13 @@ import asyncio
 import aiohttp
 import websockets
 import argparse
-from typing import Dict, Optional, Any
+from typing import Dict, Iterator, List, Optional, Any
 
 from configs import BASE_URL, PORT, WS_URL
-from helper_class import Command, RequestType, TaskStatus
-from utils import timeit
+from helper_class import Command, RequestType, TaskPriority, TaskStatus
+from utils import timeit, timings
 from configs import setup_logging
+from bench import BenchConfig, parse_mix, run_bench
 
 logger = setup_logging("client")
 
@@ -54,9 +55,20 @@ async def unified_request_handler(
 
 # --- Task Management ---
 @timeit(logger=logger)
-async def start_task(session: aiohttp.ClientSession, task_id: str) -> None:
+async def start_task(
+    session: aiohttp.ClientSession,
+    task_id: str,
+    priority: str = TaskPriority.NORMAL,
+    timeout: Optional[float] = None,
+    spec: Optional[Dict[str, Any]] = None,
+) -> None:
     url: str = f"{BASE_URL}:{PORT}/tasks/start/{task_id}"
-    result: Dict[str, Any] | None = await unified_request_handler(session, RequestType.POST, url, json={})
+    params: Dict[str, Any] = {"priority": priority}
+    if timeout:
+        params["timeout"] = timeout
+    result: Dict[str, Any] | None = await unified_request_handler(
+        session, RequestType.POST, url, params=params, json=spec or {}
+    )
     if result.get("task_id"):
         logger.info("Task started: %s", task_id)
 
@@ -69,16 +81,32 @@ async def stop_task(session: aiohttp.ClientSession, task_id: str) -> Dict[str,An
 
 
 @timeit(logger=logger)
-async def list_tasks(session: aiohttp.ClientSession) -> Dict[str,Any] | None:
+async def list_tasks(
+    session: aiohttp.ClientSession,
+    status: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+) -> Dict[str,Any] | None:
     url: str = f"{BASE_URL}:{PORT}/tasks/list"
-    result: Dict[str, Any] | None = await unified_request_handler(session, RequestType.GET, url)
+    params = {k: v for k, v in {"status": status, "cursor": cursor, "limit": limit}.items() if v is not None}
+    result: Dict[str, Any] | None = await unified_request_handler(session, RequestType.GET, url, params=params)
     if result is None:
         return
-    logger.info("Found %s tasks", len(result))
+    logger.info(
+        "Showing %s of %s tasks, queue depth %s",
+        len(result["tasks"]), result["total"], result["queue_depth"],
+    )
     pretty_print(result)
+    if result["next_cursor"]:
+        logger.info("More tasks: list --cursor %s", result["next_cursor"])
         
 @timeit(logger=logger) 
-async def handle_start(session : aiohttp.ClientSession) -> None:
+async def handle_start(
+    session : aiohttp.ClientSession,
+    priority: str = TaskPriority.NORMAL,
+    timeout: Optional[float] = None,
+    spec: Optional[Dict[str, Any]] = None,
+) -> None:
     url: str = f"{BASE_URL}:{PORT}/tasks/getid"
     id_response: Dict[str, Any] | None = await unified_request_handler(
         session, RequestType.GET, url
@@ -86,7 +114,89 @@ async def handle_start(session : aiohttp.ClientSession) -> None:
     task_id: str = extract_task_id(id_response)
     if not task_id:
         return
-    await start_task(session, task_id)
+    await start_task(session, task_id, priority, timeout, spec)
+
+def read_jsonl_chunks(path: str, chunk_size: int) -> Iterator[List[Dict[str, Any]]]:
+    chunk: List[Dict[str, Any]] = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            chunk.append(json.loads(line))
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+async def submit_batch(session: aiohttp.ClientSession, specs: List[Dict[str, Any]], retries: int = 5) -> List[str]:
+    url: str = f"{BASE_URL}:{PORT}/tasks/batch"
+    for _ in range(retries):
+        async with session.post(url, json=specs) as response:
+            if response.status in (429, 503):
+                delay = int(response.headers.get("Retry-After", "1"))
+                logger.warning("Server busy (HTTP %s), retrying batch in %ss", response.status, delay)
+                await asyncio.sleep(delay)
+                continue
+            if response.status >= 400:
+                logger.error("HTTP %s: %s", response.status, await response.text())
+                return []
+            result = await response.json()
+            return result["task_ids"]
+    logger.error("Giving up on a batch of %s tasks", len(specs))
+    return []
+
+@timeit(logger=logger)
+async def handle_batch(session: aiohttp.ClientSession, path: str, chunk_size: int, concurrency: int) -> None:
+    """ stream task specs from a JSONL file, keeping at most ``concurrency`` batches in flight """
+    semaphore = asyncio.Semaphore(concurrency)
+    in_flight: set = set()
+    submitted = 0
+
+    def on_done(task: asyncio.Task) -> None:
+        nonlocal submitted
+        semaphore.release()
+        in_flight.discard(task)
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            logger.error("Batch submission failed: %r", task.exception())
+            return
+        submitted += len(task.result())
+
+    for chunk in read_jsonl_chunks(path, chunk_size):
+        await semaphore.acquire()
+        task = asyncio.create_task(submit_batch(session, chunk))
+        task.add_done_callback(on_done)
+        in_flight.add(task)
+    if in_flight:
+        await asyncio.gather(*in_flight, return_exceptions=True)
+    logger.info("Submitted %s tasks from %s", submitted, path)
+
+async def get_result(session: aiohttp.ClientSession, task_id: str) -> None:
+    url = f"{BASE_URL}:{PORT}/tasks/result/{task_id}"
+    async with session.get(url) as response:
+        if response.status >= 400:
+            logger.error("HTTP %s: %s", response.status, await response.text())
+            return
+        if response.content_type == "application/json":
+            pretty_print(await response.json())
+        elif response.content_type.startswith("text/"):
+            logger.info("%s", await response.text())
+        else:
+            body = await response.read()
+            logger.info("Task %s returned %s bytes of %s", task_id, len(body), response.content_type)
+
+async def get_timings(session: aiohttp.ClientSession) -> None:
+    url = f"{BASE_URL}:{PORT}/timings"
+    result = await unified_request_handler(session, RequestType.GET, url)
+    if result is None:
+        return
+    for name, stats in result.items():
+        logger.info(
+            "%s: %s calls, mean %.6fs, p50 %.6fs, p95 %.6fs, p99 %.6fs",
+            name, stats["calls"], stats["mean"], stats["p50"], stats["p95"], stats["p99"],
+        )
 
 async def handle_health_check(session: aiohttp.ClientSession) -> None:
     url = f"{BASE_URL}:{PORT}/tasks/health"
@@ -97,24 +207,31 @@ async def handle_health_check(session: aiohttp.ClientSession) -> None:
         pretty_print(result)
     
 
-async def receive_ws_messages(ws: websockets.ClientConnection) -> None:
+async def receive_feed_updates(ws: websockets.ClientConnection, task_ids: List[str]) -> None:
+    remaining = set(task_ids)
     async for message in ws:
         data = json.loads(message)
-        pretty_print(data=data)
-        logger.info(f"Status update: {json.dumps(data, indent=2)}")
-        task_status = data.get("status")
-        if task_status in (TaskStatus.COMPLETED, TaskStatus.CANCELLED, TaskStatus.FAILED):
-            logger.info("Task in status %s, Closing monitor.",task_status)
+        if data.get("resync"):
+            logger.warning("Status feed fell behind, some updates were dropped")
+        if data.get("error"):
+            logger.error("Status feed error: %s", data["error"])
+        for update in data.get("updates", []):
+            pretty_print(data=update)
+            task_status = update.get("status")
+            if task_status in (None, TaskStatus.COMPLETED, TaskStatus.CANCELLED, TaskStatus.FAILED):
+                remaining.discard(update.get("task_id"))
+        if task_ids and not remaining:
+            logger.info("All watched tasks finished, Closing monitor.")
             break
 
-async def listen_task_status(task_id: str) -> None:
-    ws_url: str = f"{WS_URL}/{task_id}"
+async def listen_task_status(task_ids: List[str], watch_all: bool = False) -> None:
     try:
-        async with websockets.connect(ws_url) as ws:
-            logger.info("Connected to WebSocket: %s", ws_url)
-            await receive_ws_messages(ws)
+        async with websockets.connect(WS_URL) as ws:
+            logger.info("Connected to WebSocket: %s", WS_URL)
+            await ws.send(json.dumps({"action": "subscribe", "task_ids": task_ids, "all": watch_all}))
+            await receive_feed_updates(ws, [] if watch_all else task_ids)
     except Exception as e:
-        logger.error("Failed to connect WebSocket for %s: %s", task_id, e)
+        logger.error("Failed to watch tasks %s: %s", task_ids, e)
 
 
 def parse_arguments():
@@ -127,22 +244,56 @@ def parse_arguments():
     )
 
     # Start command
-    start = subparsers.add_parser(Command.START, help='Start a new task')  # noqa: F841
+    start = subparsers.add_parser(Command.START, help='Start a new task')
+    start.add_argument('--priority', choices=list(TaskPriority), default=TaskPriority.NORMAL, help='Queue priority')
+    start.add_argument('--timeout', type=float, help='Seconds the task may run before it is failed')
+    start.add_argument('--type', dest='task_type', help='Registered task type')
+    start.add_argument('--payload', type=json.loads, help='Task payload as a JSON object')
 
     # Stop command
     stop = subparsers.add_parser(Command.STOP, help='Stop a running task')
     stop.add_argument('--task_id', required=True, help='Task ID to stop')
 
     # List command
-    subparsers.add_parser(Command.LIST, help='List all tasks')
+    listing = subparsers.add_parser(Command.LIST, help='List tasks, a page at a time')
+    listing.add_argument('--status', choices=list(TaskStatus), help='Only tasks with this status')
+    listing.add_argument('--cursor', help='next_cursor of the previous page')
+    listing.add_argument('--limit', type=int, help='Page size')
 
     # Status command
     status = subparsers.add_parser(Command.STATUS, help='Monitor task status in real-time')
-    status.add_argument('--task_id', required=True, help='Task ID to monitor')
+    watched = status.add_mutually_exclusive_group(required=True)
+    watched.add_argument('--task_id', nargs='+', help='Task ID(s) to monitor over one connection')
+    watched.add_argument('--all', action='store_true', help='Monitor every task')
     
     # server health check
     health = subparsers.add_parser(Command.HEALTH, help="simple health check for the server")
 
+    # batch submission
+    batch = subparsers.add_parser(Command.BATCH, help='Submit task specs from a JSONL file')
+    batch.add_argument('--file', required=True, help='JSONL file with one task spec per line')
+    batch.add_argument('--chunk_size', type=int, default=500, help='Tasks per request')
+    batch.add_argument('--concurrency', type=int, default=4, help='Requests in flight at once')
+
+    # task result
+    result = subparsers.add_parser(Command.RESULT, help='Fetch the result of a finished task')
+    result.add_argument('--task_id', required=True, help='Task ID')
+
+    # server timing table
+    subparsers.add_parser(Command.TIMINGS, help="Aggregated function timings of the server")
+
+    # load generator
+    bench = subparsers.add_parser(Command.BENCH, help='Load test the server and report throughput and latency')
+    bench.add_argument('--mode', choices=['closed', 'open'], default='closed', help='closed: each user waits for its response; open: fixed arrival rate')
+    bench.add_argument('--concurrency', type=int, default=10, help='Users (closed) or pooled connections (open)')
+    bench.add_argument('--rate', type=float, help='Requests per second; required in open mode, paces closed mode')
+    bench.add_argument('--duration', type=float, default=30.0, help='Measured seconds')
+    bench.add_argument('--warmup', type=float, default=5.0, help='Seconds of traffic before measuring')
+    bench.add_argument('--mix', type=parse_mix, default='submit=70,list=20,stop=5,watch=5', help='Operation weights')
+    bench.add_argument('--type', dest='task_type', default='sleep', help='Task type to submit')
+    bench.add_argument('--payload', type=json.loads, default={"duration": 0.1}, help='Task payload as a JSON object')
+    bench.add_argument('--output', help='Write the JSON report here')
+
     args = parser.parse_args()
 
     return args
@@ -155,23 +306,61 @@ async def main() -> None:
     async with aiohttp.ClientSession() as session:
         match command:
             case Command.START:
-                await handle_start(session=session)
+                spec = {"type": args.task_type, "payload": args.payload}
+                await handle_start(
+                    session=session,
+                    priority=args.priority,
+                    timeout=args.timeout,
+                    spec={k: v for k, v in spec.items() if v is not None},
+                )
                 
             case Command.STOP:
                 await stop_task(session=session, task_id=args.task_id)
 
             case Command.LIST:
-                await list_tasks(session=session)
+                await list_tasks(session=session, status=args.status, cursor=args.cursor, limit=args.limit)
 
             case Command.STATUS:
-                await listen_task_status(args.task_id)
+                await listen_task_status(args.task_id or [], watch_all=args.all)
                 
             case Command.HEALTH:
                 await handle_health_check(session=session)
+
+            case Command.BATCH:
+                await handle_batch(
+                    session=session,
+                    path=args.file,
+                    chunk_size=args.chunk_size,
+                    concurrency=args.concurrency,
+                )
+
+            case Command.RESULT:
+                await get_result(session=session, task_id=args.task_id)
+
+            case Command.TIMINGS:
+                await get_timings(session=session)
+
+            case Command.BENCH:
+                try:
+                    config = BenchConfig(
+                        mode=args.mode,
+                        concurrency=args.concurrency,
+                        rate=args.rate,
+                        duration=args.duration,
+                        warmup=args.warmup,
+                        mix=args.mix,
+                        spec={"type": args.task_type, "payload": args.payload},
+                    )
+                except ValueError as e:
+                    logger.error("Invalid benchmark: %s", e)
+                    return
+                await run_bench(config, output=args.output)
                 
             case _:
                 logger.error("unknown command: %s",command)
                 return 
     
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main())
+    # this client's own @timeit table
+    timings.log_summary(logger)
\ No newline at end of file
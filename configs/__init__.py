@@ -1,13 +1,135 @@
 from .logging_config import setup_logging
-from .settings import QUEUE_CHECK, HOST, PORT, STATUS_FREQUENCY, WS_URL, BASE_URL
-
-__all__ = [
-    "setup_logging",
-    QUEUE_CHECK,
+from .settings import (
     HOST,
     PORT,
-    STATUS_FREQUENCY,
     WS_URL,
-    BASE_URL
-    
+    BASE_URL,
+    WORKER_MAX_TASKS,
+    WORKER_MAX_RSS_BYTES,
+    TASK_TABLE_CAPACITY,
+    WS_BATCH_WINDOW,
+    WS_BATCH_MAX,
+    WS_MAX_PENDING,
+    WS_SEND_TIMEOUT,
+    WS_MAX_SUBSCRIPTIONS,
+    RATE_LIMIT_REQUESTS,
+    RATE_LIMIT_PERIOD,
+    RATE_LIMIT_MAX_CLIENTS,
+    RATE_LIMIT_ROUTES,
+    RATE_LIMIT_BACKEND,
+    RATE_LIMIT_SHM_NAME,
+    RATE_LIMIT_BATCH,
+    MAX_BATCH_SIZE,
+    NODE_ID,
+    PRIORITY_WEIGHTS,
+    LIST_PAGE_SIZE,
+    LIST_MAX_PAGE_SIZE,
+    TASK_TIMEOUT,
+    ADMISSION_MAX_QUEUED,
+    ADMISSION_MAX_PER_CLIENT,
+    ADMISSION_MEMORY_HIGH,
+    ADMISSION_TASK_BYTES,
+    ADMISSION_RETRY_AFTER,
+    TASK_MAX_RSS_BYTES,
+    TASK_MEMORY_CHECK_INTERVAL,
+    CANCEL_GRACE_PERIOD,
+    CANCEL_KILL_AFTER,
+    RESULT_SPOOL_DIR,
+    RESULT_SPOOL_THRESHOLD,
+    RESULT_CHUNK_SIZE,
+    THREAD_LANE_SIZE,
+    ASYNC_LANE_SIZE,
+    LOG_LEVEL,
+    LOG_DIR,
+    LOG_MAX_BYTES,
+    LOG_BACKUP_COUNT,
+    LOG_BATCH_SIZE,
+    TIMEIT_SAMPLE_RATE,
+    TIMEIT_FLUSH_INTERVAL,
+    CONCURRENCY_ADAPTIVE,
+    CONCURRENCY_MIN,
+    CONCURRENCY_MAX,
+    CONCURRENCY_INTERVAL,
+    CONCURRENCY_CPU_TARGET,
+    CONCURRENCY_MEMORY_HIGH,
+    CONCURRENCY_LOAD_HIGH,
+    CONCURRENCY_SWAP_HIGH,
+    CONCURRENCY_COOLDOWN,
+    CONCURRENCY_BACKOFF,
+    JOURNAL_ENABLED,
+    JOURNAL_DIR,
+    JOURNAL_FLUSH_INTERVAL,
+    JOURNAL_SNAPSHOT_EVERY,
+    RETENTION_MAX_FINISHED,
+    RETENTION_TTL,
+    RETENTION_SWEEP_INTERVAL,
+    RETENTION_ARCHIVE,
+)
+
+__all__ = [
+    "setup_logging",
+    "HOST",
+    "PORT",
+    "WS_URL",
+    "BASE_URL",
+    "WORKER_MAX_TASKS",
+    "WORKER_MAX_RSS_BYTES",
+    "TASK_TABLE_CAPACITY",
+    "WS_BATCH_WINDOW",
+    "WS_BATCH_MAX",
+    "WS_MAX_PENDING",
+    "WS_SEND_TIMEOUT",
+    "WS_MAX_SUBSCRIPTIONS",
+    "RATE_LIMIT_REQUESTS",
+    "RATE_LIMIT_PERIOD",
+    "RATE_LIMIT_MAX_CLIENTS",
+    "RATE_LIMIT_ROUTES",
+    "RATE_LIMIT_BACKEND",
+    "RATE_LIMIT_SHM_NAME",
+    "RATE_LIMIT_BATCH",
+    "MAX_BATCH_SIZE",
+    "NODE_ID",
+    "PRIORITY_WEIGHTS",
+    "LIST_PAGE_SIZE",
+    "LIST_MAX_PAGE_SIZE",
+    "TASK_TIMEOUT",
+    "ADMISSION_MAX_QUEUED",
+    "ADMISSION_MAX_PER_CLIENT",
+    "ADMISSION_MEMORY_HIGH",
+    "ADMISSION_TASK_BYTES",
+    "ADMISSION_RETRY_AFTER",
+    "TASK_MAX_RSS_BYTES",
+    "TASK_MEMORY_CHECK_INTERVAL",
+    "CANCEL_GRACE_PERIOD",
+    "CANCEL_KILL_AFTER",
+    "RESULT_SPOOL_DIR",
+    "RESULT_SPOOL_THRESHOLD",
+    "RESULT_CHUNK_SIZE",
+    "THREAD_LANE_SIZE",
+    "ASYNC_LANE_SIZE",
+    "LOG_LEVEL",
+    "LOG_DIR",
+    "LOG_MAX_BYTES",
+    "LOG_BACKUP_COUNT",
+    "LOG_BATCH_SIZE",
+    "TIMEIT_SAMPLE_RATE",
+    "TIMEIT_FLUSH_INTERVAL",
+    "CONCURRENCY_ADAPTIVE",
+    "CONCURRENCY_MIN",
+    "CONCURRENCY_MAX",
+    "CONCURRENCY_INTERVAL",
+    "CONCURRENCY_CPU_TARGET",
+    "CONCURRENCY_MEMORY_HIGH",
+    "CONCURRENCY_LOAD_HIGH",
+    "CONCURRENCY_SWAP_HIGH",
+    "CONCURRENCY_COOLDOWN",
+    "CONCURRENCY_BACKOFF",
+    "JOURNAL_ENABLED",
+    "JOURNAL_DIR",
+    "JOURNAL_FLUSH_INTERVAL",
+    "JOURNAL_SNAPSHOT_EVERY",
+    "RETENTION_MAX_FINISHED",
+    "RETENTION_TTL",
+    "RETENTION_SWEEP_INTERVAL",
+    "RETENTION_ARCHIVE",
 ]
\ No newline at end of file
@@ -1,32 +1,180 @@
+import atexit
+import copy
+import json
 import logging
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, RotatingFileHandler
+import multiprocessing
 import os
+import queue
+import threading
+from typing import Any, List, Optional
+
+from configs.settings import LOG_BACKUP_COUNT, LOG_BATCH_SIZE, LOG_DIR, LOG_LEVEL, LOG_MAX_BYTES
+
+
+class JsonFormatter(logging.Formatter):
+    """ one JSON object per record: time, level, logger, message, plus exception and process when set """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record, self.datefmt),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        if record.processName != "MainProcess":
+            entry["process"] = record.processName
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class LogQueueHandler(QueueHandler):
+    """
+    Hands records to the listener. Only the message and traceback are rendered here,
+    which pickling needs anyway; the JSON formatting happens on the listener thread.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.message = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class BatchedStreamHandler(logging.StreamHandler):
+    def emit_batch(self, records: List[logging.LogRecord]) -> None:
+        try:
+            self.stream.write("".join(self.format(record) + self.terminator for record in records))
+            self.flush()
+        except Exception:
+            self.handleError(records[-1])
+
+
+class BatchedRotatingFileHandler(RotatingFileHandler):
+    """ writes a batch of records with one flush, rotating between records as needed """
+
+    def emit_batch(self, records: List[logging.LogRecord]) -> None:
+        record = records[-1]
+        try:
+            for record in records:
+                message = self.format(record) + self.terminator
+                if self.stream is None:
+                    self.stream = self._open()
+                if self.maxBytes and self.stream.tell() + len(message) >= self.maxBytes:
+                    self.doRollover()
+                self.stream.write(message)
+            self.flush()
+        except Exception:
+            self.handleError(record)
+
+
+class BatchingQueueListener:
+    """
+    The one thread that writes a process tree's log records: it blocks for a record,
+    then takes whatever else is queued (up to ``batch_size``) and gives each handler the
+    whole batch, so a burst of records costs one write and flush per handler.
+    """
+
+    def __init__(self, log_queue: Any, handlers: List[logging.Handler], batch_size: int = 256) -> None:
+        self.queue = log_queue
+        self.handlers = handlers
+        self.batch_size = batch_size
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="log-listener", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            try:
+                record = self.queue.get(timeout=0.2)
+            except queue.Empty:
+                if self._stopping.is_set():
+                    return
+                continue
+            if record is None:
+                return
+            batch = [record]
+            stopping = False
+            while len(batch) < self.batch_size:
+                try:
+                    record = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if record is None:
+                    stopping = True
+                    break
+                batch.append(record)
+            self.handle(batch)
+            if stopping:
+                return
+
+    def handle(self, batch: List[logging.LogRecord]) -> None:
+        for handler in self.handlers:
+            records = [record for record in batch if record.levelno >= handler.level]
+            if not records:
+                continue
+            emit_batch = getattr(handler, "emit_batch", None)
+            if emit_batch is not None:
+                emit_batch(records)
+            else:
+                for record in records:
+                    handler.handle(record)
+
+    def stop(self, timeout: float = 5) -> None:
+        """ write out everything queued so far, then end the thread """
+        if self._thread is None:
+            return
+        try:
+            self.queue.put(None)
+        except RuntimeError:
+            # a multiprocessing queue this process never wrote to cannot start its feeder
+            # thread at interpreter shutdown; stop once the queue runs dry instead
+            self._stopping.set()
+        self._thread.join(timeout)
+        self._thread = None
+        for handler in self.handlers:
+            handler.close()
+
 
 def setup_logging(name):
-    os.makedirs("logs",exist_ok=True)
-    #time_now = time.asctime()
+    """
+    Logger ``name`` at LOG_LEVEL, so disabled calls are dropped before a record is even
+    made. Records go through a multiprocessing queue, which forked worker processes
+    inherit, to a listener thread in this process that writes them as JSON lines to the
+    console and to the rotating ``LOG_DIR/<name>.log``.
+    """
     logger = logging.getLogger(name)
-    logger.setLevel(logging.DEBUG)
-    
+    logger.setLevel(LOG_LEVEL)
+
     if logger.handlers:
         return logger
-    
-    formatter = logging.Formatter(
-        '{"time": "%(asctime)s", "level": "%(levelname)s", '
-        '"logger": "%(name)s", "message": %(message)s}',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
-    handler = RotatingFileHandler(
-        f'logs/{name}.log',
-        maxBytes=10_000_000,
-        backupCount=10
-    )
 
+    os.makedirs(LOG_DIR, exist_ok=True)
+    formatter = JsonFormatter(datefmt='%Y-%m-%d %H:%M:%S')
+    handler = BatchedRotatingFileHandler(
+        os.path.join(LOG_DIR, f"{name}.log"),
+        maxBytes=LOG_MAX_BYTES,
+        backupCount=LOG_BACKUP_COUNT,
+        encoding="utf-8",
+    )
     handler.setFormatter(formatter)
-    logger.addHandler(handler)
 
-    console_handler = logging.StreamHandler()
+    console_handler = BatchedStreamHandler()
     console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
-    
-    return logger    
\ No newline at end of file
+
+    log_queue = multiprocessing.Queue()
+    listener = BatchingQueueListener(log_queue, [handler, console_handler], batch_size=LOG_BATCH_SIZE)
+    listener.start()
+    atexit.register(listener.stop)
+    logger.addHandler(LogQueueHandler(log_queue))
+
+    return logger
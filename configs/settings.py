@@ -1,6 +1,100 @@
+import os
+import tempfile
+
 PORT = 8000
 HOST = "127.0.0.1"
 BASE_URL = "http://127.0.0.1"
 WS_URL = f"ws://127.0.0.1:{PORT}/ws"
-STATUS_FREQUENCY = 5
-QUEUE_CHECK =  2
\ No newline at end of file
+WORKER_MAX_TASKS = 100
+WORKER_MAX_RSS_BYTES = 512 * 1024 * 1024
+TASK_TABLE_CAPACITY = 65536
+WS_BATCH_WINDOW = 0.05
+WS_BATCH_MAX = 500
+WS_MAX_PENDING = 10000
+WS_SEND_TIMEOUT = 5
+# task ids one multiplexed /ws connection may subscribe to
+WS_MAX_SUBSCRIPTIONS = 10_000
+RATE_LIMIT_REQUESTS = 5
+RATE_LIMIT_PERIOD = 20
+RATE_LIMIT_MAX_CLIENTS = 10_000
+# path prefix -> (max requests, period in seconds), overriding the defaults above
+RATE_LIMIT_ROUTES = {}
+# "local" keeps buckets per process, "shared" shares them between uvicorn workers on a node
+RATE_LIMIT_BACKEND = "local"
+RATE_LIMIT_SHM_NAME = "task_server_ratelimit"
+RATE_LIMIT_BATCH = 1
+MAX_BATCH_SIZE = 10_000
+# 16-bit node id baked into task ids; None derives one from the host's MAC address
+NODE_ID = None
+# dispatch turns per round for each priority class of the task queue
+PRIORITY_WEIGHTS = {"high": 4, "normal": 2, "low": 1}
+# default and maximum page size of /tasks/list
+LIST_PAGE_SIZE = 100
+LIST_MAX_PAGE_SIZE = 1000
+# wall-clock seconds a task may run before it is failed; None = no limit
+TASK_TIMEOUT = None
+# submissions are answered 503 + Retry-After (seconds) once queued tasks would exceed
+# MAX_QUEUED, a client's unfinished tasks MAX_PER_CLIENT, or host memory (percent, plus
+# TASK_BYTES of bookkeeping per new task) MEMORY_HIGH; None disables a check
+ADMISSION_MAX_QUEUED = 50_000
+ADMISSION_MAX_PER_CLIENT = None
+ADMISSION_MEMORY_HIGH = 90.0
+ADMISSION_TASK_BYTES = 2048
+ADMISSION_RETRY_AFTER = 1
+# default RSS limit in bytes of a cpu lane task's worker, checked every CHECK_INTERVAL
+# seconds; None = no limit unless the task's spec sets "memory_limit"
+TASK_MAX_RSS_BYTES = None
+TASK_MEMORY_CHECK_INTERVAL = 0.5
+# stopping a task: seconds between raising its cancel flag and SIGTERM, then until SIGKILL
+CANCEL_GRACE_PERIOD = 1.0
+CANCEL_KILL_AFTER = 2.0
+# results from this size on are spooled to a file by the worker instead of piped back;
+# /dev/shm keeps spool files in memory where it exists
+RESULT_SPOOL_DIR = os.environ.get(
+    "TASK_RESULT_SPOOL_DIR", "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+)
+RESULT_SPOOL_THRESHOLD = 1024 * 1024
+RESULT_CHUNK_SIZE = 1024 * 1024
+# concurrency of the in-server lanes; None sizes the thread lane for I/O from the CPU count
+THREAD_LANE_SIZE = None
+ASYNC_LANE_SIZE = 1000
+# adaptive number of cpu lane workers, between MIN and MAX (None = two per core),
+# re-evaluated every INTERVAL seconds from CPU use (percent), memory use (percent),
+# runnable threads per core (LOAD_HIGH) and swap traffic (SWAP_HIGH, bytes/s); BACKOFF
+# is the multiplicative decrease, applied at most once per COOLDOWN seconds
+CONCURRENCY_ADAPTIVE = True
+CONCURRENCY_MIN = 1
+CONCURRENCY_MAX = None
+CONCURRENCY_INTERVAL = 2.0
+CONCURRENCY_CPU_TARGET = 90.0
+CONCURRENCY_MEMORY_HIGH = 90.0
+CONCURRENCY_LOAD_HIGH = 1.5
+CONCURRENCY_SWAP_HIGH = 1024 * 1024
+CONCURRENCY_BACKOFF = 0.5
+CONCURRENCY_COOLDOWN = 10.0
+# logging: records below LOG_LEVEL are dropped at the call site; the rest are written
+# by a listener thread, up to LOG_BATCH_SIZE records per write, to rotating files in LOG_DIR
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")
+LOG_DIR = os.environ.get("LOG_DIR", "logs")
+LOG_MAX_BYTES = 10_000_000
+LOG_BACKUP_COUNT = 10
+LOG_BATCH_SIZE = 256
+# fraction of @timeit calls that are timed (all are counted), and seconds between
+# summaries of the aggregated timings in the log (worker processes ship theirs as often)
+TIMEIT_SAMPLE_RATE = 1.0
+TIMEIT_FLUSH_INTERVAL = 60.0
+# write-ahead log of task state transitions, replayed on startup; with several uvicorn
+# workers only the first to lock JOURNAL_DIR keeps one
+JOURNAL_ENABLED = True
+JOURNAL_DIR = os.environ.get("TASK_JOURNAL_DIR", "journal")
+# seconds between group commits (one write + fsync for everything buffered)
+JOURNAL_FLUSH_INTERVAL = 0.05
+# records between compacted snapshots
+JOURNAL_SNAPSHOT_EVERY = 100_000
+# finished tasks kept in memory: at most this many, each for the TTL of its status (seconds)
+RETENTION_MAX_FINISHED = 10_000
+RETENTION_TTL = {"completed": 3600, "cancelled": 600, "failed": 86400}
+# seconds between eviction sweeps when the scheduler is otherwise idle
+RETENTION_SWEEP_INTERVAL = 1.0
+# write evicted tasks to the journal archive instead of dropping them
+RETENTION_ARCHIVE = True
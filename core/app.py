@@ -4,7 +4,7 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from core.lifespan import lifespan
 from core.middleware import rate_limit_middleware
-from tasks import tasks_router
+from tasks import metrics_router, tasks_router
 from ws import ws_router
 
 
@@ -20,6 +20,7 @@ def create_app() -> FastAPI:
 
     app.include_router(tasks_router)
     app.include_router(ws_router)
+    app.include_router(metrics_router)
     app.middleware("http")(rate_limit_middleware)
 
     
@@ -1,39 +1,218 @@
 from contextlib import asynccontextmanager
-from typing import AsyncGenerator, Any
-from multiprocessing import Manager
+from typing import AsyncGenerator, Any, Dict, Tuple
 import asyncio
 import logging
+import shutil
+import tempfile
 
-from core.middleware import RateLimiter, rate_limit_reset_scheduler, stop_rate_limit_scheduler
-from core.scheduler import start_task_scheduler, stop_scheduler
-from utils import cleanup_processes, get_optimal_process_count
-from helper_class import TaskManager
+from core.middleware import RateLimiter, LocalBucketStore, SharedBucketStore
+from core.scheduler import start_concurrency_controller, start_task_scheduler, start_timings_flush, stop_scheduler
+from configs import (
+    WORKER_MAX_TASKS,
+    WORKER_MAX_RSS_BYTES,
+    TASK_TABLE_CAPACITY,
+    RATE_LIMIT_REQUESTS,
+    RATE_LIMIT_PERIOD,
+    RATE_LIMIT_MAX_CLIENTS,
+    RATE_LIMIT_ROUTES,
+    RATE_LIMIT_BACKEND,
+    RATE_LIMIT_SHM_NAME,
+    RATE_LIMIT_BATCH,
+    PRIORITY_WEIGHTS,
+    JOURNAL_ENABLED,
+    JOURNAL_DIR,
+    JOURNAL_FLUSH_INTERVAL,
+    JOURNAL_SNAPSHOT_EVERY,
+    RETENTION_MAX_FINISHED,
+    RETENTION_TTL,
+    CANCEL_GRACE_PERIOD,
+    CANCEL_KILL_AFTER,
+    RESULT_SPOOL_DIR,
+    RESULT_SPOOL_THRESHOLD,
+    THREAD_LANE_SIZE,
+    ASYNC_LANE_SIZE,
+    TIMEIT_FLUSH_INTERVAL,
+    ADMISSION_MAX_QUEUED,
+    ADMISSION_MAX_PER_CLIENT,
+    ADMISSION_MEMORY_HIGH,
+    ADMISSION_TASK_BYTES,
+    ADMISSION_RETRY_AFTER,
+    TASK_MEMORY_CHECK_INTERVAL,
+    CONCURRENCY_ADAPTIVE,
+    CONCURRENCY_MIN,
+    CONCURRENCY_MAX,
+    CONCURRENCY_CPU_TARGET,
+    CONCURRENCY_MEMORY_HIGH,
+    CONCURRENCY_LOAD_HIGH,
+    CONCURRENCY_SWAP_HIGH,
+    CONCURRENCY_COOLDOWN,
+    CONCURRENCY_BACKOFF,
+)
+from utils import cleanup_processes, get_optimal_process_count, task_latency
+from helper_class import (
+    TaskManager,
+    SharedTaskTable,
+    StatusHub,
+    FairTaskQueue,
+    TaskJournal,
+    JournalLocked,
+    TaskRetention,
+    TaskStatus,
+    TaskTableFullError,
+    TaskSpec,
+    TaskResultStore,
+    TaskLane,
+    ConcurrencyController,
+    AdmissionController,
+)
+from worker import AsyncLane, ThreadLane, WorkerPool, registry, run_task
 
 logger = logging.getLogger("server")
 
+# queue client for tasks re-enqueued from the journal
+RECOVERED_CLIENT = "recovered"
+
+
+def restore_tasks(app: Any, recovered: Dict[str, Tuple[float, str, str]]) -> None:
+    """ load journaled tasks; unfinished ones are queued again in id (= submission) order """
+    requeued = 0
+    skipped = 0
+    try:
+        for task_id in sorted(recovered):
+            _, status, extra = recovered[task_id]
+            try:
+                status = TaskStatus(status)
+                spec = TaskSpec.from_json(extra) if extra else TaskSpec()
+                lane = registry.get(spec.task_type).lane
+            except (TypeError, ValueError, KeyError) as e:
+                logger.warning("Skipping journaled task %r: %s", task_id, e)
+                skipped += 1
+                continue
+            if status in (TaskStatus.QUEUED, TaskStatus.RUNNING):
+                app.state.task_manager.add_task(task_id, TaskStatus.QUEUED)
+                if extra:
+                    app.state.task_specs[task_id] = spec
+                app.state.queues[lane].put_nowait(task_id, client=RECOVERED_CLIENT)
+                requeued += 1
+            else:
+                app.state.task_manager.add_task(task_id, status)
+    except TaskTableFullError:
+        logger.error("Task table full while restoring the journal, remaining tasks are dropped")
+    logger.info(
+        "Restored %s tasks from the journal, %s queued again, %s skipped",
+        len(recovered) - skipped, requeued, skipped,
+    )
+
+
 @asynccontextmanager
 async def lifespan(app: Any) -> AsyncGenerator[None, None]:
-    max_requests = 5
-    reset_interval_seconds = 20
-    manager = Manager()
-    
-    
-    shared_tasks = manager.dict()
-
-    app.state.limiter = RateLimiter(max_requests=max_requests, reset_interval_seconds=reset_interval_seconds)
-    app.state.shared_tasks = shared_tasks
-    app.state.processes = {}
-    app.state.queue = asyncio.Queue()
-    app.state.scheduler_event = asyncio.Event()
-    app.state.task_manager = TaskManager(shared_tasks)
-    app.state.max_process = get_optimal_process_count()
-    app.state.scheduler_task = start_task_scheduler(app)
-    app.state.scheduler_rate = rate_limit_reset_scheduler(app.state.limiter)
-
+    shared_tasks = SharedTaskTable(capacity=TASK_TABLE_CAPACITY)
+    # closed and unlinked even if startup fails, so no shared memory segment leaks
     try:
-        yield
+        if RATE_LIMIT_BACKEND == "shared":
+            bucket_store = SharedBucketStore(
+                name=RATE_LIMIT_SHM_NAME, slots=RATE_LIMIT_MAX_CLIENTS, batch_size=RATE_LIMIT_BATCH
+            )
+        else:
+            bucket_store = LocalBucketStore(max_clients=RATE_LIMIT_MAX_CLIENTS)
+
+        app.state.limiter = RateLimiter(
+            max_requests=RATE_LIMIT_REQUESTS,
+            period_seconds=RATE_LIMIT_PERIOD,
+            route_limits=RATE_LIMIT_ROUTES,
+            store=bucket_store,
+        )
+        app.state.shared_tasks = shared_tasks
+        # one queue per execution lane; ``queue`` and ``pool`` are the cpu lane's
+        app.state.queues = {lane: FairTaskQueue(PRIORITY_WEIGHTS) for lane in TaskLane}
+        app.state.queue = app.state.queues[TaskLane.CPU]
+        app.state.scheduler_event = asyncio.Event()
+        # task id -> spec given at submission, handed to the pool on dispatch
+        app.state.task_specs = {}
+        app.state.task_manager = TaskManager(shared_tasks)
+        app.state.status_hub = StatusHub()
+        app.state.task_manager.add_listener(app.state.status_hub.publish)
+        app.state.retention = TaskRetention(max_finished=RETENTION_MAX_FINISHED, ttl=RETENTION_TTL)
+        app.state.task_manager.add_listener(app.state.retention.track)
+        app.state.results = TaskResultStore()
+        app.state.task_manager.add_listener(app.state.results.track)
+        app.state.admission = AdmissionController(
+            max_queued=ADMISSION_MAX_QUEUED,
+            max_per_client=ADMISSION_MAX_PER_CLIENT,
+            memory_high=ADMISSION_MEMORY_HIGH,
+            task_bytes=ADMISSION_TASK_BYTES,
+            retry_after=ADMISSION_RETRY_AFTER,
+        )
+        app.state.task_manager.add_listener(app.state.admission.track)
+        app.state.task_manager.add_listener(task_latency().track)
+        app.state.journal = None
+        if JOURNAL_ENABLED:
+            journal = TaskJournal(
+                JOURNAL_DIR,
+                flush_interval=JOURNAL_FLUSH_INTERVAL,
+                snapshot_every=JOURNAL_SNAPSHOT_EVERY,
+            )
+            try:
+                recovered = journal.open()
+            except JournalLocked as e:
+                # another uvicorn worker owns the journal; replaying it here would run its tasks twice
+                logger.warning("%s, this process runs without a journal", e)
+            else:
+                app.state.journal = journal
+                app.state.task_manager.add_listener(journal.record)
+                restore_tasks(app, recovered)
+        app.state.max_process = get_optimal_process_count()
+        app.state.concurrency = ConcurrencyController(
+            initial=app.state.max_process,
+            minimum=CONCURRENCY_MIN,
+            maximum=CONCURRENCY_MAX or get_optimal_process_count("io"),
+            cpu_target=CONCURRENCY_CPU_TARGET,
+            memory_high=CONCURRENCY_MEMORY_HIGH,
+            load_high=CONCURRENCY_LOAD_HIGH,
+            swap_high=CONCURRENCY_SWAP_HIGH,
+            backoff=CONCURRENCY_BACKOFF,
+            cooldown=CONCURRENCY_COOLDOWN,
+        )
+        # per server process, so several uvicorn workers never share (or clean up) spool files
+        spool_dir = tempfile.mkdtemp(prefix="task_results_", dir=RESULT_SPOOL_DIR)
+        app.state.pool = WorkerPool(
+            size=app.state.concurrency.limit,
+            target=run_task,
+            shared_tasks=shared_tasks,
+            max_tasks_per_worker=WORKER_MAX_TASKS,
+            max_rss_bytes=WORKER_MAX_RSS_BYTES,
+            grace_period=CANCEL_GRACE_PERIOD,
+            kill_after=CANCEL_KILL_AFTER,
+            spool_dir=spool_dir,
+            spool_threshold=RESULT_SPOOL_THRESHOLD,
+            memory_check_interval=TASK_MEMORY_CHECK_INTERVAL,
+            timings_interval=TIMEIT_FLUSH_INTERVAL,
+        )
+        app.state.executors = {
+            TaskLane.CPU: app.state.pool,
+            TaskLane.THREAD: ThreadLane(
+                size=THREAD_LANE_SIZE or get_optimal_process_count("io"), shared_tasks=shared_tasks
+            ),
+            TaskLane.ASYNC: AsyncLane(size=ASYNC_LANE_SIZE, shared_tasks=shared_tasks),
+        }
+        for executor in app.state.executors.values():
+            executor.start()
+        app.state.scheduler_task = start_task_scheduler(app)
+        if CONCURRENCY_ADAPTIVE:
+            app.state.concurrency_task = start_concurrency_controller(app)
+        app.state.timings_task = start_timings_flush()
+
+        try:
+            yield
+        finally:
+            await stop_scheduler(app)
+            await cleanup_processes(app)
+            for executor in app.state.executors.values():
+                executor.shutdown()
+            shutil.rmtree(spool_dir, ignore_errors=True)
+            if app.state.journal is not None:
+                app.state.journal.close()
+            app.state.limiter.close()
     finally:
-        await stop_scheduler(app)
-        await stop_rate_limit_scheduler(app)
-        await cleanup_processes(app)
-        manager.shutdown()
\ No newline at end of file
+        shared_tasks.close()
+        shared_tasks.unlink()
@@ -1,8 +1,11 @@
-from .rate_limiter import rate_limit_middleware, RateLimiter, rate_limit_reset_scheduler, stop_rate_limit_scheduler
+from .rate_limiter import rate_limit_middleware, RateLimiter, RateLimitResult
+from .bucket_store import BucketStore, LocalBucketStore, SharedBucketStore
 
 __all__ = [
     "rate_limit_middleware",
     "RateLimiter",
-    "rate_limit_reset_scheduler",
-    "stop_rate_limit_scheduler"
+    "RateLimitResult",
+    "BucketStore",
+    "LocalBucketStore",
+    "SharedBucketStore",
 ]
\ No newline at end of file
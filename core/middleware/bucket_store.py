@@ -0,0 +1,196 @@
+import fcntl
+import hashlib
+import os
+import struct
+import tempfile
+import time
+from collections import OrderedDict
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import List, Optional, Tuple
+
+BucketKey = Tuple[str, str]
+
+
+class BucketStore:
+    """
+    Storage for token buckets. ``take`` refills the bucket for ``key`` to ``now``, takes one
+    token if there is one, and returns whether it did and how many tokens are left.
+    """
+
+    idle_ttl: Optional[float] = None
+
+    def take(self, key: BucketKey, capacity: int, rate: float, now: float) -> Tuple[bool, float]:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class LocalBucketStore(BucketStore):
+    """
+    Buckets in a per-process, LRU-ordered dict capped at ``max_clients`` entries. Buckets
+    idle for ``idle_ttl`` seconds are evicted from the cold end on every call.
+    """
+
+    def __init__(self, max_clients: int = 10_000, idle_ttl: Optional[float] = None) -> None:
+        self.max_clients = max_clients
+        self.idle_ttl = idle_ttl
+        self.buckets: "OrderedDict[BucketKey, List[float]]" = OrderedDict()
+
+    def take(self, key: BucketKey, capacity: int, rate: float, now: float) -> Tuple[bool, float]:
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = [float(capacity), now]
+        else:
+            self.buckets.move_to_end(key)
+            bucket[0] = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+        self._evict(now)
+
+        allowed = bucket[0] >= 1
+        if allowed:
+            bucket[0] -= 1
+        return allowed, bucket[0]
+
+    def _evict(self, now: float) -> None:
+        buckets = self.buckets
+        while len(buckets) > self.max_clients:
+            buckets.popitem(last=False)
+        while buckets:
+            _, (_, last_seen) = next(iter(buckets.items()))
+            if now - last_seen < self.idle_ttl:
+                break
+            buckets.popitem(last=False)
+
+
+class SharedBucketStore(BucketStore):
+    """
+    Buckets in a named shared memory block, so every uvicorn worker on the node enforces
+    one set of limits.
+
+    The block is split into ``stripes``; a key hashes to one stripe and is probed for in
+    up to ``probe`` slots of it. Each stripe is guarded by a byte-range ``lockf`` lock on a
+    lock file, so workers only contend when they hit the same stripe. When no slot is free
+    the stalest bucket in the probe window is replaced, which keeps memory fixed.
+
+    With ``batch_size`` > 1 a worker leases up to that many tokens per trip to shared
+    memory and spends them locally for ``lease_seconds``; this trades a little accuracy
+    (at most ``batch_size`` - 1 tokens per worker) for far fewer locked updates.
+
+    The block and lock file outlive any single worker and are left in place on close;
+    call :meth:`unlink` to remove them.
+    """
+
+    SLOT = struct.Struct("<Qdd")
+
+    def __init__(
+        self,
+        name: str,
+        slots: int = 10_000,
+        stripes: int = 64,
+        probe: int = 8,
+        batch_size: int = 1,
+        lease_seconds: float = 1.0,
+    ) -> None:
+        self.name = name
+        self.stripes = stripes
+        self.probe = probe
+        self.batch_size = batch_size
+        self.lease_seconds = lease_seconds
+        self.shm = open_shared_memory(name, max(slots, stripes) * self.SLOT.size)
+        self.slots_per_stripe = self.shm.size // self.SLOT.size // stripes
+        self.lock_path = os.path.join(tempfile.gettempdir(), f"{name}.lock")
+        self._lock_fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+        # key -> [leased tokens, lease expiry]
+        self.leases: "OrderedDict[BucketKey, List[float]]" = OrderedDict()
+
+    @staticmethod
+    def _hash(key: BucketKey) -> int:
+        digest = hashlib.blake2b("\0".join(key).encode(), digest_size=8).digest()
+        return int.from_bytes(digest, "little") or 1
+
+    def take(self, key: BucketKey, capacity: int, rate: float, now: float) -> Tuple[bool, float]:
+        self._expire_leases(now)
+        lease = self.leases.get(key)
+        if lease is not None and lease[0] >= 1:
+            lease[0] -= 1
+            return True, lease[0]
+
+        leased, tokens = self._take_shared(key, capacity, rate, now)
+        if leased == 0:
+            return False, tokens
+        if leased > 1:
+            self.leases[key] = [leased - 1, now + self.lease_seconds]
+            self.leases.move_to_end(key)
+        return True, tokens + leased - 1
+
+    def _expire_leases(self, now: float) -> None:
+        while self.leases:
+            _, (_, expires) = next(iter(self.leases.items()))
+            if expires > now:
+                break
+            self.leases.popitem(last=False)
+
+    def _take_shared(self, key: BucketKey, capacity: int, rate: float, now: float) -> Tuple[int, float]:
+        """Take up to ``batch_size`` tokens; returns (tokens taken, tokens left)."""
+        key_hash = self._hash(key)
+        stripe = key_hash % self.stripes
+        base = stripe * self.slots_per_stripe
+        start = (key_hash // self.stripes) % self.slots_per_stripe
+        buf = self.shm.buf
+
+        fcntl.lockf(self._lock_fd, fcntl.LOCK_EX, 1, stripe)
+        try:
+            target = None
+            stalest = None
+            for i in range(min(self.probe, self.slots_per_stripe)):
+                slot = base + (start + i) % self.slots_per_stripe
+                slot_hash, tokens, last = self.SLOT.unpack_from(buf, slot * self.SLOT.size)
+                if slot_hash == key_hash:
+                    target = slot
+                    tokens = min(capacity, tokens + (now - last) * rate)
+                    break
+                last_used = 0.0 if slot_hash == 0 else last
+                if stalest is None or last_used < stalest[1]:
+                    stalest = (slot, last_used)
+            if target is None:
+                target, tokens = stalest[0], float(capacity)
+
+            taken = min(self.batch_size, int(tokens))
+            tokens -= taken
+            self.SLOT.pack_into(buf, target * self.SLOT.size, key_hash, tokens, now)
+        finally:
+            fcntl.lockf(self._lock_fd, fcntl.LOCK_UN, 1, stripe)
+        return taken, tokens
+
+    def close(self) -> None:
+        self.shm.close()
+        os.close(self._lock_fd)
+
+    def unlink(self) -> None:
+        # SharedMemory.unlink unregisters from the tracker, undo open_shared_memory first
+        resource_tracker.register(self.shm._name, "shared_memory")
+        self.shm.unlink()
+        os.unlink(self.lock_path)
+
+
+def open_shared_memory(name: str, size: int) -> SharedMemory:
+    """
+    Create the named block, or attach to it if another process already has. The block is
+    unregistered from this process's resource tracker so it is not destroyed when the
+    process that happened to create it exits.
+    """
+    for _ in range(50):
+        try:
+            shm = SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            try:
+                shm = SharedMemory(name=name)
+            except ValueError:
+                # the creator has not sized the block yet
+                time.sleep(0.01)
+                continue
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+    raise RuntimeError(f"Shared memory block {name} was never initialised")
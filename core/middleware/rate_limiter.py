@@ -1,91 +1,110 @@
 # ratelimit.py
+import math
 import time
-from collections import defaultdict
-from typing import DefaultDict
-from fastapi import FastAPI, Request
-import asyncio
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+from fastapi import Request
 import logging
 
 from fastapi.responses import JSONResponse
 
+from core.middleware.bucket_store import BucketStore, LocalBucketStore
+from utils.metrics import rate_limited
 
-logger = logging.getLogger("server")
-
-
-class RateLimiter:
-    def __init__(self, max_requests: int = 5, reset_interval_seconds: int = 3600):
-        self.max_requests = max_requests
-        self.reset_interval_seconds = reset_interval_seconds
-        self.client_requests: DefaultDict[str, int] = defaultdict(int)
-        self._lock = asyncio.Lock()
-
-    async def is_allowed(self, client_ip: str) -> bool:
-        async with self._lock:
-            if self.client_requests[client_ip] < self.max_requests:
-                self.client_requests[client_ip] += 1
-                return True
-            return False
-
-    async def reset_counters(self):
-        async with self._lock:
-            self.client_requests.clear()
-        logger.info("[RateLimiter] Counters reset")
-
-    def get_reset_time(self) -> int:
-        now = time.time()
-        return int((now // self.reset_interval_seconds) + 1) * self.reset_interval_seconds
-            
 
+logger = logging.getLogger("server")
 
-async def periodic_reset_rate_limit(limiter: RateLimiter):
-    interval = limiter.reset_interval_seconds
 
-    now = time.time()
-    next_reset = ((now // interval) + 1) * interval
-    initial_delay = next_reset - now
+@dataclass(frozen=True)
+class RateLimitResult:
+    allowed: bool
+    limit: int
+    remaining: int
+    # seconds until the bucket is full again / until the next request would be allowed
+    reset_after: float
+    retry_after: float
 
-    logger.info("RateLimiter: First reset in %.0f seconds at %d", initial_delay, next_reset)
-    await asyncio.sleep(initial_delay)
 
-    while True:
-        await limiter.reset_counters()
-        await asyncio.sleep(interval)
+class RateLimiter:
+    """
+    Token-bucket limiter keyed by (client, route).
+
+    Buckets refill lazily when they are touched, so there is no reset task. Where they are
+    kept is up to ``store``: a per-process :class:`LocalBucketStore` by default, or a
+    :class:`SharedBucketStore` to share limits between server processes. Idle buckets are
+    dropped after ``idle_ttl`` seconds, by default the longest refill period (after which a
+    bucket is full anyway). Everything runs synchronously on the event loop, so no lock is
+    needed in-process.
+    """
+
+    def __init__(
+        self,
+        max_requests: int = 5,
+        period_seconds: float = 3600,
+        max_clients: int = 10_000,
+        idle_ttl: Optional[float] = None,
+        route_limits: Optional[Dict[str, Tuple[int, float]]] = None,
+        store: Optional[BucketStore] = None,
+    ):
+        self.max_requests = max_requests
+        self.period_seconds = period_seconds
+        # path prefix -> (max_requests, period_seconds); the longest matching prefix wins
+        self.route_limits = dict(sorted((route_limits or {}).items(), key=lambda kv: -len(kv[0])))
+        periods = [period for _, period in self.route_limits.values()] + [period_seconds]
+        self.idle_ttl = idle_ttl if idle_ttl is not None else max(periods)
+        self.store = store or LocalBucketStore(max_clients=max_clients)
+        if self.store.idle_ttl is None:
+            self.store.idle_ttl = self.idle_ttl
+
+    def limit_for(self, path: str) -> Tuple[str, int, float]:
+        for prefix, (max_requests, period) in self.route_limits.items():
+            if path.startswith(prefix):
+                return prefix, max_requests, period
+        return "", self.max_requests, self.period_seconds
+
+    def acquire(self, client_ip: str, path: str, now: Optional[float] = None) -> RateLimitResult:
+        now = time.monotonic() if now is None else now
+        route, capacity, period = self.limit_for(path)
+        rate = capacity / period
+
+        allowed, tokens = self.store.take((client_ip, route), capacity, rate, now)
+        return RateLimitResult(
+            allowed=allowed,
+            limit=capacity,
+            remaining=int(tokens),
+            reset_after=(capacity - tokens) / rate,
+            retry_after=0.0 if allowed else (1 - tokens) / rate,
+        )
+
+    def close(self) -> None:
+        self.store.close()
+
+
+def rate_limit_headers(result: RateLimitResult) -> Dict[str, str]:
+    return {
+        "X-RateLimit-Limit": str(result.limit),
+        "X-RateLimit-Remaining": str(result.remaining),
+        "X-RateLimit-Reset": str(int(time.time() + result.reset_after)),
+    }
 
 
 async def rate_limit_middleware(request: Request, call_next):
-    if request.url.path == "/tasks/health":
+    limiter = getattr(request.app.state, "limiter", None)
+    if limiter is None or request.url.path in ("/tasks/health", "/metrics"):
         return await call_next(request)
 
-    limiter = request.app.state.limiter
-    client_ip = request.client.host
+    result = limiter.acquire(request.client.host, request.url.path)
+    headers = rate_limit_headers(result)
 
-    if await limiter.is_allowed(client_ip):
-        return await call_next(request)
+    if result.allowed:
+        response = await call_next(request)
+        response.headers.update(headers)
+        return response
 
-    # Build response on failure
-    reset_time = limiter.get_reset_time()
-    headers = {
-        "Retry-After": str(int(reset_time - time.time())),
-        "X-RateLimit-Limit": str(limiter.max_requests),
-        "X-RateLimit-Remaining": "0",
-        "X-RateLimit-Reset": str(int(reset_time)),
-    }
+    rate_limited.inc()
+    headers["Retry-After"] = str(max(1, math.ceil(result.retry_after)))
     return JSONResponse(
         status_code=429,
         content="Rate limit exceeded. Try again later.",
         headers=headers,
     )
-    
-def rate_limit_reset_scheduler(limiter):
-    return asyncio.create_task(periodic_reset_rate_limit(limiter))
-
-async def stop_rate_limit_scheduler(app) -> None:
-    if hasattr(app.state, "scheduler_rate"):
-        app.state.scheduler_rate.cancel()
-        try:
-            await app.state.scheduler_rate
-        except (asyncio.CancelledError, RuntimeError):
-            pass
-        logger.info("Rate limit scheduler stopped.")
-    else:
-        logger.debug("No rate limit scheduler found to stop.")
\ No newline at end of file
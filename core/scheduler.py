@@ -1,62 +1,127 @@
 import asyncio
+import contextlib
 import logging
-from multiprocessing import Process
+import time
 from typing import Any
 
 from fastapi import FastAPI
-from configs import QUEUE_CHECK
-from worker import complicated_task
-from helper_class import TaskStatus
+from helper_class import LoadSampler, TaskLane, TaskSpec, TaskStatus
 
-from utils import cleanup_processes
+from configs import (
+    CONCURRENCY_INTERVAL,
+    RETENTION_SWEEP_INTERVAL,
+    TASK_MAX_RSS_BYTES,
+    TASK_TIMEOUT,
+    TIMEIT_FLUSH_INTERVAL,
+)
+from utils import cleanup_processes, evict_finished_tasks, timings
+from utils.metrics import ipc_latency
 
 logger = logging.getLogger("server")
 
-async def start_new_task(app: FastAPI) -> bool:
-    try:
-        task_id = app.state.queue.get_nowait()
-    except asyncio.QueueEmpty:
-        return False
-    app.state.task_manager.update_task(task_id, TaskStatus.RUNNING)
-    p = Process(target=complicated_task, args=(task_id, app.state.shared_tasks))
-    p.start()
-    app.state.processes[task_id] = p
-    logger.info("Process started with pid: %s",p.pid)
-    app.state.queue.task_done()
+async def start_new_task(app: FastAPI, lane: TaskLane = TaskLane.CPU) -> bool:
+    task_manager = app.state.task_manager
+    specs = app.state.task_specs
+    while True:
+        try:
+            task_id = app.state.queues[lane].get_nowait()
+        except asyncio.QueueEmpty:
+            return False
+        task = task_manager.get_task(task_id)
+        if task is not None and task.status == TaskStatus.QUEUED:
+            break
+        # cancelled (or evicted) while it waited in the queue
+        specs.pop(task_id, None)
+        logger.debug("Skipping task %s, no longer queued", task_id)
+    task_manager.update_task(task_id, TaskStatus.RUNNING)
+    spec = specs.pop(task_id, None) or TaskSpec()
+    started = time.perf_counter()
+    app.state.executors[lane].submit(
+        task_id,
+        timeout=spec.timeout or TASK_TIMEOUT,
+        args=(spec.task_type, spec.payload),
+        memory_limit=spec.memory_limit or TASK_MAX_RSS_BYTES,
+    )
+    ipc_latency.observe(time.perf_counter() - started, "submit")
+    logger.info("Task %s dispatched to the %s lane", task_id, lane)
     return True
  
 
 async def task_scheduler(app: Any) -> None:
-    max_process = app.state.max_process
-    print(f"{max_process = }")
+    """
+    Dispatch queued tasks whenever something changes. ``scheduler_event`` is set on every
+    enqueue and by every lane's executor on every task start, finish or worker exit; the
+    only timer is the retention sweep every ``RETENTION_SWEEP_INTERVAL`` seconds. Each
+    lane is filled from its own queue up to its own concurrency limit.
+    """
+    event = app.state.scheduler_event
+    loop = asyncio.get_running_loop()
+    for executor in app.state.executors.values():
+        executor.attach(loop, event.set)
     
     while True:
+        event.clear()
         await cleanup_processes(app=app)
-        current_processes = len(app.state.processes)
-        
-        if current_processes < max_process:
-            started = await start_new_task(app)
-            if started:
-                continue
-        
-        if current_processes >= max_process:
-            logger.debug("Max processes reached. Waiting for free slot...")
-            await app.state.scheduler_event.wait()
-            app.state.scheduler_event.clear()
-        else:
-            await asyncio.sleep(QUEUE_CHECK)
+        evict_finished_tasks(app)
+
+        for lane, executor in app.state.executors.items():
+            while executor.free_slots > 0:
+                if not await start_new_task(app, lane):
+                    break
+            else:
+                logger.debug("All %s lane slots busy. Waiting for free slot...", lane)
+
+        with contextlib.suppress(TimeoutError):
+            async with asyncio.timeout(RETENTION_SWEEP_INTERVAL):
+                await event.wait()
         
 
 
+async def concurrency_controller(app: Any) -> None:
+    """
+    Resize the cpu lane's pool to ``app.state.concurrency``'s limit every
+    ``CONCURRENCY_INTERVAL`` seconds; tasks waiting while every worker is busy count as backlog.
+    """
+    controller = app.state.concurrency
+    sampler = LoadSampler()
+    while True:
+        await asyncio.sleep(CONCURRENCY_INTERVAL)
+        pool = app.state.pool
+        backlog = app.state.queue.qsize() > 0 and pool.free_slots <= 0
+        previous = controller.limit
+        limit = controller.update(sampler(), backlog)
+        if limit != previous:
+            logger.info("Concurrency limit %s -> %s (%s)", previous, limit, controller.last_sample)
+            pool.resize(limit)
+            app.state.scheduler_event.set()
+
+
+async def flush_timings() -> None:
+    """ log the aggregated @timeit table, worker timings included, every TIMEIT_FLUSH_INTERVAL seconds """
+    while True:
+        await asyncio.sleep(TIMEIT_FLUSH_INTERVAL)
+        timings.log_summary(logger)
+
+
 async def stop_scheduler(app: Any) -> None:
-    if not hasattr(app.state, "scheduler_task"):
-        return
-    app.state.scheduler_task.cancel()
-    try:
-        await app.state.scheduler_task
-    except asyncio.CancelledError:
-        logger.info("Scheduler task cancelled.")
+    for name in ("timings_task", "concurrency_task", "scheduler_task"):
+        task = getattr(app.state, name, None)
+        if task is None:
+            continue
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            logger.info("%s cancelled.", name)
         
         
 def start_task_scheduler(app: Any) -> asyncio.Task:
-    return asyncio.create_task(task_scheduler(app))
\ No newline at end of file
+    return asyncio.create_task(task_scheduler(app))
+
+
+def start_concurrency_controller(app: Any) -> asyncio.Task:
+    return asyncio.create_task(concurrency_controller(app))
+
+
+def start_timings_flush() -> asyncio.Task:
+    return asyncio.create_task(flush_timings())
\ No newline at end of file
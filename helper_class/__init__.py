@@ -1,14 +1,51 @@
 from .task_status import TaskStatus
+from .task_priority import TaskPriority
+from .task_lane import TaskLane
 from .task import Task
 from .task_manager import TaskManager
+from .shared_task_table import SharedTaskTable, TaskTableFullError
+from .status_hub import StatusHub
+from .task_id_allocator import TaskIdAllocator
+from .fair_queue import FairTaskQueue
+from .task_journal import JournalLocked, TaskJournal
+from .task_retention import TaskRetention
+from .admission import AdmissionController, AdmissionRejected
+from .timing_table import LatencySketch, TimingTable
+from .concurrency_controller import ConcurrencyController, LoadSample, LoadSampler
+from .cancellation import CancellationToken, TaskCancelled
+from .task_spec import TaskSpec
+from .result_store import TaskResult, TaskResultStore, remove_spool_file
 from .command import Command
 from .requesttype import RequestType
 
 
 __all__ = [
     "TaskStatus",
+    "TaskPriority",
+    "TaskLane",
     "Task",
     "TaskManager",
+    "SharedTaskTable",
+    "TaskTableFullError",
+    "StatusHub",
+    "TaskIdAllocator",
+    "FairTaskQueue",
+    "TaskJournal",
+    "JournalLocked",
+    "TaskRetention",
+    "AdmissionController",
+    "AdmissionRejected",
+    "LatencySketch",
+    "TimingTable",
+    "ConcurrencyController",
+    "LoadSample",
+    "LoadSampler",
+    "CancellationToken",
+    "TaskCancelled",
+    "TaskSpec",
+    "TaskResult",
+    "TaskResultStore",
+    "remove_spool_file",
     "Command",
     "RequestType",
 ]
\ No newline at end of file
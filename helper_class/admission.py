@@ -0,0 +1,94 @@
+from typing import Callable, Dict, Iterable, Optional
+
+import psutil
+
+from helper_class.task import Task
+from helper_class.task_retention import TERMINAL_STATUSES
+
+
+class AdmissionRejected(Exception):
+    """ a submission turned away; the client should retry after ``retry_after`` seconds """
+
+    def __init__(self, reason: str, retry_after: float) -> None:
+        super().__init__(reason)
+        self.retry_after = retry_after
+
+
+def host_memory_percent() -> float:
+    return psutil.virtual_memory().percent
+
+
+class AdmissionController:
+    """
+    Decides whether new tasks are accepted before they are registered or queued.
+
+    A submission of ``count`` tasks is rejected when it would take the queues past
+    ``max_queued`` tasks, take its client past ``max_per_client`` unfinished tasks, or when
+    host memory plus ``task_bytes`` of bookkeeping per new task would reach ``memory_high``
+    percent. ``None`` disables a check. Batches are admitted all or nothing.
+
+    It is a TaskManager listener: a client's tasks count against it from :meth:`add`
+    until they finish or are removed.
+    """
+
+    def __init__(
+        self,
+        max_queued: Optional[int] = None,
+        max_per_client: Optional[int] = None,
+        memory_high: Optional[float] = None,
+        task_bytes: int = 0,
+        retry_after: float = 1.0,
+        memory_percent: Callable[[], float] = host_memory_percent,
+    ) -> None:
+        self.max_queued = max_queued
+        self.max_per_client = max_per_client
+        self.memory_high = memory_high
+        self.task_bytes = task_bytes
+        self.retry_after = retry_after
+        self.memory_percent = memory_percent
+        self._total_memory = psutil.virtual_memory().total
+        # unfinished task id -> client, and unfinished tasks per client
+        self._clients: Dict[str, str] = {}
+        self._in_flight: Dict[str, int] = {}
+
+    def in_flight(self, client: str) -> int:
+        return self._in_flight.get(client, 0)
+
+    def admit(self, client: str, count: int, queued: int) -> None:
+        """ raise AdmissionRejected unless ``count`` more tasks from ``client`` fit """
+        if self.max_queued is not None and queued + count > self.max_queued:
+            raise AdmissionRejected(f"Task queue is full ({queued} queued)", self.retry_after)
+        if self.max_per_client is not None and self.in_flight(client) + count > self.max_per_client:
+            raise AdmissionRejected(
+                f"At most {self.max_per_client} unfinished tasks per client", self.retry_after
+            )
+        if self.memory_high is not None:
+            projected = self.memory_percent() + 100 * count * self.task_bytes / self._total_memory
+            if projected >= self.memory_high:
+                raise AdmissionRejected(f"Server memory at {projected:.0f}%", self.retry_after)
+
+    def add(self, client: str, task_ids: Iterable[str]) -> None:
+        """ count ``task_ids`` against ``client``; a task is counted once however often it is added """
+        for task_id in task_ids:
+            previous = self._clients.get(task_id)
+            if previous == client:
+                continue
+            if previous is not None:
+                self._release(previous)
+            self._clients[task_id] = client
+            self._in_flight[client] = self._in_flight.get(client, 0) + 1
+
+    def _release(self, client: str) -> None:
+        remaining = self._in_flight[client] - 1
+        if remaining:
+            self._in_flight[client] = remaining
+        else:
+            del self._in_flight[client]
+
+    def track(self, task_id: str, task: Optional[Task]) -> None:
+        """ TaskManager listener """
+        if task is not None and task.status not in TERMINAL_STATUSES:
+            return
+        client = self._clients.pop(task_id, None)
+        if client is not None:
+            self._release(client)
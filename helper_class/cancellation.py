@@ -0,0 +1,25 @@
+from typing import Any
+
+
+class TaskCancelled(Exception):
+    pass
+
+
+class CancellationToken:
+    """
+    Lets a running task notice that it has been asked to stop. The flag lives in the
+    shared task table, so checking it is a memory read, not a message; stores without
+    cancellation flags (plain dicts) never report a cancellation.
+    """
+
+    def __init__(self, task_id: str, shared_tasks: Any) -> None:
+        self.task_id = task_id
+        self._cancel_requested = getattr(shared_tasks, "cancel_requested", None)
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel_requested is not None and self._cancel_requested(self.task_id)
+
+    def raise_if_cancelled(self) -> None:
+        if self.cancelled:
+            raise TaskCancelled(self.task_id)
@@ -8,5 +8,9 @@ class Command(StrEnum):
     LIST = auto()
     STATUS = auto()
     HEALTH = auto()
+    BATCH = auto()
+    RESULT = auto()
+    TIMINGS = auto()
+    BENCH = auto()
 
 
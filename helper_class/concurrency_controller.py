@@ -0,0 +1,132 @@
+import os
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Optional
+
+import psutil
+
+
+@dataclass(frozen=True)
+class LoadSample:
+    cpu_percent: float
+    memory_percent: float
+    # swap-in/out per second since the previous sample, bytes
+    swap_rate: float
+    # threads runnable right now per usable CPU (the run queue, not its 1-minute average)
+    runnable_per_cpu: float
+
+
+def runnable_threads() -> float:
+    """ threads running or waiting for a CPU now, not counting the caller """
+    try:
+        with open("/proc/loadavg") as f:
+            # "0.52 0.58 0.59 3/467 12345": the 4th field is runnable/total
+            return max(int(f.read().split()[3].split("/")[0]) - 1, 0)
+    except (OSError, IndexError, ValueError):
+        # no /proc: the 1-minute load average is the closest there is
+        return os.getloadavg()[0]
+
+
+class LoadSampler:
+    """ host load from psutil; each call covers the time since the previous one """
+
+    def __init__(self) -> None:
+        self.cpus = len(psutil.Process().cpu_affinity()) or 1
+        psutil.cpu_percent(interval=None)
+        self._swap = self._swap_total()
+        self._at = time.monotonic()
+
+    @staticmethod
+    def _swap_total() -> int:
+        swap = psutil.swap_memory()
+        return swap.sin + swap.sout
+
+    def __call__(self) -> LoadSample:
+        swap, now = self._swap_total(), time.monotonic()
+        swap_rate = max(swap - self._swap, 0) / max(now - self._at, 1e-3)
+        self._swap, self._at = swap, now
+        return LoadSample(
+            cpu_percent=psutil.cpu_percent(interval=None),
+            memory_percent=psutil.virtual_memory().percent,
+            swap_rate=swap_rate,
+            runnable_per_cpu=runnable_threads() / self.cpus,
+        )
+
+
+class ConcurrencyController:
+    """
+    AIMD limit on the number of CPU lane workers, kept between ``minimum`` and ``maximum``.
+
+    Every :meth:`update` looks at one :class:`LoadSample`. Memory above ``memory_high``
+    percent, swapping faster than ``swap_high`` bytes/s, or more than ``load_high``
+    runnable threads per CPU cut the limit by ``backoff``; otherwise, while tasks wait for
+    a worker and CPU use is below ``cpu_target`` percent, it grows by one. It holds in
+    every other case, so an idle server keeps its limit.
+
+    After a cut the limit is not cut again for ``cooldown`` seconds, which gives the
+    smaller pool time to show up in the signals; one burst costs one halving, not a
+    slide to ``minimum``.
+    """
+
+    def __init__(
+        self,
+        initial: int,
+        minimum: int = 1,
+        maximum: Optional[int] = None,
+        cpu_target: float = 90.0,
+        memory_high: float = 90.0,
+        load_high: float = 1.5,
+        swap_high: float = 1024 * 1024,
+        backoff: float = 0.5,
+        cooldown: float = 10.0,
+    ) -> None:
+        if minimum < 1 or (maximum is not None and maximum < minimum):
+            raise ValueError("need 1 <= minimum <= maximum")
+        self.minimum = minimum
+        self.maximum = maximum if maximum is not None else max(initial, minimum)
+        self.cpu_target = cpu_target
+        self.memory_high = memory_high
+        self.load_high = load_high
+        self.swap_high = swap_high
+        self.backoff = backoff
+        self.cooldown = cooldown
+        self.limit = min(max(initial, self.minimum), self.maximum)
+        self.last_sample: Optional[LoadSample] = None
+        self.last_change: Optional[float] = None
+        self._last_decrease: Optional[float] = None
+
+    def overloaded(self, sample: LoadSample) -> bool:
+        return (
+            sample.memory_percent >= self.memory_high
+            or sample.swap_rate >= self.swap_high
+            or sample.runnable_per_cpu >= self.load_high
+        )
+
+    def update(self, sample: LoadSample, backlog: bool, now: Optional[float] = None) -> int:
+        """ the new limit given the latest sample and whether tasks are waiting for a worker """
+        now = time.time() if now is None else now
+        self.last_sample = sample
+        if self.overloaded(sample):
+            if self._last_decrease is not None and now - self._last_decrease < self.cooldown:
+                # the last cut has not had time to take effect yet
+                limit = self.limit
+            else:
+                limit = max(self.minimum, int(self.limit * self.backoff))
+                self._last_decrease = now
+        elif backlog and sample.cpu_percent < self.cpu_target:
+            limit = min(self.maximum, self.limit + 1)
+        else:
+            limit = self.limit
+        if limit != self.limit:
+            self.limit = limit
+            self.last_change = now
+        return self.limit
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "min": self.minimum,
+            "max": self.maximum,
+            "last_sample": asdict(self.last_sample) if self.last_sample else None,
+            "last_change": self.last_change,
+        }
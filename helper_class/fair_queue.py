@@ -0,0 +1,115 @@
+import asyncio
+from collections import Counter, deque
+from typing import Deque, Dict, Mapping
+
+from helper_class.task_priority import TaskPriority
+
+
+class PriorityClass:
+    """ one priority level: a FIFO per client, served round robin """
+
+    def __init__(self, weight: int) -> None:
+        self.weight = weight
+        self.deficit = 0
+        self.size = 0
+        self.clients: Dict[str, Deque[str]] = {}
+        self.active: Deque[str] = deque()
+        # entries discarded in place, skipped when they reach the front
+        self.tombstones: Counter = Counter()
+
+    def put(self, client: str, task_id: str) -> None:
+        tasks = self.clients.get(client)
+        if tasks is None:
+            tasks = self.clients[client] = deque()
+            self.active.append(client)
+        tasks.append(task_id)
+        self.size += 1
+
+    def discard(self, task_id: str) -> None:
+        self.tombstones[task_id] += 1
+        self.size -= 1
+
+    def pop(self) -> str:
+        while True:
+            client = self.active.popleft()
+            tasks = self.clients[client]
+            task_id = tasks.popleft()
+            if tasks:
+                self.active.append(client)
+            else:
+                del self.clients[client]
+            dead = self.tombstones.get(task_id, 0)
+            if not dead:
+                self.size -= 1
+                return task_id
+            if dead == 1:
+                del self.tombstones[task_id]
+            else:
+                self.tombstones[task_id] = dead - 1
+
+
+class FairTaskQueue:
+    """
+    Task queue with weighted priority classes and per-client fairness.
+
+    Classes are served by deficit round robin: each turn a class may dispatch as many
+    tasks as its weight before the next class gets a go, so low priority work still moves
+    under load. Inside a class every client has its own FIFO and clients take turns one
+    task at a time, so a client flooding submissions cannot starve the others.
+    ``put_nowait`` and ``discard`` are O(1); discarded tasks are tombstoned in place and
+    skipped by ``get_nowait``, which is amortized O(1).
+    """
+
+    def __init__(self, weights: Mapping[TaskPriority, int]) -> None:
+        self._classes: Dict[TaskPriority, PriorityClass] = {
+            priority: PriorityClass(weights[priority]) for priority in TaskPriority
+        }
+        self._order: Deque[PriorityClass] = deque(self._classes.values())
+        self._size = 0
+        # queued task id -> its priority class
+        self._queued: Dict[str, TaskPriority] = {}
+
+    def put_nowait(self, task_id: str, client: str = "", priority: TaskPriority = TaskPriority.NORMAL) -> None:
+        self._classes[priority].put(client, task_id)
+        self._queued[task_id] = priority
+        self._size += 1
+
+    def discard(self, task_id: str) -> bool:
+        """ drop a queued task; returns whether it was queued """
+        priority = self._queued.pop(task_id, None)
+        if priority is None:
+            return False
+        self._classes[priority].discard(task_id)
+        self._size -= 1
+        return True
+
+    def __contains__(self, task_id: object) -> bool:
+        return task_id in self._queued
+
+    def get_nowait(self) -> str:
+        if not self._size:
+            raise asyncio.QueueEmpty
+        while True:
+            priority_class = self._order[0]
+            if not priority_class.size:
+                priority_class.deficit = 0
+                self._order.rotate(-1)
+                continue
+            if priority_class.deficit <= 0:
+                priority_class.deficit += priority_class.weight
+            priority_class.deficit -= 1
+            if priority_class.deficit <= 0:
+                self._order.rotate(-1)
+            self._size -= 1
+            task_id = priority_class.pop()
+            self._queued.pop(task_id, None)
+            return task_id
+
+    def qsize(self) -> int:
+        return self._size
+
+    def empty(self) -> bool:
+        return not self._size
+
+    def depths(self) -> Dict[str, int]:
+        return {priority: priority_class.size for priority, priority_class in self._classes.items()}
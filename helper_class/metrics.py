@@ -0,0 +1,180 @@
+import time
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from helper_class.task import Task
+from helper_class.task_retention import TERMINAL_STATUSES
+from helper_class.task_status import TaskStatus
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+IPC_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1)
+
+Labels = Tuple[str, ...]
+
+
+def format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def escape_label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(names: Sequence[str], values: Labels, extra: str = "") -> str:
+    pairs = [f'{name}="{escape_label(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Metric:
+    """
+    Base of the metric types. Values live in plain dicts keyed by label values and are
+    only ever updated from the event loop thread (``/metrics`` included, it is an async
+    route), so updates take no lock; label sets known up front are preallocated by
+    passing them as ``series``.
+    """
+
+    kind = "untyped"
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Sequence[str] = (), series: Iterable[Labels] = ()
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Labels, float] = {tuple(labels): 0 for labels in series}
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{format_labels(self.labelnames, labels)} {format_value(value)}"
+            for labels, value in self._values.items()
+        ]
+
+    def render(self) -> str:
+        header = f"# HELP {self.name} {self.documentation}\n# TYPE {self.name} {self.kind}\n"
+        return header + "".join(sample + "\n" for sample in self.samples())
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value: float, *labels: str) -> None:
+        self._values[labels] = value
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) - amount
+
+
+class Histogram(Metric):
+    """ fixed buckets; each series is one preallocated list of bucket counts plus sum and count """
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+        labelnames: Sequence[str] = (),
+        series: Iterable[Labels] = (),
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [count per bucket..., +Inf count, sum]
+        self._series: Dict[Labels, List[float]] = {tuple(labels): self._new_series() for labels in series}
+
+    def _new_series(self) -> List[float]:
+        return [0] * (len(self.buckets) + 2)
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = self._new_series()
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return int(sum(series[:-1])) if series else 0
+
+    def samples(self) -> List[str]:
+        lines: List[str] = []
+        for labels, series in self._series.items():
+            cumulative = 0
+            for bound, hits in zip(self.buckets + (float("inf"),), series):
+                cumulative += hits
+                le = format_labels(self.labelnames, labels, f'le="{format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{le} {format_value(cumulative)}")
+            plain = format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{plain} {format_value(series[-1])}")
+            lines.append(f"{self.name}_count{plain} {format_value(cumulative)}")
+        return lines
+
+
+class MetricsRegistry:
+    """ metrics by name, rendered together in the Prometheus text format """
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, Metric] = {}
+
+    def register[M: Metric](self, metric: M) -> M:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._metrics
+
+    def render(self) -> str:
+        return "".join(metric.render() for metric in self._metrics.values())
+
+
+class TaskLatency:
+    """
+    TaskManager listener timing each task from QUEUED to RUNNING (``queue_wait``) and
+    from RUNNING to a terminal status (``run_time``), counting ``finished`` tasks by status.
+    """
+
+    def __init__(self, queue_wait: Histogram, run_time: Histogram, finished: Counter) -> None:
+        self.queue_wait = queue_wait
+        self.run_time = run_time
+        self.finished = finished
+        self._queued: Dict[str, float] = {}
+        self._started: Dict[str, float] = {}
+
+    def track(self, task_id: str, task: Optional[Task]) -> None:
+        """ TaskManager listener """
+        status = task.status if task is not None else None
+        if status == TaskStatus.QUEUED:
+            self._queued.setdefault(task_id, time.monotonic())
+        elif status == TaskStatus.RUNNING:
+            queued = self._queued.pop(task_id, None)
+            if queued is not None:
+                now = time.monotonic()
+                self.queue_wait.observe(now - queued)
+                self._started[task_id] = now
+        elif status in TERMINAL_STATUSES or status is None:
+            queued = self._queued.pop(task_id, None)
+            started = self._started.pop(task_id, None)
+            if started is not None:
+                self.run_time.observe(time.monotonic() - started)
+            if status is not None and (queued is not None or started is not None):
+                self.finished.inc(status)
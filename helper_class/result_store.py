@@ -0,0 +1,79 @@
+import os
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from helper_class.task import Task
+from helper_class.task_status import TaskStatus
+
+
+@dataclass(frozen=True)
+class TaskResult:
+    """ an encoded task result, either in memory (``body``) or spooled to ``path`` """
+
+    media_type: str
+    body: bytes = b""
+    path: Optional[str] = None
+    size: int = 0
+
+
+class TaskResultStore:
+    """
+    Results of finished tasks, kept as the encoded bytes the worker sent so they are
+    served without another serialization pass. Large results stay in the spool file the
+    worker wrote them to. Failed tasks have the reason they failed instead. It is a
+    TaskManager listener: a result (and its spool file) goes away with its task, so it
+    follows the retention policy, and when the task is queued to run again.
+    """
+
+    def __init__(self) -> None:
+        self._results: Dict[str, TaskResult] = {}
+        self._errors: Dict[str, str] = {}
+        self.nbytes = 0
+        self.spooled_bytes = 0
+
+    def __contains__(self, task_id: object) -> bool:
+        return task_id in self._results
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    def put(self, task_id: str, result: TaskResult) -> None:
+        self._remove(task_id)
+        self._results[task_id] = result
+        self.nbytes += len(result.body)
+        self.spooled_bytes += result.size if result.path else 0
+
+    def get(self, task_id: str) -> Optional[TaskResult]:
+        return self._results.get(task_id)
+
+    def fail(self, task_id: str, reason: str) -> None:
+        self._errors[task_id] = reason
+
+    def error(self, task_id: str) -> Optional[str]:
+        return self._errors.get(task_id)
+
+    def discard(self, task_id: str) -> None:
+        self._errors.pop(task_id, None)
+        self._remove(task_id)
+
+    def _remove(self, task_id: str) -> None:
+        result = self._results.pop(task_id, None)
+        if result is None:
+            return
+        self.nbytes -= len(result.body)
+        if result.path:
+            self.spooled_bytes -= result.size
+            # readers that already opened the file keep it until they are done
+            remove_spool_file(result.path)
+
+    def track(self, task_id: str, task: Optional[Task]) -> None:
+        """ TaskManager listener """
+        if task is None or task.status == TaskStatus.QUEUED:
+            self.discard(task_id)
+
+
+def remove_spool_file(path: str) -> None:
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,234 @@
+import multiprocessing
+import os
+import struct
+import time
+import zlib
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Dict, Iterator, MutableMapping, Optional, Tuple
+
+from helper_class.task import Task
+from helper_class.task_status import TaskStatus
+
+
+EMPTY, USED, TOMBSTONE = 0, 1, 2
+# slot flags
+CANCEL_REQUESTED = 1
+STATUSES = list(TaskStatus)
+STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+
+
+class TaskTableFullError(RuntimeError):
+    pass
+
+
+class SharedTaskTable(MutableMapping[str, Task]):
+    """
+    Task status store living in one ``multiprocessing.shared_memory`` block.
+
+    Every task occupies a fixed-size slot holding its status code, progress and
+    created/updated timestamps. Slots are placed by open addressing on a CRC32 of the task
+    id, so any process sharing the block can find a task without a proxy call; the
+    creating process also keeps a local id -> slot index for O(1) lookups and iteration.
+    Reads are plain memory loads. Writes take a process-shared lock, and only the creating
+    process may add or remove tasks; workers update tasks that already exist.
+
+    A flags byte per slot carries out-of-band signals such as a cancellation request;
+    it survives status updates. It is cleared when a new slot is taken and by
+    :meth:`reset_flags`, which TaskManager calls whenever it (re-)adds a task.
+
+    Removed tasks leave tombstones that are never turned back into empty slots, so a probe
+    cannot rely on reaching an empty slot. Instead the header holds the longest probe
+    distance any task was placed at, and lookups give up after that many slots. Inserts
+    reuse the first free slot on the path, which keeps that distance bounded by the live
+    tasks rather than by how many have come and gone.
+    """
+
+    HEADER = struct.Struct("<I4x")
+    SLOT = struct.Struct("<BBBxfddB47s")
+    FLAGS_OFFSET = 2
+    MAX_ID_BYTES = 47
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self.shm = SharedMemory(create=True, size=self.HEADER.size + capacity * self.SLOT.size)
+        self._lock = multiprocessing.Lock()
+        self._index: Dict[str, int] = {}
+        self._owner_pid = os.getpid()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {
+            "capacity": self.capacity,
+            "name": self.shm.name,
+            "lock": self._lock,
+            "owner_pid": self._owner_pid,
+        }
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.capacity = state["capacity"]
+        self.shm = SharedMemory(name=state["name"])
+        self._lock = state["lock"]
+        self._index = {}
+        self._owner_pid = state["owner_pid"]
+
+    @property
+    def _is_owner(self) -> bool:
+        return os.getpid() == self._owner_pid
+
+    def _encode(self, task_id: str) -> bytes:
+        key = task_id.encode()
+        if len(key) > self.MAX_ID_BYTES:
+            raise ValueError(f"Task id longer than {self.MAX_ID_BYTES} bytes: {task_id}")
+        return key
+
+    def _offset(self, slot: int) -> int:
+        return self.HEADER.size + slot * self.SLOT.size
+
+    def _read(self, slot: int) -> Tuple[int, int, float, float, float, bytes]:
+        state, code, _, progress, created, updated, length, key = self.SLOT.unpack_from(
+            self.shm.buf, self._offset(slot)
+        )
+        return state, code, progress, created, updated, key[:length]
+
+    @property
+    def max_probe(self) -> int:
+        """ the farthest any task was placed from its home slot """
+        return self.HEADER.unpack_from(self.shm.buf, 0)[0]
+
+    def _probe(self, key: bytes) -> Optional[int]:
+        """ the slot holding ``key`` """
+        start = zlib.crc32(key) % self.capacity
+        buf = self.shm.buf
+        for i in range(min(self.max_probe + 1, self.capacity)):
+            slot = (start + i) % self.capacity
+            state = buf[self._offset(slot)]
+            if state == EMPTY:
+                return None
+            if state == USED and self._read(slot)[5] == key:
+                return slot
+        return None
+
+    def _free_slot(self, key: bytes) -> Optional[int]:
+        """ the first empty or tombstoned slot on ``key``'s probe path, for a key not in the table """
+        start = zlib.crc32(key) % self.capacity
+        buf = self.shm.buf
+        for i in range(self.capacity):
+            slot = (start + i) % self.capacity
+            if buf[self._offset(slot)] != USED:
+                if i > self.max_probe:
+                    # published before the slot is, so lookups never stop short of it
+                    self.HEADER.pack_into(buf, 0, i)
+                return slot
+        return None
+
+    def _find(self, task_id: str) -> Optional[int]:
+        if self._is_owner:
+            return self._index.get(task_id)
+        return self._probe(self._encode(task_id))
+
+    def __getitem__(self, task_id: str) -> Task:
+        slot = self._find(task_id)
+        if slot is None:
+            raise KeyError(task_id)
+        state, code, progress, created, updated, key = self._read(slot)
+        if state != USED or key != task_id.encode():
+            raise KeyError(task_id)
+        return Task(
+            status=STATUSES[code],
+            progress=progress,
+            created_at=created,
+            updated_at=updated,
+        )
+
+    def __contains__(self, task_id: object) -> bool:
+        if not isinstance(task_id, str):
+            return False
+        try:
+            self[task_id]
+        except (KeyError, ValueError):
+            return False
+        return True
+
+    def __setitem__(self, task_id: str, task: Task) -> None:
+        key = self._encode(task_id)
+        code = STATUS_CODES[task.status]
+        now = time.time()
+        with self._lock:
+            slot = self._find(task_id)
+            if slot is not None:
+                created = self._read(slot)[3]
+                flags = self.shm.buf[self._offset(slot) + self.FLAGS_OFFSET]
+            else:
+                if not self._is_owner:
+                    # only the creating process adds tasks, so the task has been removed
+                    raise KeyError(task_id)
+                slot = self._free_slot(key)
+                if slot is None:
+                    raise TaskTableFullError(f"Task table is full ({self.capacity} slots)")
+                created = task.created_at or now
+                flags = 0
+                self._index[task_id] = slot
+            self.SLOT.pack_into(
+                self.shm.buf,
+                self._offset(slot),
+                USED,
+                code,
+                flags,
+                task.progress,
+                created,
+                now,
+                len(key),
+                key,
+            )
+
+    def __delitem__(self, task_id: str) -> None:
+        with self._lock:
+            slot = self._find(task_id)
+            if slot is None:
+                raise KeyError(task_id)
+            self.shm.buf[self._offset(slot)] = TOMBSTONE
+            self._index.pop(task_id, None)
+
+    def __iter__(self) -> Iterator[str]:
+        if self._is_owner:
+            return iter(list(self._index))
+        return iter([
+            key[:length].decode()
+            for state, _, _, _, _, _, length, key in self.SLOT.iter_unpack(
+                self.shm.buf[self.HEADER.size : self._offset(self.capacity)]
+            )
+            if state == USED
+        ])
+
+    def __len__(self) -> int:
+        if self._is_owner:
+            return len(self._index)
+        return sum(1 for _ in self)
+
+    def request_cancel(self, task_id: str) -> bool:
+        """ raise the task's cancellation flag; returns False if there is no such task """
+        with self._lock:
+            slot = self._find(task_id)
+            if slot is None:
+                return False
+            offset = self._offset(slot) + self.FLAGS_OFFSET
+            self.shm.buf[offset] |= CANCEL_REQUESTED
+        return True
+
+    def reset_flags(self, task_id: str) -> None:
+        """ clear a task's flags, e.g. a cancellation left over from its previous run """
+        with self._lock:
+            slot = self._find(task_id)
+            if slot is not None:
+                self.shm.buf[self._offset(slot) + self.FLAGS_OFFSET] = 0
+
+    def cancel_requested(self, task_id: str) -> bool:
+        slot = self._find(task_id)
+        if slot is None:
+            return False
+        return bool(self.shm.buf[self._offset(slot) + self.FLAGS_OFFSET] & CANCEL_REQUESTED)
+
+    def close(self) -> None:
+        self.shm.close()
+
+    def unlink(self) -> None:
+        self.shm.unlink()
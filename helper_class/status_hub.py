@@ -0,0 +1,51 @@
+import json
+from collections import defaultdict
+from typing import Callable, DefaultDict, Optional, Set
+
+from helper_class.task import Task
+from helper_class.task_status import TaskStatus
+
+Subscriber = Callable[[str, Optional[TaskStatus], str], None]
+
+
+class StatusHub:
+    """
+    In-process pub/sub for task status changes.
+
+    Each task has its own subscriber set, and wildcard subscribers see every task. A
+    change is serialized once and the same message is handed to every subscriber of that
+    task; ``None`` as the status means the task no longer exists.
+    """
+
+    def __init__(self) -> None:
+        self._subscribers: DefaultDict[str, Set[Subscriber]] = defaultdict(set)
+        self._wildcard: Set[Subscriber] = set()
+
+    def subscribe(self, task_id: str, subscriber: Subscriber) -> None:
+        self._subscribers[task_id].add(subscriber)
+
+    def unsubscribe(self, task_id: str, subscriber: Subscriber) -> None:
+        subscribers = self._subscribers.get(task_id)
+        if subscribers is None:
+            return
+        subscribers.discard(subscriber)
+        if not subscribers:
+            del self._subscribers[task_id]
+
+    def subscribe_all(self, subscriber: Subscriber) -> None:
+        self._wildcard.add(subscriber)
+
+    def unsubscribe_all(self, subscriber: Subscriber) -> None:
+        self._wildcard.discard(subscriber)
+
+    def subscriber_count(self, task_id: str) -> int:
+        return len(self._subscribers.get(task_id, ())) + len(self._wildcard)
+
+    def publish(self, task_id: str, task: Optional[Task]) -> None:
+        subscribers = self._subscribers.get(task_id)
+        if not subscribers and not self._wildcard:
+            return
+        status = task.status if task else None
+        message = json.dumps({"task_id": task_id, "status": status})
+        for subscriber in [*(subscribers or ()), *self._wildcard]:
+            subscriber(task_id, status, message)
@@ -5,6 +5,9 @@ from .task_status import TaskStatus
 @dataclass(frozen=True)
 class Task:
     status: TaskStatus
+    progress: float = 0.0
+    created_at: float = 0.0
+    updated_at: float = 0.0
     
     def __post_init__(self) -> None:
         if isinstance(self.status, TaskStatus):
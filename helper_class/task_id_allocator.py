@@ -0,0 +1,76 @@
+import os
+import random
+import threading
+import time
+import uuid
+import zlib
+from typing import List, Optional
+
+
+CROCKFORD = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+# every 10-bit value as two base32 characters, so an id is 13 table lookups
+PAIRS = [a + b for a in CROCKFORD for b in CROCKFORD]
+
+TIMESTAMP_BITS = 48
+NODE_BITS = 16
+WORKER_BITS = 22
+SEQUENCE_BITS = 42
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+
+
+class TaskIdAllocator:
+    """
+    Snowflake/ULID-style task ids: 48-bit millisecond timestamp, 16-bit node id, 22-bit
+    worker (process) id and a 42-bit sequence, written as 26 Crockford base32 characters.
+
+    Ids sort lexicographically by creation time and are strictly increasing within an
+    allocator, even if the wall clock steps back. Node and worker bits keep processes and
+    hosts apart. :meth:`allocate` hands out a contiguous block of ids under a single lock
+    acquisition, which is what batch submission uses.
+    """
+
+    def __init__(self, node_id: Optional[int] = None, worker_id: Optional[int] = None) -> None:
+        if node_id is None:
+            node_id = zlib.crc32(uuid.getnode().to_bytes(6, "big"))
+        self.node_id = node_id & ((1 << NODE_BITS) - 1)
+        self._worker_id = worker_id
+        self._pid = -1
+        self._prefix = 0
+        self._lock = threading.Lock()
+        self._last_ms = 0
+        self._sequence = 0
+
+    def _refresh_prefix(self) -> None:
+        # after a fork the child gets its own worker bits
+        pid = os.getpid()
+        if pid == self._pid:
+            return
+        self._pid = pid
+        worker_id = self._worker_id if self._worker_id is not None else pid
+        worker_id &= (1 << WORKER_BITS) - 1
+        self._prefix = (self.node_id << WORKER_BITS | worker_id) << SEQUENCE_BITS
+
+    def allocate(self, count: int = 1) -> List[str]:
+        with self._lock:
+            self._refresh_prefix()
+            now_ms = time.time_ns() // 1_000_000
+            if now_ms > self._last_ms:
+                self._last_ms = now_ms
+                # random start keeps ids unpredictable and leaves room for big blocks
+                self._sequence = random.getrandbits(SEQUENCE_BITS - 2)
+            if self._sequence + count > MAX_SEQUENCE:
+                # sequence exhausted for this millisecond: borrow the next one
+                self._last_ms += 1
+                self._sequence = 0
+            first = self._sequence
+            self._sequence += count
+            base = (self._last_ms << (NODE_BITS + WORKER_BITS + SEQUENCE_BITS)) | self._prefix
+
+        return [encode(base | sequence) for sequence in range(first, first + count)]
+
+    def new_id(self) -> str:
+        return self.allocate(1)[0]
+
+
+def encode(value: int) -> str:
+    return "".join([PAIRS[(value >> shift) & 0x3FF] for shift in range(120, -1, -10)])
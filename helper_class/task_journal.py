@@ -0,0 +1,277 @@
+import fcntl
+import glob
+import logging
+import os
+import re
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from helper_class.task import Task
+from helper_class.task_status import TaskStatus
+
+
+logger = logging.getLogger("server")
+
+REMOVED = "-"
+STATUSES = frozenset(TaskStatus)
+# (timestamp, task id, status or REMOVED, extra)
+Record = Tuple[float, str, str, str]
+# task id -> (timestamp, status, extra) of its last record
+JournalState = Dict[str, Tuple[float, str, str]]
+
+ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+UNESCAPES = {"\\": "\\", "t": "\t", "n": "\n", "r": "\r"}
+ESCAPED = re.compile(r"\\(.)", re.DOTALL)
+
+
+def escape(field: str) -> str:
+    """ a field that cannot break the tab/newline framing of a record """
+    return field.translate(ESCAPES) if "\\" in field or not field.isprintable() else field
+
+
+def unescape(field: str) -> str:
+    if "\\" not in field:
+        return field
+    return ESCAPED.sub(lambda match: UNESCAPES.get(match.group(1), match.group(1)), field)
+
+
+class JournalLocked(RuntimeError):
+    """ another process already owns the journal directory """
+
+
+def apply_record(state: JournalState, timestamp: float, task_id: str, status: str, extra: str) -> None:
+    if status == REMOVED:
+        state.pop(task_id, None)
+        return
+    if not extra:
+        # a task's extra (e.g. its spec) is written once and carried by later records
+        previous = state.get(task_id)
+        if previous is not None:
+            extra = previous[2]
+    state[task_id] = (timestamp, status, extra)
+
+
+class TaskJournal:
+    """
+    Append-only write-ahead log of task state transitions.
+
+    ``append`` only buffers the record; a background thread writes everything buffered
+    every ``flush_interval`` seconds with one write and one fsync (group commit), so
+    requests never wait on the disk. Records are tab separated lines in numbered segment
+    files. After ``snapshot_every`` records the flusher starts a new segment, writes the
+    latest state of every live task to a snapshot and deletes the segments it covers, so
+    replay reads one snapshot plus a short tail.
+
+    Tasks evicted from memory can be spilled to a separate, never replayed archive with
+    :meth:`archive`; it is written by the same group commit.
+
+    A directory belongs to one process at a time: :meth:`open` takes an exclusive
+    ``flock`` on it and raises :class:`JournalLocked` if another process holds it.
+    """
+
+    def __init__(self, directory: str, flush_interval: float = 0.05, snapshot_every: int = 100_000) -> None:
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.snapshot_every = snapshot_every
+        self.snapshot_path = os.path.join(directory, "snapshot.log")
+        self.archive_path = os.path.join(directory, "archive.log")
+        self._buffer: List[Record] = []
+        self._archived: List[str] = []
+        self._cond = threading.Condition()
+        self._closed = False
+        self._state: JournalState = {}
+        self._segment = 0
+        self._file = None
+        self._archive_file = None
+        self._since_snapshot = 0
+        self._thread: Optional[threading.Thread] = None
+        self._lock_fd: Optional[int] = None
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.directory, f"journal-{segment:08d}.log")
+
+    def _segments(self) -> List[Tuple[int, str]]:
+        paths = glob.glob(os.path.join(self.directory, "journal-*.log"))
+        return sorted((int(os.path.basename(path)[8:16]), path) for path in paths)
+
+    def open(self) -> JournalState:
+        """ replay the snapshot and journal, start a new segment and return the recovered state """
+        os.makedirs(self.directory, exist_ok=True)
+        self._lock_directory()
+        start = time.perf_counter()
+        covered = self._load(self.snapshot_path, header=True)
+        records = 0
+        for segment, path in self._segments():
+            self._segment = max(self._segment, segment)
+            if segment > covered:
+                records += self._load(path)
+        logger.info(
+            "Replayed %s journal records for %s tasks in %.2fs",
+            records, len(self._state), time.perf_counter() - start,
+        )
+
+        self._segment += 1
+        self._open_segment()
+        self._archive_file = open(self.archive_path, "a", encoding="utf-8")
+        self._thread = threading.Thread(target=self._flush_loop, name="task-journal", daemon=True)
+        self._thread.start()
+        return dict(self._state)
+
+    def _lock_directory(self) -> None:
+        fd = os.open(self.directory, os.O_RDONLY)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            raise JournalLocked(f"Journal {self.directory} is in use by another process") from None
+        self._lock_fd = fd
+
+    def _load(self, path: str, header: bool = False) -> int:
+        """ apply the records in ``path``; returns the segment a snapshot covers, else the record count """
+        if not os.path.exists(path):
+            return 0
+        state = self._state
+        count = 0
+        covered = 0
+        with open(path, encoding="utf-8") as f:
+            if header:
+                try:
+                    covered = int(f.readline()[2:] or 0)
+                except ValueError:
+                    logger.warning("Malformed journal snapshot header in %s, replaying every segment", path)
+            for line in f:
+                parts = line.rstrip("\n").split("\t", 3)
+                if len(parts) != 4:
+                    # torn write at the tail of a crashed segment
+                    continue
+                timestamp, task_id, status, extra = parts
+                if status != REMOVED and status not in STATUSES:
+                    logger.warning("Skipping malformed journal record in %s: %r", path, line)
+                    continue
+                try:
+                    apply_record(state, float(timestamp), unescape(task_id), status, extra)
+                except ValueError:
+                    logger.warning("Skipping malformed journal record in %s: %r", path, line)
+                    continue
+                count += 1
+        return covered if header else count
+
+    def _open_segment(self) -> None:
+        self._file = open(self._segment_path(self._segment), "a", encoding="utf-8")
+        self._fsync_directory()
+
+    def _fsync_directory(self) -> None:
+        fd = os.open(self.directory, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def append(self, task_id: str, status: str, extra: str = "") -> None:
+        with self._cond:
+            self._buffer.append((time.time(), task_id, status, extra))
+
+    def record(self, task_id: str, task: Optional[Task]) -> None:
+        """ TaskManager listener """
+        self.append(task_id, task.status if task else REMOVED)
+
+    def archive(self, task_id: str, task: Task) -> None:
+        """ spill a finished task to the archive before it is removed """
+        line = f"{task.updated_at:.6f}\t{escape(task_id)}\t{task.status}\t{task.progress}\t{task.created_at:.6f}\n"
+        with self._cond:
+            self._archived.append(line)
+
+    def read_archive(self) -> Iterator[Tuple[str, Task]]:
+        if not os.path.exists(self.archive_path):
+            return
+        with open(self.archive_path, encoding="utf-8") as f:
+            for line in f:
+                parts = line.rstrip("\n").split("\t")
+                if len(parts) != 5:
+                    continue
+                updated, task_id, status, progress, created = parts
+                try:
+                    task = Task(
+                        status=TaskStatus(status),
+                        progress=float(progress),
+                        created_at=float(created),
+                        updated_at=float(updated),
+                    )
+                except ValueError:
+                    logger.warning("Skipping malformed archive record: %r", line)
+                    continue
+                yield unescape(task_id), task
+
+    def _flush_loop(self) -> None:
+        while True:
+            with self._cond:
+                if not self._closed:
+                    self._cond.wait(self.flush_interval)
+                records, self._buffer = self._buffer, []
+                archived, self._archived = self._archived, []
+                closing = self._closed
+            if archived:
+                # archived before the removal records that follow them reach the journal
+                self._archive_file.write("".join(archived))
+                self._archive_file.flush()
+                os.fsync(self._archive_file.fileno())
+            if records:
+                self._write(records)
+            if closing:
+                return
+
+    def _write(self, records: List[Record]) -> None:
+        self._file.write("".join(
+            f"{timestamp:.6f}\t{escape(task_id)}\t{status}\t{extra}\n"
+            for timestamp, task_id, status, extra in records
+        ))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+        state = self._state
+        for record in records:
+            apply_record(state, *record)
+
+        self._since_snapshot += len(records)
+        if self._since_snapshot >= self.snapshot_every:
+            self._snapshot()
+
+    def _snapshot(self) -> None:
+        covered = self._segment
+        self._file.close()
+        self._segment += 1
+        self._open_segment()
+
+        tmp_path = self.snapshot_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(f"# {covered}\n")
+            f.write("".join(
+                f"{timestamp:.6f}\t{escape(task_id)}\t{status}\t{extra}\n"
+                for task_id, (timestamp, status, extra) in self._state.items()
+            ))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+        self._fsync_directory()
+
+        for segment, path in self._segments():
+            if segment <= covered:
+                os.remove(path)
+        self._since_snapshot = 0
+        logger.info("Journal compacted to %s tasks", len(self._state))
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join()
+        if self._file is not None:
+            self._file.close()
+        if self._archive_file is not None:
+            self._archive_file.close()
+        if self._lock_fd is not None:
+            # closing the descriptor releases the lock
+            os.close(self._lock_fd)
+            self._lock_fd = None
@@ -0,0 +1,6 @@
+from enum import StrEnum, auto
+
+class TaskLane(StrEnum):
+    CPU = auto()
+    THREAD = auto()
+    ASYNC = auto()
@@ -1,25 +1,119 @@
-from typing import Dict, Optional
+from bisect import bisect_left, bisect_right, insort
+from typing import Callable, Dict, List, Optional, Tuple
 from helper_class.task import Task
 from helper_class.task_status import TaskStatus
 import dataclasses
 
 
+Listener = Callable[[str, Optional[Task]], None]
+
 
 class TaskManager:
     def __init__(self, shared_tasks: Dict[str, Task]) -> None:
         self.tasks: Dict[str, Task] = shared_tasks
+        self._listeners: List[Listener] = []
+        # sorted task ids, overall and per status, for O(page) listing
+        self._ids: List[str] = []
+        self._by_status: Dict[str, List[str]] = {status: [] for status in TaskStatus}
+        self._statuses: Dict[str, str] = {}
+        for task_id, task in shared_tasks.items():
+            self._index(task_id, task)
+
+    def add_listener(self, listener: Listener) -> None:
+        """ ``listener(task_id, task)`` runs after every change; ``task`` is None on removal """
+        self._listeners.append(listener)
+
+    def _index(self, task_id: str, task: Optional[Task]) -> None:
+        old = self._statuses.get(task_id)
+        new = task.status if task is not None else None
+        if old == new:
+            return
+        if old is None:
+            insort(self._ids, task_id)
+        else:
+            _discard(self._by_status[old], task_id)
+        if new is None:
+            _discard(self._ids, task_id)
+            del self._statuses[task_id]
+        else:
+            insort(self._by_status[new], task_id)
+            self._statuses[task_id] = new
+
+    def _notify(self, task_id: str, task: Optional[Task]) -> None:
+        self._index(task_id, task)
+        for listener in self._listeners:
+            listener(task_id, task)
 
     def remove_task(self, task_id: str) -> bool:
-        return self.tasks.pop(task_id, None)
+        task = self.tasks.pop(task_id, None)
+        if task is not None:
+            self._notify(task_id, None)
+        return task
 
     def add_task(self, task_id: str, status: str = TaskStatus.QUEUED) -> None:
-        self.tasks[task_id] = Task(status=status)
+        """ register a task, or start a finished one over; flags of an earlier run are cleared """
+        task = Task(status=status)
+        self.tasks[task_id] = task
+        reset_flags = getattr(self.tasks, "reset_flags", None)
+        if reset_flags is not None:
+            reset_flags(task_id)
+        self._notify(task_id, task)
+
+    def add_tasks(self, task_ids: List[str], status: str = TaskStatus.QUEUED) -> None:
+        """ add every task or, if one of them fails, none of them """
+        added: List[str] = []
+        try:
+            for task_id in task_ids:
+                self.add_task(task_id, status)
+                added.append(task_id)
+        except Exception:
+            for task_id in added:
+                self.remove_task(task_id)
+            raise
 
     def get_task(self, task_id: str) -> Optional[Task]:
         return self.tasks.get(task_id)
 
-    def update_task(self, task_id: str, status: str) -> bool:
+    def update_task(self, task_id: str, status: str, progress: Optional[float] = None) -> bool:
         if task_id not in self.tasks:
             return False
-        self.tasks[task_id] = dataclasses.replace(self.tasks[task_id],status=status)
-        return True
\ No newline at end of file
+        changes = {"status": status} if progress is None else {"status": status, "progress": progress}
+        task = dataclasses.replace(self.tasks[task_id], **changes)
+        self.tasks[task_id] = task
+        self._notify(task_id, task)
+        return True
+
+    def refresh(self, task_id: str) -> Optional[Task]:
+        """ re-read a task written by another process (e.g. a worker) and notify listeners """
+        task = self.tasks.get(task_id)
+        if task is not None:
+            self._notify(task_id, task)
+        return task
+
+    def count(self, status: Optional[str] = None) -> int:
+        return len(self._ids if status is None else self._by_status[status])
+
+    def page(
+        self, status: Optional[str] = None, cursor: Optional[str] = None, limit: int = 100
+    ) -> Tuple[List[Tuple[str, Task]], Optional[str]]:
+        """
+        Up to ``limit`` tasks in id order after ``cursor`` (a task id from the previous
+        page), optionally only those with ``status``. Returns the tasks and the cursor for
+        the next page, None on the last one.
+        """
+        ids = self._ids if status is None else self._by_status[status]
+        start = bisect_right(ids, cursor) if cursor else 0
+        page_ids = ids[start:start + limit]
+        tasks = []
+        for task_id in page_ids:
+            task = self.tasks.get(task_id)
+            if task is not None:
+                tasks.append((task_id, task))
+        next_cursor = page_ids[-1] if page_ids and start + limit < len(ids) else None
+        return tasks, next_cursor
+
+
+def _discard(ids: List[str], task_id: str) -> None:
+    i = bisect_left(ids, task_id)
+    if i < len(ids) and ids[i] == task_id:
+        del ids[i]
@@ -0,0 +1,6 @@
+from enum import StrEnum, auto
+
+class TaskPriority(StrEnum):
+    HIGH = auto()
+    NORMAL = auto()
+    LOW = auto()
@@ -0,0 +1,67 @@
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from helper_class.task import Task
+from helper_class.task_status import TaskStatus
+
+
+TERMINAL_STATUSES = (TaskStatus.COMPLETED, TaskStatus.CANCELLED, TaskStatus.FAILED)
+
+
+class TaskRetention:
+    """
+    Decides when finished tasks are evicted: ``ttl`` seconds after they finish, per
+    terminal status (missing = kept until pushed out), and oldest first once more than
+    ``max_finished`` are kept.
+
+    It is a TaskManager listener. Each terminal status has its own insertion-ordered dict
+    of task id -> deadline; with one TTL per status, insertion order is deadline order, so
+    :meth:`expired` only ever looks at the heads and eviction is amortized O(1).
+    """
+
+    def __init__(self, max_finished: Optional[int] = None, ttl: Optional[Dict[str, float]] = None) -> None:
+        self.max_finished = max_finished
+        self.ttl = {TaskStatus(status): seconds for status, seconds in (ttl or {}).items()}
+        self._deadlines: Dict[str, "OrderedDict[str, float]"] = {
+            status: OrderedDict() for status in TERMINAL_STATUSES
+        }
+        # every finished task, oldest first
+        self._finished: "OrderedDict[str, str]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._finished)
+
+    def track(self, task_id: str, task: Optional[Task]) -> None:
+        """ TaskManager listener """
+        status = task.status if task is not None else None
+        current = self._finished.get(task_id)
+        if status == current:
+            # repeated notification for the same state keeps the original deadline
+            return
+        if current is not None:
+            del self._finished[task_id]
+            del self._deadlines[current][task_id]
+        if status in TERMINAL_STATUSES:
+            self._finished[task_id] = status
+            self._deadlines[status][task_id] = time.monotonic() + self.ttl.get(status, float("inf"))
+
+    def expired(self, now: Optional[float] = None) -> List[str]:
+        """ ids of the tasks due for eviction, which stop being tracked """
+        now = time.monotonic() if now is None else now
+        expired: List[str] = []
+        for deadlines in self._deadlines.values():
+            while deadlines:
+                task_id, deadline = next(iter(deadlines.items()))
+                if deadline > now:
+                    break
+                deadlines.popitem(last=False)
+                del self._finished[task_id]
+                expired.append(task_id)
+
+        if self.max_finished is not None:
+            while len(self._finished) > self.max_finished:
+                task_id, status = self._finished.popitem(last=False)
+                del self._deadlines[status][task_id]
+                expired.append(task_id)
+        return expired
@@ -0,0 +1,53 @@
+import json
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+
+DEFAULT_TASK_TYPE = "complicated"
+
+
+@dataclass(frozen=True)
+class TaskSpec:
+    """
+    what to run for a task: a registered task type, its JSON payload, a timeout and a
+    memory limit in bytes (cpu lane only)
+    """
+
+    task_type: str = DEFAULT_TASK_TYPE
+    payload: Dict[str, Any] = field(default_factory=dict)
+    timeout: Optional[float] = None
+    memory_limit: Optional[int] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TaskSpec":
+        payload = data.get("payload") or {}
+        if not isinstance(payload, dict):
+            raise ValueError("payload must be a JSON object")
+        timeout = data.get("timeout")
+        if timeout is not None:
+            timeout = float(timeout)
+            if timeout <= 0:
+                raise ValueError("timeout must be a positive number of seconds")
+        memory_limit = data.get("memory_limit")
+        if memory_limit is not None:
+            memory_limit = int(memory_limit)
+            if memory_limit <= 0:
+                raise ValueError("memory_limit must be a positive number of bytes")
+        return cls(
+            task_type=data.get("type") or DEFAULT_TASK_TYPE,
+            payload=payload,
+            timeout=timeout,
+            memory_limit=memory_limit,
+        )
+
+    def to_json(self) -> str:
+        return json.dumps({
+            "type": self.task_type,
+            "payload": self.payload,
+            "timeout": self.timeout,
+            "memory_limit": self.memory_limit,
+        })
+
+    @classmethod
+    def from_json(cls, data: str) -> "TaskSpec":
+        return cls.from_dict(json.loads(data))
@@ -0,0 +1,142 @@
+import logging
+import math
+import threading
+from typing import Dict, Optional
+
+
+class LatencySketch:
+    """
+    Streaming quantile sketch over log-spaced buckets (as in DDSketch): any quantile is
+    within ``relative_accuracy`` of the true value, memory grows with the log of the value
+    range rather than the number of samples, and two sketches merge by adding counts.
+    """
+
+    # values at or below this (seconds) all land in one zero bucket
+    MIN_VALUE = 1e-9
+
+    def __init__(self, relative_accuracy: float = 0.01) -> None:
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets: Dict[int, int] = {}
+        self.zero = 0
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+        if value <= self.MIN_VALUE:
+            self.zero += 1
+            return
+        key = math.ceil(math.log(value) / self._log_gamma)
+        self.buckets[key] = self.buckets.get(key, 0) + 1
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = q * (self.count - 1)
+        seen = self.zero
+        if rank < seen:
+            return 0.0
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if seen > rank:
+                # midpoint of the bucket (gamma^(key-1), gamma^key], relative to its bounds
+                return min(2 * self.gamma ** key / (self.gamma + 1), self.max)
+        return self.max
+
+    def merge(self, other: "LatencySketch") -> None:
+        if other.gamma != self.gamma:
+            raise ValueError("cannot merge sketches of different accuracy")
+        for key, count in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + count
+        self.zero += other.zero
+        self.count += other.count
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+
+
+class FunctionTiming:
+    """ every call of one function, and a sketch of the sampled durations """
+
+    def __init__(self, relative_accuracy: float) -> None:
+        self.calls = 0
+        self.sketch = LatencySketch(relative_accuracy)
+
+    def summary(self) -> Dict[str, float]:
+        sketch = self.sketch
+        return {
+            "calls": self.calls,
+            "sampled": sketch.count,
+            "mean": sketch.sum / sketch.count if sketch.count else 0.0,
+            "p50": sketch.quantile(0.5),
+            "p95": sketch.quantile(0.95),
+            "p99": sketch.quantile(0.99),
+            "max": sketch.max,
+        }
+
+
+class TimingTable:
+    """
+    In-memory timings per function name. Recording takes one uncontended lock, so
+    thread lane tasks may record too. What :meth:`drain` returns pickles cheaply, which
+    is how worker processes ship their timings to the server to be folded in with
+    :meth:`merge`.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01) -> None:
+        self.relative_accuracy = relative_accuracy
+        self._timings: Dict[str, FunctionTiming] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._timings)
+
+    def _timing(self, name: str) -> FunctionTiming:
+        timing = self._timings.get(name)
+        if timing is None:
+            timing = self._timings[name] = FunctionTiming(self.relative_accuracy)
+        return timing
+
+    def record(self, name: str, seconds: Optional[float]) -> None:
+        """ count a call of ``name``; ``seconds`` is None for calls that were not sampled """
+        with self._lock:
+            timing = self._timing(name)
+            timing.calls += 1
+            if seconds is not None:
+                timing.sketch.add(seconds)
+
+    def drain(self) -> Dict[str, FunctionTiming]:
+        """ everything recorded so far, leaving the table empty """
+        with self._lock:
+            timings, self._timings = self._timings, {}
+        return timings
+
+    def merge(self, timings: Dict[str, FunctionTiming]) -> None:
+        with self._lock:
+            for name, other in timings.items():
+                timing = self._timing(name)
+                timing.calls += other.calls
+                timing.sketch.merge(other.sketch)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {name: timing.summary() for name, timing in sorted(self._timings.items())}
+
+    def reset_after_fork(self) -> None:
+        """ a forked child starts empty, with a fresh lock, instead of re-reporting its parent's timings """
+        self._timings = {}
+        self._lock = threading.Lock()
+
+    def log_summary(self, logger: logging.Logger, level: int = logging.INFO) -> None:
+        for name, stats in self.summary().items():
+            logger.log(
+                level,
+                "%s: %s calls, %s sampled, mean %.6fs, p50 %.6fs, p95 %.6fs, p99 %.6fs, max %.6fs",
+                name, stats["calls"], stats["sampled"], stats["mean"],
+                stats["p50"], stats["p95"], stats["p99"], stats["max"],
+            )
@@ -1,7 +1,9 @@
 from .tasks_router import tasks_router
+from .metrics_router import metrics_router
 
 
 
 __all__ = [
     "tasks_router",
+    "metrics_router",
 ]
\ No newline at end of file
@@ -0,0 +1,21 @@
+from typing import Any, Dict
+
+from fastapi import APIRouter, Request
+from fastapi.responses import PlainTextResponse
+
+from utils import render_metrics, timings
+
+
+metrics_router = APIRouter(tags=["Metrics"])
+
+
+@metrics_router.get("/metrics", response_class=PlainTextResponse)
+async def metrics(request: Request) -> PlainTextResponse:
+    """ Prometheus text exposition of this server process's metrics, rendered on the event loop """
+    return PlainTextResponse(render_metrics(request.app), media_type="text/plain; version=0.0.4")
+
+
+@metrics_router.get("/timings")
+def timing_table() -> Dict[str, Dict[str, Any]]:
+    """ aggregated @timeit timings per function, worker processes included """
+    return timings.summary()
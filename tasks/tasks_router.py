@@ -1,11 +1,30 @@
+import asyncio
+import json
 import logging
-from typing import Any, Dict
+import math
+import mmap
+import re
+from typing import Any, AsyncIterator, BinaryIO, Dict, Iterator, List, Literal, Optional
 import datetime
 
 
-from fastapi import APIRouter, HTTPException, Request
+from fastapi import APIRouter, Body, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
 
-from helper_class import TaskStatus
+from configs import CONCURRENCY_ADAPTIVE, MAX_BATCH_SIZE, NODE_ID, LIST_PAGE_SIZE, LIST_MAX_PAGE_SIZE, RESULT_CHUNK_SIZE
+from helper_class import (
+    AdmissionRejected,
+    SharedTaskTable,
+    TaskIdAllocator,
+    TaskPriority,
+    TaskSpec,
+    TaskStatus,
+    TaskTableFullError,
+)
+from helper_class.task_retention import TERMINAL_STATUSES
+from utils import cancel_task
+from utils.metrics import admission_rejected
+from worker import registry
 
 
 logger = logging.getLogger("server")
@@ -15,37 +34,263 @@ tasks_router = APIRouter(
     tags=["Task utility"]
 )
 
+task_ids = TaskIdAllocator(node_id=NODE_ID)
+# client-chosen ids: printable, no separators, and short enough for a task table slot
+TASK_ID_PATTERN = re.compile(rf"[A-Za-z0-9._:-]{{1,{SharedTaskTable.MAX_ID_BYTES}}}")
+
+
+def client_key(request: Request) -> str:
+    """ the tenant a task is queued for fairness under """
+    return request.headers.get("X-Client-Id") or request.client.host
+
+
+def parse_spec(data: Dict[str, Any]) -> TaskSpec:
+    spec = TaskSpec.from_dict(data)
+    if spec.task_type not in registry:
+        raise ValueError(f"Unknown task type: {spec.task_type}")
+    return spec
+
+
+def admit(request: Request, client: str, count: int) -> None:
+    """ 503 with Retry-After unless the admission controller accepts ``count`` more tasks """
+    queued = sum(queue.qsize() for queue in request.app.state.queues.values())
+    try:
+        request.app.state.admission.admit(client, count, queued)
+    except AdmissionRejected as e:
+        admission_rejected.inc()
+        raise HTTPException(
+            status_code=503, detail=str(e), headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))}
+        )
+
+
+def reject_active(request: Request, task_ids: List[str]) -> None:
+    """
+    409 if one of ``task_ids`` is already queued or running, or a stopped run of it is
+    still winding down in its executor; finished tasks may be started again
+    """
+    task_manager = request.app.state.task_manager
+    executors = request.app.state.executors.values()
+    for task_id in task_ids:
+        task = task_manager.get_task(task_id)
+        if task is not None and task.status not in TERMINAL_STATUSES:
+            raise HTTPException(status_code=409, detail=f"Task {task_id} is already {task.status}")
+        if any(task_id in executor.in_flight for executor in executors):
+            raise HTTPException(status_code=409, detail=f"Task {task_id} is still stopping, retry shortly")
+
+
+def enqueue_task(request: Request, task_id: str, spec: TaskSpec, client: str, priority: TaskPriority) -> None:
+    """ queue an already registered task; a non-default spec is kept (and journaled) until dispatch """
+    if spec != TaskSpec():
+        request.app.state.task_specs[task_id] = spec
+        journal = request.app.state.journal
+        if journal is not None:
+            journal.append(task_id, TaskStatus.QUEUED, spec.to_json())
+    lane = registry.get(spec.task_type).lane
+    request.app.state.queues[lane].put_nowait(task_id, client=client, priority=priority)
+
+
 @tasks_router.get("/getid",tags=["get the task id from the server"])
 def get_task_id[T]() -> Dict[str, T]:
-    task_id: str = datetime.datetime.now().strftime("%Y%m%d%H%M%S%f")
+    task_id: str = task_ids.new_id()
     return {"task_id": task_id}
 
 
 @tasks_router.post("/start/{task_id}",tags=["start a task"])
-async def start_task(request: Request,task_id: str) -> Dict[str,str]:
-    request.app.state.task_manager.add_task(task_id, TaskStatus.QUEUED)
-    await request.app.state.queue.put(task_id)
+async def start_task(
+    request: Request,
+    task_id: str,
+    priority: TaskPriority = TaskPriority.NORMAL,
+    timeout: Optional[float] = Query(None, gt=0),
+    body: Optional[Dict[str, Any]] = Body(None),
+) -> Dict[str,str]:
+    """
+    ``body`` is an optional spec:
+    {"type": ..., "payload": {...}, "timeout": seconds, "memory_limit": bytes}
+    """
+    if not TASK_ID_PATTERN.fullmatch(task_id):
+        raise HTTPException(
+            status_code=422,
+            detail=f"Task ids are 1-{SharedTaskTable.MAX_ID_BYTES} letters, digits or . _ : -",
+        )
+    try:
+        spec = parse_spec({**(body or {}), **({"timeout": timeout} if timeout else {})})
+    except (TypeError, ValueError) as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    reject_active(request, [task_id])
+    client = client_key(request)
+    admit(request, client, 1)
+    try:
+        request.app.state.task_manager.add_task(task_id, TaskStatus.QUEUED)
+    except TaskTableFullError:
+        raise HTTPException(status_code=503, detail="Task table is full")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    request.app.state.admission.add(client, [task_id])
+    enqueue_task(request, task_id, spec, client, priority)
+    request.app.state.scheduler_event.set()
     return {"task_id": task_id, "status": TaskStatus.QUEUED}
 
 
+@tasks_router.post("/batch", tags=["start a task"])
+async def start_batch(request: Request, specs: List[Dict[str, Any]] = Body(...)) -> Dict[str, Any]:
+    """ allocate ids for, register and enqueue a list of task specs in one request """
+    if len(specs) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BATCH_SIZE} tasks per batch")
+    try:
+        priorities = [TaskPriority(spec.get("priority", TaskPriority.NORMAL)) for spec in specs]
+        task_specs = [parse_spec(spec) for spec in specs]
+    except (TypeError, ValueError) as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    client = client_key(request)
+    admit(request, client, len(specs))
+    task_manager = request.app.state.task_manager
+    batch_ids = task_ids.allocate(len(specs))
+    # allocated ids are fresh unless a client picked one for /start itself
+    reject_active(request, batch_ids)
+    try:
+        task_manager.add_tasks(batch_ids, TaskStatus.QUEUED)
+    except TaskTableFullError:
+        raise HTTPException(status_code=503, detail="Task table is full")
+
+    request.app.state.admission.add(client, batch_ids)
+    for task_id, priority, spec in zip(batch_ids, priorities, task_specs):
+        enqueue_task(request, task_id, spec, client, priority)
+    request.app.state.scheduler_event.set()
+    return {"task_ids": batch_ids, "status": TaskStatus.QUEUED}
+
+
 @tasks_router.post("/stop/{task_id}", tags=["Stop tasks"])
-def stop_task(request: Request,task_id: str ) -> Dict[str, str]:
-    success = request.app.state.task_manager.update_task(task_id, TaskStatus.CANCELLED)
+async def stop_task(request: Request,task_id: str ) -> Dict[str, str]:
+    status = cancel_task(request.app, task_id)
     
-    if not success:
+    if status is None:
         raise HTTPException(status_code=404, detail="Task not found")
     
     logger.info("Task %s stopped.",task_id)
     
-    return {"task_id": task_id, "status": TaskStatus.CANCELLED}
+    return {"task_id": task_id, "status": status}
+
+
+def stream_spool_file(f: BinaryIO, size: int) -> Iterator[bytes]:
+    """ chunks straight out of a mapping of the worker's spool file """
+    try:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            for offset in range(0, size, RESULT_CHUNK_SIZE):
+                yield mapped[offset:offset + RESULT_CHUNK_SIZE]
+    finally:
+        f.close()
+
+
+@tasks_router.get("/result/{task_id}", tags=["Task results"])
+def get_result(request: Request, task_id: str) -> Response:
+    task = request.app.state.task_manager.get_task(task_id)
+    if task is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    if task.status in (TaskStatus.QUEUED, TaskStatus.RUNNING):
+        # a result stored for this id belongs to a finished run, not this one
+        raise HTTPException(status_code=409, detail=f"Task is {task.status}")
+    result = request.app.state.results.get(task_id)
+    if result is None:
+        error = request.app.state.results.error(task_id)
+        if error is not None:
+            raise HTTPException(status_code=404, detail=f"Task failed: {error}")
+        raise HTTPException(status_code=404, detail=f"Task {task.status} without a result")
+    if result.path is None:
+        return Response(content=result.body, media_type=result.media_type)
+    try:
+        # opened now so eviction during the download cannot pull the file away
+        f = open(result.path, "rb")
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Result was evicted")
+    if result.size == 0:
+        f.close()
+        return Response(content=b"", media_type=result.media_type)
+    return StreamingResponse(
+        stream_spool_file(f, result.size),
+        media_type=result.media_type,
+        headers={"Content-Length": str(result.size)},
+    )
+
+
+async def stream_tasks(
+    task_manager: Any, status: Optional[TaskStatus], cursor: Optional[str], limit: Optional[int]
+) -> AsyncIterator[bytes]:
+    """ NDJSON rows, one page of the index at a time; the cursor keeps paging stable under changes """
+    sent = 0
+    while limit is None or sent < limit:
+        size = LIST_MAX_PAGE_SIZE if limit is None else min(LIST_MAX_PAGE_SIZE, limit - sent)
+        tasks, cursor = task_manager.page(status, cursor, size)
+        if tasks:
+            yield "".join(
+                json.dumps({"task_id": tid, "status": task.status, "progress": task.progress}) + "\n"
+                for tid, task in tasks
+            ).encode()
+            sent += len(tasks)
+        if cursor is None:
+            return
+        # let other requests run between pages
+        await asyncio.sleep(0)
+
+
+def task_row(task: Any, error: Optional[str]) -> Dict[str, Any]:
+    row: Dict[str, Any] = {"status": task.status}
+    if error is not None:
+        row["error"] = error
+    return row
+
+
+def queue_depths(queues: Dict[str, Any]) -> Dict[str, int]:
+    """ queued tasks per priority over all lanes """
+    depths: Dict[str, int] = {}
+    for queue in queues.values():
+        for priority, depth in queue.depths().items():
+            depths[priority] = depths.get(priority, 0) + depth
+    return depths
 
 
 @tasks_router.get('/list')
-def list_tasks(request: Request) -> Dict[str,Dict[str,str]]:
+def list_tasks(
+    request: Request,
+    status: Optional[TaskStatus] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    format: Literal["json", "ndjson"] = "json",
+) -> Any:
+    """
+    Tasks in id (= submission) order, a page at a time: pass the returned ``next_cursor``
+    back as ``cursor`` for the next page. ``format=ndjson`` streams every matching task
+    (or ``limit`` of them) as one JSON object per line instead.
+    """
+    task_manager = request.app.state.task_manager
+    if format == "ndjson":
+        return StreamingResponse(
+            stream_tasks(task_manager, status, cursor, limit),
+            media_type="application/x-ndjson",
+        )
+
+    tasks, next_cursor = task_manager.page(status, cursor, min(limit or LIST_PAGE_SIZE, LIST_MAX_PAGE_SIZE))
+    results = request.app.state.results
+    return {
+        "tasks": {tid: task_row(task, results.error(tid)) for tid, task in tasks},
+        "next_cursor": next_cursor,
+        "total": task_manager.count(status),
+        "queue_depth": queue_depths(request.app.state.queues),
+        "lane_depth": {lane: queue.qsize() for lane, queue in request.app.state.queues.items()},
+    }
+
+@tasks_router.get("/concurrency", tags=["Health Checks"])
+def concurrency(request: Request) -> Dict[str, Any]:
+    """ the cpu lane's current worker limit and the load sample it was derived from """
+    pool = request.app.state.pool
     return {
-        tid: {"status": task.status} 
-        for tid, task in request.app.state.shared_tasks.items()
+        **request.app.state.concurrency.to_dict(),
+        "adaptive": CONCURRENCY_ADAPTIVE,
+        "workers": len(pool.workers),
+        "in_flight": len(pool.in_flight),
     }
+
+
 @tasks_router.get("/health", tags=["Health Checks"])
 def health_check() -> Dict[str, Any]:
     return {
@@ -1,5 +1,10 @@
-from .test_helper_class import TestRequestType, TestCommand, TestTask, TestTaskManager, TestUpperStrEnum
-from .test_api import TestTasksRoute
+from .test_helper_class import TestRequestType, TestCommand, TestTask, TestTaskManager, TestUpperStrEnum, TestSharedTaskTable, TestStatusHub, TestTaskIdAllocator, TestFairTaskQueue, TestTaskJournal, TestTaskRetention, TestConcurrencyController, TestAdmissionController, TestMetrics, TestTimingTable
+from .test_api import TestTasksRoute, TestTaskStatusWebSocket
+from .test_worker import TestWorkerPool, TestTaskRegistry, TestExecutionLanes
+from .test_ws import TestTaskFeed
+from .test_core import TestRateLimiter, TestSharedBucketStore
+from .test_configs import TestLoggingConfig
+from .test_bench import TestBench
 
 
 __all__ = [
@@ -9,4 +14,23 @@ __all__ = [
     "TestTaskManager",
     "TestRequestType",
     "TestTasksRoute",
+    "TestSharedTaskTable",
+    "TestStatusHub",
+    "TestTaskIdAllocator",
+    "TestFairTaskQueue",
+    "TestTaskJournal",
+    "TestTaskRetention",
+    "TestConcurrencyController",
+    "TestAdmissionController",
+    "TestMetrics",
+    "TestTimingTable",
+    "TestTaskStatusWebSocket",
+    "TestWorkerPool",
+    "TestTaskRegistry",
+    "TestExecutionLanes",
+    "TestTaskFeed",
+    "TestRateLimiter",
+    "TestSharedBucketStore",
+    "TestLoggingConfig",
+    "TestBench",
 ]
\ No newline at end of file
@@ -1,6 +1,8 @@
 from .test_tasks import TestTasksRoute
+from .test_ws import TestTaskStatusWebSocket
 
 
 __all__ = [
     "TestTasksRoute",
+    "TestTaskStatusWebSocket",
 ]
\ No newline at end of file
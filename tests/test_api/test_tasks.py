@@ -1,16 +1,36 @@
 import time
+import json
+import os
+import tempfile
 import unittest
+from unittest import mock
 from fastapi import FastAPI
 from fastapi.testclient import TestClient
 
 from core import create_app
 from configs import  PORT,WS_URL, BASE_URL
-from helper_class import TaskStatus
+from helper_class import TaskLane, TaskResult, TaskStatus
+from utils import evict_finished_tasks
+from worker import registry
+
+
+def failing_task(payload, token):
+    raise RuntimeError("boom")
+
+
+if "test_api_fail" not in registry:
+    registry.register("test_api_fail", lane=TaskLane.THREAD)(failing_task)
 
 
 class TestTasksRoute(unittest.TestCase):
     def setUp(self):
         """Method to prepare the test fixture. Run BEFORE the test methods."""
+        journal_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(journal_dir.cleanup)
+        self.journal_dir = journal_dir.name
+        patcher = mock.patch("core.lifespan.JOURNAL_DIR", journal_dir.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
         self.base_url: str = f"{BASE_URL}:{PORT}/tasks"
         self.app: FastAPI = create_app()
         self.client = TestClient(app=self.app)
@@ -36,22 +56,110 @@ class TestTasksRoute(unittest.TestCase):
             self.assertEqual(data["task_id"],self.task_id)
             self.assertEqual(data["status"],TaskStatus.QUEUED)
             
+    def test_admission_rejects_with_retry_after(self):
+        with self.client as c:
+            c.app.state.admission.max_queued = 0
+            response = c.post(url=f"{self.base_url}/start/{self.task_id}")
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(response.headers["Retry-After"], "1")
+            response = c.post(url=f"{self.base_url}/batch", json=[{}])
+            self.assertEqual(response.status_code, 503)
+            self.assertIsNone(c.app.state.task_manager.get_task(self.task_id))
+
+    def test_metrics_route(self):
+        with self.client as c:
+            c.post(url=f"{self.base_url}/start/{self.task_id}", json={"type": "sleep", "payload": {"duration": 0.05}})
+            deadline = time.monotonic() + 5
+            while c.app.state.task_manager.get_task(self.task_id).status != TaskStatus.COMPLETED:
+                self.assertLess(time.monotonic(), deadline)
+                time.sleep(0.05)
+            response = c.get(url=f"{BASE_URL}:{PORT}/metrics")
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.headers["content-type"].startswith("text/plain"))
+            lines = response.text.splitlines()
+            self.assertIn('tasks_queue_depth{lane="async"} 0', lines)
+            self.assertIn(f'tasks_slots{{lane="cpu"}} {c.app.state.pool.size}', lines)
+            self.assertIn("# TYPE tasks_run_seconds histogram", lines)
+            self.assertTrue(any(line.startswith('tasks_ipc_seconds_count{op="submit"}') for line in lines))
+            response = c.get(url=f"{BASE_URL}:{PORT}/timings")
+            self.assertEqual(response.status_code, 200)
+            self.assertIsInstance(response.json(), dict)
+
+    def test_concurrency_route(self):
+        with self.client as c:
+            data = c.get(url=f"{self.base_url}/concurrency").json()
+            self.assertEqual(data["limit"], c.app.state.pool.size)
+            self.assertLessEqual(data["min"], data["limit"])
+            self.assertLessEqual(data["limit"], data["max"])
+            self.assertEqual(data["in_flight"], 0)
+
     def test_list_task_route(self):
         with self.client as c:
             response = c.get(url=f"{self.base_url}/list/")
             data = response.json()
             self.assertEqual(response.status_code, 200)
             self.assertIsInstance(data,dict)
-            self.assertEqual(data, {})
+            self.assertEqual(data["tasks"], {})
+            self.assertEqual(data["queue_depth"], {"high": 0, "normal": 0, "low": 0})
             c.post(url=f"{self.base_url}/start/{self.task_id}")
             response = c.get(url=f"{self.base_url}/list/")
-            data = response.json()
+            data = response.json()["tasks"]
             self.assertEqual(response.status_code,200)
             self.assertIsInstance(data,dict)
             self.assertIn(self.task_id,data)
-            self.assertEqual(data[self.task_id]["status"],TaskStatus.QUEUED)
+            # the scheduler dispatches on enqueue, so the task may already be running
+            self.assertIn(data[self.task_id]["status"],(TaskStatus.QUEUED, TaskStatus.RUNNING))
             
             
+    def test_duplicate_start_rejected(self):
+        with self.client as c:
+            c.app.state.pool.size = 0  # keep the task queued
+            c.post(url=f"{self.base_url}/start/{self.task_id}")
+            response = c.post(url=f"{self.base_url}/start/{self.task_id}")
+            self.assertEqual(response.status_code, 409)
+            self.assertEqual(c.app.state.queue.qsize(), 1)
+            self.assertEqual(c.app.state.admission.in_flight("testclient"), 1)
+            c.post(url=f"{self.base_url}/stop/{self.task_id}")
+            # a finished task may be started again
+            response = c.post(url=f"{self.base_url}/start/{self.task_id}")
+            self.assertEqual(response.status_code, 200)
+
+    def test_restart_after_cancel(self):
+        with self.client as c:
+            c.post(url=f"{self.base_url}/start/{self.task_id}", json={"payload": {"duration": 5}})
+            task_manager, pool = c.app.state.task_manager, c.app.state.pool
+            deadline = time.monotonic() + 5
+            while pool.in_flight.get(self.task_id) is None:
+                self.assertLess(time.monotonic(), deadline)
+                time.sleep(0.02)
+            c.post(url=f"{self.base_url}/stop/{self.task_id}")
+            while self.task_id in pool.in_flight:
+                self.assertLess(time.monotonic(), deadline)
+                time.sleep(0.02)
+            # the cancellation of the first run does not stop the second
+            response = c.post(url=f"{self.base_url}/start/{self.task_id}", json={"payload": {"duration": 0.1}})
+            self.assertEqual(response.status_code, 200)
+            deadline = time.monotonic() + 5
+            while task_manager.get_task(self.task_id).status != TaskStatus.COMPLETED:
+                self.assertLess(time.monotonic(), deadline)
+                time.sleep(0.05)
+            response = c.get(url=f"{self.base_url}/result/{self.task_id}")
+            self.assertEqual(response.json(), {"duration": 0.1})
+            # a run still winding down in its executor blocks a restart
+            pool.in_flight["draining"] = None
+            try:
+                response = c.post(url=f"{self.base_url}/start/draining")
+            finally:
+                del pool.in_flight["draining"]
+            self.assertEqual(response.status_code, 409)
+
+    def test_start_route_priority(self):
+        with self.client as c:
+            response = c.post(url=f"{self.base_url}/start/{self.task_id}", params={"priority": "high"})
+            self.assertEqual(response.status_code, 200)
+            response = c.post(url=f"{self.base_url}/start/other", params={"priority": "urgent"})
+            self.assertEqual(response.status_code, 422)
+
     def test_stop_task_route(self):
         with self.client as c:
             test_dict = {"task_id": self.task_id, "status": TaskStatus.CANCELLED}
@@ -64,6 +172,152 @@ class TestTasksRoute(unittest.TestCase):
             self.assertDictEqual(data, test_dict)
             
                
+    def test_task_result(self):
+        with self.client as c:
+            response = c.post(url=f"{self.base_url}/start/{self.task_id}", json={"type": "missing"})
+            self.assertEqual(response.status_code, 422)
+            c.post(url=f"{self.base_url}/start/{self.task_id}", json={"payload": {"duration": 0.1}})
+            deadline = time.monotonic() + 10
+            while c.app.state.task_manager.get_task(self.task_id).status != TaskStatus.COMPLETED:
+                self.assertLess(time.monotonic(), deadline)
+                time.sleep(0.05)
+            response = c.get(url=f"{self.base_url}/result/{self.task_id}")
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json(), {"duration": 0.1})
+            response = c.get(url=f"{self.base_url}/result/missing")
+            self.assertEqual(response.status_code, 404)
+
+    def test_failed_task_reason(self):
+        with self.client as c:
+            c.post(url=f"{self.base_url}/start/{self.task_id}", json={"type": "test_api_fail"})
+            deadline = time.monotonic() + 5
+            while c.app.state.task_manager.get_task(self.task_id).status != TaskStatus.FAILED:
+                self.assertLess(time.monotonic(), deadline)
+                time.sleep(0.05)
+            response = c.get(url=f"{self.base_url}/result/{self.task_id}")
+            self.assertEqual(response.status_code, 404)
+            self.assertEqual(response.json()["detail"], "Task failed: RuntimeError: boom")
+            data = c.get(url=f"{self.base_url}/list").json()["tasks"]
+            self.assertEqual(data[self.task_id]["error"], "RuntimeError: boom")
+            # starting the id again drops what the failed run left behind
+            c.app.state.pool.size = 0
+            c.post(url=f"{self.base_url}/start/{self.task_id}")
+            self.assertIsNone(c.app.state.results.error(self.task_id))
+            response = c.get(url=f"{self.base_url}/result/{self.task_id}")
+            self.assertEqual(response.status_code, 409)
+
+    def test_async_lane_task(self):
+        with self.client as c:
+            c.app.state.pool.size = 0  # the cpu lane is not involved
+            c.post(url=f"{self.base_url}/start/{self.task_id}", json={"type": "sleep", "payload": {"duration": 0.1}})
+            data = c.get(url=f"{self.base_url}/list").json()
+            self.assertIn("lane_depth", data)
+            deadline = time.monotonic() + 5
+            while c.app.state.task_manager.get_task(self.task_id).status != TaskStatus.COMPLETED:
+                self.assertLess(time.monotonic(), deadline)
+                time.sleep(0.05)
+            response = c.get(url=f"{self.base_url}/result/{self.task_id}")
+            self.assertEqual(response.json(), {"duration": 0.1})
+
+    def test_spooled_result_streamed_and_evicted(self):
+        with self.client as c:
+            c.post(url=f"{self.base_url}/start/{self.task_id}")
+            path = os.path.join(c.app.state.pool.spool_dir, "result.bin")
+            with open(path, "wb") as f:
+                f.write(b"x" * 3000)
+            c.app.state.results.put(
+                self.task_id, TaskResult(media_type="application/octet-stream", path=path, size=3000)
+            )
+            c.app.state.task_manager.update_task(self.task_id, TaskStatus.COMPLETED)
+            with mock.patch("tasks.tasks_router.RESULT_CHUNK_SIZE", 1024):
+                response = c.get(url=f"{self.base_url}/result/{self.task_id}")
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.content, b"x" * 3000)
+            c.app.state.task_manager.remove_task(self.task_id)
+            self.assertFalse(os.path.exists(path))
+
+    def test_stop_queued_task(self):
+        with self.client as c:
+            c.app.state.pool.size = 0  # keep everything queued
+            c.post(url=f"{self.base_url}/start/{self.task_id}")
+            response = c.post(url=f"{self.base_url}/stop/{self.task_id}")
+            self.assertEqual(response.json()["status"], TaskStatus.CANCELLED)
+            self.assertNotIn(self.task_id, c.app.state.queue)
+            self.assertEqual(c.app.state.queue.qsize(), 0)
+            self.assertEqual(c.app.state.pool.in_flight, {})
+
+    def test_batch_route(self):
+        with self.client as c:
+            response = c.post(url=f"{self.base_url}/batch", json=[{}, {}, {}])
+            data = response.json()
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(data["task_ids"]), 3)
+            self.assertEqual(len(set(data["task_ids"])), 3)
+            for task_id in data["task_ids"]:
+                self.assertIsNotNone(c.app.state.task_manager.get_task(task_id))
+            response = c.post(url=f"{self.base_url}/batch", json={"not": "a list"})
+            self.assertEqual(response.status_code, 422)
+
+    def test_list_pages_and_stream(self):
+        with self.client as c:
+            task_ids = c.post(url=f"{self.base_url}/batch", json=[{}] * 5).json()["task_ids"]
+            data = c.get(url=f"{self.base_url}/list", params={"limit": 3}).json()
+            self.assertEqual(list(data["tasks"]), task_ids[:3])
+            self.assertEqual(data["total"], 5)
+            data = c.get(url=f"{self.base_url}/list", params={"limit": 3, "cursor": data["next_cursor"]}).json()
+            self.assertEqual(list(data["tasks"]), task_ids[3:])
+            self.assertIsNone(data["next_cursor"])
+            response = c.get(url=f"{self.base_url}/list", params={"format": "ndjson"})
+            self.assertEqual(response.headers["content-type"], "application/x-ndjson")
+            rows = [json.loads(line) for line in response.text.splitlines()]
+            self.assertEqual([row["task_id"] for row in rows], task_ids)
+
+    def test_rate_limit_headers(self):
+        with self.client as c:
+            response = c.get(url=f"{self.base_url}/list")
+            self.assertEqual(response.status_code, 200)
+            remaining = int(response.headers["X-RateLimit-Remaining"])
+            for _ in range(remaining):
+                c.get(url=f"{self.base_url}/list")
+            response = c.get(url=f"{self.base_url}/list")
+            self.assertEqual(response.status_code, 429)
+            self.assertEqual(response.headers["X-RateLimit-Remaining"], "0")
+            self.assertIn("Retry-After", response.headers)
+
+    def test_finished_tasks_evicted_to_archive(self):
+        with self.client as c:
+            c.post(url=f"{self.base_url}/start/{self.task_id}")
+            c.post(url=f"{self.base_url}/stop/{self.task_id}")
+            self.assertEqual(evict_finished_tasks(c.app, now=float("inf")), 1)
+            self.assertIsNone(c.app.state.task_manager.get_task(self.task_id))
+            journal = c.app.state.journal
+        archived = dict(journal.read_archive())
+        self.assertEqual(archived[self.task_id].status, TaskStatus.CANCELLED)
+
+    def test_tasks_survive_restart(self):
+        with self.client as c:
+            c.post(url=f"{self.base_url}/start/{self.task_id}")
+        with TestClient(app=create_app()) as c:
+            data = c.get(url=f"{self.base_url}/list").json()["tasks"]
+            self.assertIn(self.task_id, data)
+            self.assertIn(data[self.task_id]["status"], (TaskStatus.QUEUED, TaskStatus.RUNNING))
+
+    def test_malformed_ids_and_journal_records(self):
+        with self.client as c:
+            response = c.post(url=f"{self.base_url}/start/a%0Abad%09b%09queued%09")
+            self.assertEqual(response.status_code, 422)
+            response = c.post(url=f"{self.base_url}/start/{'x' * 48}")
+            self.assertEqual(response.status_code, 422)
+        # corrupt records are skipped at startup instead of keeping the server down
+        with open(os.path.join(self.journal_dir, "journal-99999999.log"), "w") as f:
+            f.write("bad\tx\tqueued\t\n")
+            f.write("1.0\ty\tbogus\t\n")
+            f.write(f"1.0\t{self.task_id}\tqueued\t{{not json\n")
+            f.write("1.0\tgood\tcompleted\t\n")
+        with TestClient(app=create_app()) as c:
+            data = c.get(url=f"{self.base_url}/list").json()["tasks"]
+            self.assertEqual(list(data), ["good"])
+
     def test_health_route(self):
         with self.client as c:
             response = c.get(url=f"{self.base_url}/health")
@@ -0,0 +1,75 @@
+import tempfile
+import unittest
+from unittest import mock
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from core import create_app
+from helper_class import TaskStatus
+
+
+class TestTaskStatusWebSocket(unittest.TestCase):
+    def setUp(self):
+        journal_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(journal_dir.cleanup)
+        patcher = mock.patch("core.lifespan.JOURNAL_DIR", journal_dir.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.app: FastAPI = create_app()
+        self.client = TestClient(app=self.app)
+        self.task_id = "20250405123045123456"
+
+    def test_unknown_task(self):
+        with self.client as c:
+            with self.assertRaises(WebSocketDisconnect) as ar:
+                with c.websocket_connect(f"/ws/{self.task_id}") as ws:
+                    ws.receive_json()
+            self.assertEqual(ar.exception.code, 1008)
+
+    def test_status_pushed_on_change(self):
+        with self.client as c:
+            c.post(f"/tasks/start/{self.task_id}")
+            with c.websocket_connect(f"/ws/{self.task_id}") as ws:
+                data = ws.receive_json()
+                self.assertEqual(data["task_id"], self.task_id)
+                self.assertIn(data["status"], (TaskStatus.QUEUED, TaskStatus.RUNNING))
+                if data["status"] == TaskStatus.QUEUED:
+                    self.assertEqual(ws.receive_json()["status"], TaskStatus.RUNNING)
+                c.post(f"/tasks/stop/{self.task_id}")
+                self.assertEqual(ws.receive_json()["status"], TaskStatus.CANCELLED)
+                with self.assertRaises(WebSocketDisconnect) as ar:
+                    ws.receive_json()
+                self.assertEqual(ar.exception.code, 1000)
+
+    def test_multiplexed_feed(self):
+        with self.client as c:
+            c.post(f"/tasks/start/{self.task_id}")
+            with c.websocket_connect("/ws") as ws:
+                ws.send_json({"action": "subscribe", "task_ids": [self.task_id, "missing"]})
+                updates = {u["task_id"]: u["status"] for u in ws.receive_json()["updates"]}
+                self.assertIsNone(updates["missing"])
+                self.assertIn(updates[self.task_id], (TaskStatus.QUEUED, TaskStatus.RUNNING))
+                c.post(f"/tasks/stop/{self.task_id}")
+                updates = ws.receive_json()["updates"]
+                self.assertEqual([u["task_id"] for u in updates], [self.task_id])
+                self.assertEqual(updates[0]["status"], TaskStatus.CANCELLED)
+                ws.send_json({"action": "bogus"})
+                self.assertIn("error", ws.receive_json())
+
+    def test_feed_rejects_malformed_subscriptions(self):
+        with self.client as c:
+            with mock.patch("ws.task_status.WS_MAX_SUBSCRIPTIONS", 2):
+                with c.websocket_connect("/ws") as ws:
+                    for task_ids in ("abc", {"a": 1}, 7, ["a", 1]):
+                        ws.send_json({"action": "subscribe", "task_ids": task_ids})
+                        self.assertIn("error", ws.receive_json())
+                    ws.send_json({"action": "subscribe", "task_ids": ["a", "b", "c"]})
+                    self.assertIn("error", ws.receive_json())
+                    ws.send_json({"action": "subscribe", "task_ids": ["a", "b", "a"]})
+                    updates = ws.receive_json()["updates"]
+                    self.assertEqual(sorted(u["task_id"] for u in updates), ["a", "b"])
+
+
+if __name__ == "__main__":
+    unittest.main()
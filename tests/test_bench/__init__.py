@@ -0,0 +1,6 @@
+from .test_bench import TestBench
+
+
+__all__ = [
+    "TestBench",
+]
@@ -0,0 +1,103 @@
+import asyncio
+import json
+import unittest
+from unittest import mock
+
+from bench import BenchConfig, BenchRun, OperationStats, parse_mix
+
+
+class TestBench(unittest.TestCase):
+    def test_parse_mix(self):
+        self.assertEqual(
+            parse_mix("submit=70, list=20,stop=5,watch"),
+            {"submit": 70.0, "list": 20.0, "stop": 5.0, "watch": 1.0},
+        )
+
+    def test_config_validation(self):
+        with self.assertRaises(ValueError):
+            BenchConfig(mode="open")
+        with self.assertRaises(ValueError):
+            BenchConfig(mix={"delete": 1})
+        with self.assertRaises(ValueError):
+            BenchConfig(mix={"list": 0})
+
+    def test_stats_split_errors_and_correct_for_schedule(self):
+        stats = OperationStats()
+        # meant to go out at 0 but held back until 1 by an earlier slow response
+        stats.record(intended=0.0, started=1.0, ended=1.1, status=200)
+        stats.record(intended=2.0, started=2.0, ended=2.1, status=503)
+        stats.record(intended=3.0, started=3.0, ended=3.1, status=None)
+        report = stats.report(elapsed=2.0)
+        self.assertEqual(report["requests"], 3)
+        self.assertEqual(report["errors"], 2)
+        self.assertEqual(report["statuses"], {"200": 1, "503": 1, "error": 1})
+        self.assertAlmostEqual(report["service"]["max"], 0.1)
+        self.assertAlmostEqual(report["corrected"]["max"], 1.1)
+        self.assertEqual(report["throughput"], 0.5)
+
+    def test_paced_closed_loop_counts_a_stall(self):
+        config = BenchConfig(concurrency=1, rate=50, duration=0.5, warmup=0.1, mix={"list": 1})
+        run = BenchRun(config, session=None, seed=1)
+        calls = 0
+
+        async def list_tasks():
+            nonlocal calls
+            calls += 1
+            # one response stalls for ten send intervals
+            await asyncio.sleep(0.2 if calls == 10 else 0)
+            return 200
+
+        run.operations["list"] = list_tasks
+        report = asyncio.run(run.run())
+        listing = report["operations"]["list"]
+        self.assertEqual(listing["errors"], 0)
+        self.assertGreater(listing["requests"], 10)
+        # the requests queued behind the stall were late, which only the corrected numbers show
+        self.assertLess(listing["service"]["p90"], 0.05)
+        self.assertGreater(listing["corrected"]["p90"], 0.05)
+
+    def test_open_loop_keeps_the_arrival_rate(self):
+        config = BenchConfig(mode="open", rate=100, duration=0.5, warmup=0, mix={"submit": 1, "list": 1})
+        run = BenchRun(config, session=None, seed=2)
+
+        async def slow():
+            await asyncio.sleep(0.2)
+            return 200
+
+        run.operations = {"submit": slow, "list": slow}
+        report = asyncio.run(run.run())
+        self.assertGreaterEqual(report["requests"], 45)
+        self.assertEqual(report["errors"], 0)
+        self.assertEqual(set(report["operations"]), {"submit", "list"})
+
+    def test_open_loop_records_requests_still_pending_at_the_end(self):
+        config = BenchConfig(mode="open", rate=20, duration=0.5, warmup=0, timeout=0.2, mix={"list": 1})
+        run = BenchRun(config, session=None)
+
+        async def stalled():
+            try:
+                await asyncio.Event().wait()
+            finally:
+                # slow to give up, like a connection that hangs while closing
+                await asyncio.sleep(1)
+
+        run.operations["list"] = stalled
+        report = asyncio.run(run.run())
+        self.assertEqual(report["requests"], 10)
+        self.assertEqual(report["operations"]["list"]["statuses"], {"error": 10})
+
+    def test_watch_checks_the_reply(self):
+        run = BenchRun(BenchConfig(mix={"watch": 1}), session=None)
+        run.submitted.append("t1")
+        replies = [
+            {"updates": [{"task_id": "t1", "status": "queued"}]},
+            {"updates": [{"task_id": "t1", "status": None}]},
+            {"error": "Unknown action: subscribe"},
+        ]
+        for reply, status in zip(replies, (101, 404, 502)):
+            ws = mock.AsyncMock()
+            ws.recv.return_value = json.dumps(reply)
+            connection = mock.MagicMock()
+            connection.__aenter__.return_value = ws
+            with mock.patch("bench.websockets.connect", return_value=connection):
+                self.assertEqual(asyncio.run(run.watch()), status)
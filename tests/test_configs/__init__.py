@@ -0,0 +1,6 @@
+from .test_logging_config import TestLoggingConfig
+
+
+__all__ = [
+    "TestLoggingConfig",
+]
@@ -0,0 +1,79 @@
+import json
+import logging
+import os
+import queue
+import tempfile
+import unittest
+
+from configs.logging_config import (
+    BatchedRotatingFileHandler,
+    BatchingQueueListener,
+    JsonFormatter,
+    LogQueueHandler,
+)
+
+
+class TestLoggingConfig(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "test.log")
+        self.queue = queue.Queue()
+        self.logger = logging.getLogger("test_logging_config")
+        self.logger.propagate = False
+        self.logger.setLevel(logging.INFO)
+        self.logger.addHandler(LogQueueHandler(self.queue))
+        self.addCleanup(self.logger.handlers.clear)
+
+    def listen(self, max_bytes=0, batch_size=256, start=True):
+        handler = BatchedRotatingFileHandler(self.path, maxBytes=max_bytes, backupCount=2, encoding="utf-8")
+        handler.setFormatter(JsonFormatter())
+        listener = BatchingQueueListener(self.queue, [handler], batch_size=batch_size)
+        if start:
+            listener.start()
+        return listener
+
+    def read(self, path=None):
+        with open(path or self.path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f]
+
+    def test_records_are_valid_json(self):
+        listener = self.listen()
+        self.logger.info('a "quoted" message with %s', "args")
+        try:
+            raise ValueError("bad")
+        except ValueError:
+            self.logger.exception("failed")
+        # filtered by level before a record is made
+        self.logger.debug("hidden")
+        listener.stop()
+        first, second = self.read()
+        self.assertEqual(first["message"], 'a "quoted" message with args')
+        self.assertEqual((first["level"], first["logger"]), ("INFO", "test_logging_config"))
+        self.assertEqual(second["message"], "failed")
+        self.assertIn("ValueError: bad", second["exception"])
+
+    def test_queued_records_written_in_batches(self):
+        for i in range(10):
+            self.logger.info("message %s", i)
+        listener = self.listen(batch_size=4, start=False)
+        batches = []
+        handle = listener.handle
+        listener.handle = lambda batch: (batches.append(len(batch)), handle(batch))
+        listener.start()
+        listener.stop()
+        self.assertEqual(batches, [4, 4, 2])
+        self.assertEqual([entry["message"] for entry in self.read()], [f"message {i}" for i in range(10)])
+
+    def test_rotation(self):
+        listener = self.listen(max_bytes=300)
+        for i in range(10):
+            self.logger.info("message %s", i)
+        listener.stop()
+        self.assertTrue(os.path.exists(self.path + ".1"))
+        self.assertLess(os.path.getsize(self.path), 300)
+        self.assertEqual(self.read()[-1]["message"], "message 9")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,7 @@
+from .test_rate_limiter import TestRateLimiter, TestSharedBucketStore
+
+
+__all__ = [
+    "TestRateLimiter",
+    "TestSharedBucketStore",
+]
@@ -0,0 +1,84 @@
+import unittest
+
+import os
+
+from core.middleware import RateLimiter, SharedBucketStore
+
+
+class TestRateLimiter(unittest.TestCase):
+    def setUp(self):
+        self.limiter = RateLimiter(max_requests=2, period_seconds=10)
+
+    def test_bucket_drains_then_refills(self):
+        first = self.limiter.acquire("1.1.1.1", "/tasks/list", now=0)
+        second = self.limiter.acquire("1.1.1.1", "/tasks/list", now=0)
+        third = self.limiter.acquire("1.1.1.1", "/tasks/list", now=0)
+        self.assertTrue(first.allowed)
+        self.assertEqual(first.remaining, 1)
+        self.assertTrue(second.allowed)
+        self.assertEqual(second.remaining, 0)
+        self.assertFalse(third.allowed)
+        self.assertAlmostEqual(third.retry_after, 5)
+        # one token refills every 5 seconds
+        self.assertTrue(self.limiter.acquire("1.1.1.1", "/tasks/list", now=5).allowed)
+        self.assertFalse(self.limiter.acquire("1.1.1.1", "/tasks/list", now=5).allowed)
+
+    def test_clients_are_independent(self):
+        self.limiter.acquire("1.1.1.1", "/", now=0)
+        self.limiter.acquire("1.1.1.1", "/", now=0)
+        self.assertTrue(self.limiter.acquire("2.2.2.2", "/", now=0).allowed)
+
+    def test_route_limits(self):
+        limiter = RateLimiter(max_requests=1, period_seconds=10, route_limits={"/tasks/list": (3, 10)})
+        self.assertEqual(limiter.acquire("1.1.1.1", "/tasks/list", now=0).limit, 3)
+        self.assertEqual(limiter.acquire("1.1.1.1", "/tasks/start/1", now=0).limit, 1)
+        self.assertTrue(limiter.acquire("1.1.1.1", "/tasks/list", now=0).allowed)
+
+    def test_idle_buckets_are_evicted(self):
+        self.limiter.acquire("1.1.1.1", "/", now=0)
+        self.limiter.acquire("2.2.2.2", "/", now=9)
+        self.assertEqual(len(self.limiter.store.buckets), 2)
+        self.limiter.acquire("2.2.2.2", "/", now=10)
+        self.assertEqual(list(self.limiter.store.buckets), [("2.2.2.2", "")])
+
+    def test_max_clients(self):
+        limiter = RateLimiter(max_requests=1, period_seconds=10, max_clients=2)
+        for i in range(5):
+            limiter.acquire(f"10.0.0.{i}", "/", now=0)
+        self.assertEqual(len(limiter.store.buckets), 2)
+
+
+class TestSharedBucketStore(unittest.TestCase):
+    def setUp(self):
+        self.name = f"test_ratelimit_{os.getpid()}"
+        self.stores = []
+
+    def tearDown(self):
+        for store in self.stores:
+            store.close()
+        SharedBucketStore(self.name).unlink()
+
+    def make_limiter(self, **kwargs) -> RateLimiter:
+        store = SharedBucketStore(self.name, slots=128, **kwargs)
+        self.stores.append(store)
+        return RateLimiter(max_requests=2, period_seconds=10, store=store)
+
+    def test_workers_share_buckets(self):
+        worker1, worker2 = self.make_limiter(), self.make_limiter()
+        self.assertTrue(worker1.acquire("1.1.1.1", "/", now=0).allowed)
+        self.assertTrue(worker2.acquire("1.1.1.1", "/", now=0).allowed)
+        self.assertFalse(worker1.acquire("1.1.1.1", "/", now=0).allowed)
+        self.assertFalse(worker2.acquire("1.1.1.1", "/", now=0).allowed)
+        self.assertTrue(worker2.acquire("1.1.1.1", "/", now=5).allowed)
+
+    def test_batched_leases(self):
+        worker1, worker2 = self.make_limiter(batch_size=2), self.make_limiter(batch_size=2)
+        self.assertTrue(worker1.acquire("1.1.1.1", "/", now=0).allowed)
+        # worker1 leased both tokens in one trip
+        self.assertFalse(worker2.acquire("1.1.1.1", "/", now=0).allowed)
+        self.assertTrue(worker1.acquire("1.1.1.1", "/", now=0).allowed)
+        self.assertFalse(worker1.acquire("1.1.1.1", "/", now=0).allowed)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,6 +3,16 @@ from .test_requesttype import TestRequestType
 from .test_task import TestTask
 from .test_taskmanager import TestTaskManager
 from .test_upperStrEnum import TestUpperStrEnum
+from .test_shared_task_table import TestSharedTaskTable
+from .test_status_hub import TestStatusHub
+from .test_task_id_allocator import TestTaskIdAllocator
+from .test_fair_queue import TestFairTaskQueue
+from .test_task_journal import TestTaskJournal
+from .test_task_retention import TestTaskRetention
+from .test_concurrency_controller import TestConcurrencyController
+from .test_admission import TestAdmissionController
+from .test_metrics import TestMetrics
+from .test_timing_table import TestTimingTable
 
 
 __all__ = [
@@ -11,4 +21,14 @@ __all__ = [
     "TestTask",
     "TestTaskManager",
     "TestRequestType",
+    "TestSharedTaskTable",
+    "TestStatusHub",
+    "TestTaskIdAllocator",
+    "TestFairTaskQueue",
+    "TestTaskJournal",
+    "TestTaskRetention",
+    "TestConcurrencyController",
+    "TestAdmissionController",
+    "TestMetrics",
+    "TestTimingTable",
 ]
\ No newline at end of file
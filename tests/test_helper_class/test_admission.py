@@ -0,0 +1,55 @@
+import unittest
+
+from helper_class import AdmissionController, AdmissionRejected, Task, TaskStatus
+
+
+class TestAdmissionController(unittest.TestCase):
+    def test_queue_bound(self):
+        admission = AdmissionController(max_queued=10, retry_after=2)
+        admission.admit("a", 10, queued=0)
+        with self.assertRaises(AdmissionRejected) as raised:
+            admission.admit("a", 5, queued=6)
+        self.assertEqual(raised.exception.retry_after, 2)
+
+    def test_per_client_cap_released_on_finish(self):
+        admission = AdmissionController(max_per_client=2)
+        admission.add("a", ["t1", "t2"])
+        with self.assertRaises(AdmissionRejected):
+            admission.admit("a", 1, queued=0)
+        # other clients are not affected
+        admission.admit("b", 2, queued=0)
+        admission.track("t1", Task(status=TaskStatus.RUNNING))
+        self.assertEqual(admission.in_flight("a"), 2)
+        admission.track("t1", Task(status=TaskStatus.COMPLETED))
+        admission.track("t2", None)
+        self.assertEqual(admission.in_flight("a"), 0)
+        admission.admit("a", 2, queued=0)
+
+    def test_task_counted_once(self):
+        admission = AdmissionController(max_per_client=2)
+        admission.add("a", ["t1"])
+        admission.add("a", ["t1"])
+        self.assertEqual(admission.in_flight("a"), 1)
+        admission.add("b", ["t1"])
+        self.assertEqual((admission.in_flight("a"), admission.in_flight("b")), (0, 1))
+        admission.track("t1", Task(status=TaskStatus.COMPLETED))
+        self.assertEqual(admission.in_flight("b"), 0)
+
+    def test_projected_memory(self):
+        memory = [50.0]
+        admission = AdmissionController(memory_high=90.0, task_bytes=1024, memory_percent=lambda: memory[0])
+        admission.admit("a", 1, queued=0)
+        memory[0] = 95.0
+        with self.assertRaises(AdmissionRejected):
+            admission.admit("a", 1, queued=0)
+        # a batch large enough to push memory over the threshold is turned away as a whole
+        memory[0] = 50.0
+        with self.assertRaises(AdmissionRejected):
+            admission.admit("a", admission._total_memory // 1024, queued=0)
+
+    def test_unbounded_by_default(self):
+        AdmissionController().admit("a", 10 ** 9, queued=10 ** 9)
+
+
+if __name__ == "__main__":
+    unittest.main()
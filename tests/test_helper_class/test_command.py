@@ -31,6 +31,10 @@ class TestCommand(unittest.TestCase):
         self.assertEqual(Command.STATUS, "status")
         self.assertEqual(Command.LIST, "list")
         self.assertEqual(Command.STOP, "stop")
+        self.assertEqual(Command.BATCH, "batch")
+        self.assertEqual(Command.RESULT, "result")
+        self.assertEqual(Command.TIMINGS, "timings")
+        self.assertEqual(Command.BENCH, "bench")
         
 
 if __name__ == "__main__":
@@ -0,0 +1,60 @@
+import unittest
+
+from helper_class import ConcurrencyController, LoadSample, LoadSampler
+
+
+def sample(cpu=50.0, memory=50.0, swap_rate=0.0, load=0.5) -> LoadSample:
+    return LoadSample(cpu_percent=cpu, memory_percent=memory, swap_rate=swap_rate, runnable_per_cpu=load)
+
+
+class TestConcurrencyController(unittest.TestCase):
+    def setUp(self):
+        self.controller = ConcurrencyController(initial=4, minimum=2, maximum=6)
+
+    def test_additive_increase_with_backlog(self):
+        self.assertEqual(self.controller.update(sample(), backlog=True), 5)
+        self.assertEqual(self.controller.update(sample(), backlog=True), 6)
+        # capped at the ceiling
+        self.assertEqual(self.controller.update(sample(), backlog=True), 6)
+
+    def test_holds_when_idle_or_cpu_bound(self):
+        self.assertEqual(self.controller.update(sample(), backlog=False), 4)
+        self.assertEqual(self.controller.update(sample(cpu=95.0), backlog=True), 4)
+        self.assertIsNone(self.controller.last_change)
+
+    def test_multiplicative_decrease_under_pressure(self):
+        for pressure in (sample(memory=95.0), sample(swap_rate=4e6), sample(load=2.0)):
+            controller = ConcurrencyController(initial=6, minimum=2, maximum=6, cooldown=10)
+            self.assertEqual(controller.update(pressure, backlog=True, now=0), 3)
+            # never below the floor
+            self.assertEqual(controller.update(pressure, backlog=True, now=10), 2)
+            self.assertEqual(controller.update(pressure, backlog=True, now=20), 2)
+
+    def test_no_second_cut_within_cooldown(self):
+        controller = ConcurrencyController(initial=6, minimum=1, maximum=6, cooldown=10)
+        self.assertEqual(controller.update(sample(load=2.0), backlog=True, now=100), 3)
+        self.assertEqual(controller.update(sample(load=2.0), backlog=True, now=102), 3)
+        self.assertEqual(controller.last_change, 100)
+        self.assertEqual(controller.update(sample(load=2.0), backlog=True, now=110), 1)
+
+    def test_light_swapping_is_not_pressure(self):
+        self.assertEqual(self.controller.update(sample(swap_rate=4096), backlog=False), 4)
+
+    def test_bounds(self):
+        self.assertEqual(ConcurrencyController(initial=10, minimum=1, maximum=3).limit, 3)
+        with self.assertRaises(ValueError):
+            ConcurrencyController(initial=1, minimum=0)
+        with self.assertRaises(ValueError):
+            ConcurrencyController(initial=1, minimum=4, maximum=2)
+
+    def test_sampler_reads_host(self):
+        load = LoadSampler()()
+        self.assertGreaterEqual(load.cpu_percent, 0)
+        self.assertGreater(load.memory_percent, 0)
+        self.controller.update(load, backlog=False)
+        self.assertEqual(self.controller.to_dict()["last_sample"]["swap_rate"], load.swap_rate)
+        self.assertGreaterEqual(load.runnable_per_cpu, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
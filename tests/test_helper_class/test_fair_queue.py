@@ -0,0 +1,70 @@
+import asyncio
+import unittest
+
+from helper_class import FairTaskQueue, TaskPriority
+
+
+class TestFairTaskQueue(unittest.TestCase):
+    def setUp(self):
+        self.queue = FairTaskQueue({TaskPriority.HIGH: 2, TaskPriority.NORMAL: 1, TaskPriority.LOW: 1})
+
+    def drain(self):
+        items = []
+        while not self.queue.empty():
+            items.append(self.queue.get_nowait())
+        return items
+
+    def test_empty(self):
+        with self.assertRaises(asyncio.QueueEmpty):
+            self.queue.get_nowait()
+
+    def test_fifo_per_client(self):
+        for task_id in ("a", "b", "c"):
+            self.queue.put_nowait(task_id, client="x")
+        self.assertEqual(self.drain(), ["a", "b", "c"])
+
+    def test_clients_take_turns(self):
+        for i in range(3):
+            self.queue.put_nowait(f"flood{i}", client="flooder")
+        self.queue.put_nowait("polite", client="polite")
+        self.assertEqual(self.drain(), ["flood0", "polite", "flood1", "flood2"])
+
+    def test_weighted_priorities(self):
+        for i in range(4):
+            self.queue.put_nowait(f"high{i}", priority=TaskPriority.HIGH)
+            self.queue.put_nowait(f"low{i}", priority=TaskPriority.LOW)
+        self.assertEqual(
+            self.drain(),
+            ["high0", "high1", "low0", "high2", "high3", "low1", "low2", "low3"],
+        )
+
+    def test_depths(self):
+        self.queue.put_nowait("a", priority=TaskPriority.HIGH)
+        self.queue.put_nowait("b")
+        self.queue.put_nowait("c")
+        self.assertEqual(self.queue.qsize(), 3)
+        self.assertEqual(self.queue.depths(), {"high": 1, "normal": 2, "low": 0})
+
+    def test_discard(self):
+        for task_id in ("a", "b", "c"):
+            self.queue.put_nowait(task_id, client="x")
+        self.assertTrue(self.queue.discard("b"))
+        self.assertFalse(self.queue.discard("b"))
+        self.assertFalse(self.queue.discard("missing"))
+        self.assertNotIn("b", self.queue)
+        self.assertEqual(self.queue.qsize(), 2)
+        self.assertEqual(self.queue.depths()["normal"], 2)
+        self.assertEqual(self.drain(), ["a", "c"])
+
+    def test_discard_everything(self):
+        self.queue.put_nowait("a", priority=TaskPriority.HIGH)
+        self.queue.discard("a")
+        self.assertTrue(self.queue.empty())
+        with self.assertRaises(asyncio.QueueEmpty):
+            self.queue.get_nowait()
+        self.queue.put_nowait("a", priority=TaskPriority.HIGH)
+        self.assertEqual(self.drain(), ["a"])
+
+
+if __name__ == "__main__":
+    unittest.main()
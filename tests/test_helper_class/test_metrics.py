@@ -0,0 +1,65 @@
+import unittest
+
+from helper_class import Task, TaskStatus
+from helper_class.metrics import Counter, Gauge, Histogram, MetricsRegistry, TaskLatency
+
+
+class TestMetrics(unittest.TestCase):
+    def test_counter_and_gauge(self):
+        registry = MetricsRegistry()
+        counter = registry.register(Counter("requests_total", "Requests.", ["code"], [("200",)]))
+        gauge = registry.register(Gauge("connections", "Connections.", series=[()]))
+        counter.inc("429")
+        counter.inc("429", amount=2)
+        gauge.inc()
+        gauge.inc()
+        gauge.dec()
+        self.assertEqual(registry.render(), (
+            "# HELP requests_total Requests.\n"
+            "# TYPE requests_total counter\n"
+            'requests_total{code="200"} 0\n'
+            'requests_total{code="429"} 3\n'
+            "# HELP connections Connections.\n"
+            "# TYPE connections gauge\n"
+            "connections 1\n"
+        ))
+        with self.assertRaises(ValueError):
+            registry.register(Gauge("connections", "Again."))
+
+    def test_histogram_buckets(self):
+        histogram = Histogram("latency_seconds", "Latency.", buckets=(0.1, 1), labelnames=["op"])
+        for value in (0.05, 0.1, 0.5, 5):
+            histogram.observe(value, "submit")
+        self.assertEqual(histogram.count("submit"), 4)
+        self.assertEqual(histogram.samples(), [
+            'latency_seconds_bucket{op="submit",le="0.1"} 2',
+            'latency_seconds_bucket{op="submit",le="1"} 3',
+            'latency_seconds_bucket{op="submit",le="+Inf"} 4',
+            'latency_seconds_sum{op="submit"} 5.65',
+            'latency_seconds_count{op="submit"} 4',
+        ])
+
+    def test_label_escaping(self):
+        counter = Counter("errors_total", "Errors.", ["reason"])
+        counter.inc('say "hi"\\\n')
+        self.assertEqual(counter.samples(), ['errors_total{reason="say \\"hi\\"\\\\\\n"} 1'])
+
+    def test_task_latency(self):
+        wait, run = Histogram("wait", "Wait."), Histogram("run", "Run.")
+        finished = Counter("finished", "Finished.", ["status"])
+        latency = TaskLatency(wait, run, finished)
+        for status in (TaskStatus.QUEUED, TaskStatus.RUNNING, TaskStatus.RUNNING, TaskStatus.COMPLETED):
+            latency.track("a", Task(status=status))
+        # repeated final notifications and tasks never seen queued are not counted
+        latency.track("a", Task(status=TaskStatus.COMPLETED))
+        latency.track("b", Task(status=TaskStatus.FAILED))
+        latency.track("c", Task(status=TaskStatus.QUEUED))
+        latency.track("c", Task(status=TaskStatus.CANCELLED))
+        self.assertEqual((wait.count(), run.count()), (1, 1))
+        self.assertEqual(finished.value(TaskStatus.COMPLETED), 1)
+        self.assertEqual(finished.value(TaskStatus.CANCELLED), 1)
+        self.assertEqual(finished.value(TaskStatus.FAILED), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+import unittest
+from multiprocessing import Process
+
+from helper_class import SharedTaskTable, Task, TaskManager, TaskStatus, TaskTableFullError
+
+
+def complete_in_child(table: SharedTaskTable, task_id: str) -> None:
+    table[task_id] = Task(status=TaskStatus.COMPLETED, progress=1.0)
+
+
+class TestSharedTaskTable(unittest.TestCase):
+    def setUp(self):
+        self.table = SharedTaskTable(capacity=8)
+
+    def tearDown(self):
+        self.table.close()
+        self.table.unlink()
+
+    def test_set_and_get(self):
+        self.table["task1"] = Task(status=TaskStatus.QUEUED)
+        task = self.table["task1"]
+        self.assertEqual(task.status, TaskStatus.QUEUED)
+        self.assertGreater(task.created_at, 0)
+        self.assertIn("task1", self.table)
+        self.assertIsNone(self.table.get("task2"))
+
+    def test_update_keeps_created_at(self):
+        self.table["task1"] = Task(status=TaskStatus.QUEUED)
+        created = self.table["task1"].created_at
+        self.table["task1"] = Task(status=TaskStatus.RUNNING)
+        task = self.table["task1"]
+        self.assertEqual(task.status, TaskStatus.RUNNING)
+        self.assertEqual(task.created_at, created)
+        self.assertGreaterEqual(task.updated_at, created)
+
+    def test_delete_and_reuse_slot(self):
+        for i in range(8):
+            self.table[f"task{i}"] = Task(status=TaskStatus.QUEUED)
+        with self.assertRaises(TaskTableFullError):
+            self.table["task8"] = Task(status=TaskStatus.QUEUED)
+        del self.table["task3"]
+        self.assertNotIn("task3", self.table)
+        self.table["task8"] = Task(status=TaskStatus.QUEUED)
+        self.assertEqual(len(self.table), 8)
+        self.assertEqual(self.table.pop("task9", None), None)
+
+    def test_id_too_long(self):
+        with self.assertRaises(ValueError):
+            self.table["x" * 48] = Task(status=TaskStatus.QUEUED)
+
+    def test_update_from_child_process(self):
+        self.table["task1"] = Task(status=TaskStatus.RUNNING)
+        p = Process(target=complete_in_child, args=(self.table, "task1"))
+        p.start()
+        p.join()
+        task = self.table["task1"]
+        self.assertEqual(task.status, TaskStatus.COMPLETED)
+        self.assertEqual(task.progress, 1.0)
+        self.assertEqual(dict(self.table.items()), {"task1": task})
+
+    def test_cancel_flag(self):
+        self.assertFalse(self.table.request_cancel("task1"))
+        self.table["task1"] = Task(status=TaskStatus.RUNNING)
+        self.assertFalse(self.table.cancel_requested("task1"))
+        self.assertTrue(self.table.request_cancel("task1"))
+        # status writes keep the flag, re-adding the task clears it
+        self.table["task1"] = Task(status=TaskStatus.CANCELLED)
+        self.assertTrue(self.table.cancel_requested("task1"))
+        self.assertEqual(self.table["task1"].status, TaskStatus.CANCELLED)
+        del self.table["task1"]
+        self.table["task1"] = Task(status=TaskStatus.QUEUED)
+        self.assertFalse(self.table.cancel_requested("task1"))
+
+    def test_restart_clears_cancel_flag(self):
+        manager = TaskManager(self.table)
+        manager.add_task("task1", TaskStatus.RUNNING)
+        self.table.request_cancel("task1")
+        manager.update_task("task1", TaskStatus.CANCELLED)
+        self.assertTrue(self.table.cancel_requested("task1"))
+        # started again without being removed first
+        manager.add_task("task1", TaskStatus.QUEUED)
+        self.assertFalse(self.table.cancel_requested("task1"))
+
+    def test_probe_length_bounded_under_churn(self):
+        table = SharedTaskTable(capacity=512)
+        self.addCleanup(table.unlink)
+        self.addCleanup(table.close)
+        # the same table as a worker sees it, probing shared memory instead of the owner's index
+        worker = SharedTaskTable.__new__(SharedTaskTable)
+        worker.__setstate__({**table.__getstate__(), "owner_pid": -1})
+        self.addCleanup(worker.close)
+        live = []
+        for i in range(20_000):
+            task_id = f"task{i}"
+            table[task_id] = Task(status=TaskStatus.QUEUED)
+            live.append(task_id)
+            if len(live) > 64:
+                del table[live.pop(0)]
+        # every slot has been used, so no probe ever meets an empty slot
+        self.assertEqual(sum(1 for slot in range(table.capacity) if table._read(slot)[0] == 0), 0)
+        self.assertLess(table.max_probe, 32)
+        self.assertEqual(worker[live[-1]].status, TaskStatus.QUEUED)
+        self.assertNotIn("task0", worker)
+        worker[live[0]] = Task(status=TaskStatus.RUNNING)
+        self.assertEqual(table[live[0]].status, TaskStatus.RUNNING)
+
+
+if __name__ == "__main__":
+    unittest.main()
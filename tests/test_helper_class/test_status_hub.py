@@ -0,0 +1,54 @@
+import json
+import unittest
+
+from helper_class import StatusHub, Task, TaskManager, TaskStatus
+
+
+class TestStatusHub(unittest.TestCase):
+    def setUp(self):
+        self.hub = StatusHub()
+        self.received = []
+        self.subscriber = lambda task_id, status, message: self.received.append((status, message))
+
+    def test_publish_to_subscribers(self):
+        other = []
+        self.hub.subscribe("task1", self.subscriber)
+        self.hub.subscribe("task1", lambda task_id, status, message: other.append(message))
+        self.hub.publish("task1", Task(status=TaskStatus.RUNNING))
+        status, message = self.received[0]
+        self.assertEqual(status, TaskStatus.RUNNING)
+        self.assertEqual(json.loads(message), {"task_id": "task1", "status": "running"})
+        self.assertIs(other[0], message)
+
+    def test_publish_other_task(self):
+        self.hub.subscribe("task1", self.subscriber)
+        self.hub.publish("task2", Task(status=TaskStatus.RUNNING))
+        self.assertEqual(self.received, [])
+
+    def test_unsubscribe(self):
+        self.hub.subscribe("task1", self.subscriber)
+        self.hub.unsubscribe("task1", self.subscriber)
+        self.hub.publish("task1", Task(status=TaskStatus.RUNNING))
+        self.assertEqual(self.received, [])
+        self.assertEqual(self.hub.subscriber_count("task1"), 0)
+
+    def test_wildcard_subscriber(self):
+        seen = []
+        self.hub.subscribe_all(lambda task_id, status, message: seen.append((task_id, status)))
+        self.hub.publish("task1", Task(status=TaskStatus.RUNNING))
+        self.hub.publish("task2", None)
+        self.assertEqual(seen, [("task1", TaskStatus.RUNNING), ("task2", None)])
+
+    def test_task_manager_publishes(self):
+        manager = TaskManager(shared_tasks={})
+        manager.add_listener(self.hub.publish)
+        self.hub.subscribe("task1", self.subscriber)
+        manager.add_task("task1")
+        manager.update_task("task1", TaskStatus.COMPLETED)
+        manager.remove_task("task1")
+        statuses = [status for status, _ in self.received]
+        self.assertEqual(statuses, [TaskStatus.QUEUED, TaskStatus.COMPLETED, None])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,41 @@
+import unittest
+from unittest import mock
+
+from helper_class import TaskIdAllocator
+
+
+class TestTaskIdAllocator(unittest.TestCase):
+    def setUp(self):
+        self.allocator = TaskIdAllocator(node_id=1, worker_id=1)
+
+    def test_format(self):
+        task_id = self.allocator.new_id()
+        self.assertEqual(len(task_id), 26)
+        self.assertTrue(task_id.isalnum())
+
+    def test_monotonic_and_unique(self):
+        ids = [self.allocator.new_id() for _ in range(10_000)]
+        self.assertEqual(ids, sorted(ids))
+        self.assertEqual(len(set(ids)), len(ids))
+
+    def test_block_allocation(self):
+        block = self.allocator.allocate(1000)
+        self.assertEqual(len(set(block)), 1000)
+        self.assertEqual(block, sorted(block))
+        self.assertGreater(self.allocator.new_id(), block[-1])
+
+    def test_clock_going_backwards(self):
+        with mock.patch("helper_class.task_id_allocator.time.time_ns", return_value=2_000_000_000_000):
+            later = self.allocator.new_id()
+        with mock.patch("helper_class.task_id_allocator.time.time_ns", return_value=1_000_000_000_000):
+            earlier_clock = self.allocator.new_id()
+        self.assertGreater(earlier_clock, later)
+
+    def test_workers_do_not_collide(self):
+        other = TaskIdAllocator(node_id=1, worker_id=2)
+        with mock.patch("helper_class.task_id_allocator.random.getrandbits", return_value=0):
+            self.assertNotEqual(self.allocator.allocate(100)[0], other.allocate(100)[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
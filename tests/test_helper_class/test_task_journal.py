@@ -0,0 +1,126 @@
+import os
+import tempfile
+import unittest
+
+from helper_class import JournalLocked, Task, TaskJournal, TaskStatus
+
+
+class TestTaskJournal(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def open(self, **kwargs):
+        journal = TaskJournal(self.directory, flush_interval=0.01, **kwargs)
+        state = journal.open()
+        return journal, {task_id: status for task_id, (_, status, _) in state.items()}
+
+    def test_empty(self):
+        journal, state = self.open()
+        journal.close()
+        self.assertEqual(state, {})
+
+    def test_replay_last_status(self):
+        journal, _ = self.open()
+        journal.record("a", Task(status=TaskStatus.QUEUED))
+        journal.record("b", Task(status=TaskStatus.QUEUED))
+        journal.record("a", Task(status=TaskStatus.RUNNING))
+        journal.record("b", Task(status=TaskStatus.COMPLETED))
+        journal.record("c", Task(status=TaskStatus.QUEUED))
+        journal.record("c", None)
+        journal.close()
+
+        journal, state = self.open()
+        journal.close()
+        self.assertEqual(state, {"a": TaskStatus.RUNNING, "b": TaskStatus.COMPLETED})
+
+    def test_extra_carried_by_later_records(self):
+        journal, _ = self.open()
+        journal.append("a", TaskStatus.QUEUED)
+        journal.append("a", TaskStatus.QUEUED, '{"type": "x"}')
+        journal.append("a", TaskStatus.RUNNING)
+        journal.close()
+
+        journal = TaskJournal(self.directory)
+        state = journal.open()
+        journal.close()
+        self.assertEqual(state["a"][1:], (TaskStatus.RUNNING, '{"type": "x"}'))
+
+    def test_snapshot_compacts_segments(self):
+        journal, _ = self.open(snapshot_every=10)
+        for i in range(25):
+            journal.append(f"t{i % 5}", TaskStatus.QUEUED if i < 20 else TaskStatus.COMPLETED)
+            if i % 10 == 9:
+                # let the flusher commit so snapshots happen at the threshold
+                journal.close()
+                journal, _ = self.open(snapshot_every=10)
+        journal.close()
+
+        self.assertTrue(os.path.exists(os.path.join(self.directory, "snapshot.log")))
+        self.assertLessEqual(len([f for f in os.listdir(self.directory) if f.startswith("journal-")]), 2)
+        journal, state = self.open()
+        journal.close()
+        self.assertEqual(state, {f"t{i}": TaskStatus.COMPLETED for i in range(5)})
+
+    def test_archive(self):
+        journal, _ = self.open()
+        journal.archive("a", Task(status=TaskStatus.COMPLETED, progress=1.0, created_at=1.0, updated_at=2.0))
+        journal.record("a", None)
+        journal.close()
+
+        journal, state = self.open()
+        journal.close()
+        self.assertEqual(state, {})
+        self.assertEqual(
+            list(journal.read_archive()),
+            [("a", Task(status=TaskStatus.COMPLETED, progress=1.0, created_at=1.0, updated_at=2.0))],
+        )
+
+    def test_torn_tail_is_ignored(self):
+        journal, _ = self.open()
+        journal.append("a", TaskStatus.QUEUED)
+        journal.close()
+        segment = sorted(f for f in os.listdir(self.directory) if f.startswith("journal-"))[-1]
+        with open(os.path.join(self.directory, segment), "a") as f:
+            f.write("123.0\tb")
+
+        journal, state = self.open()
+        journal.close()
+        self.assertEqual(state, {"a": TaskStatus.QUEUED})
+
+    def test_separators_in_ids_are_escaped(self):
+        task_id = "a\nbad\tb\\tqueued\t"
+        journal, _ = self.open()
+        journal.record(task_id, Task(status=TaskStatus.QUEUED))
+        journal.archive(task_id, Task(status=TaskStatus.COMPLETED, created_at=1.0, updated_at=2.0))
+        journal.close()
+
+        journal, state = self.open()
+        journal.close()
+        self.assertEqual(state, {task_id: TaskStatus.QUEUED})
+        self.assertEqual([archived for archived, _ in journal.read_archive()], [task_id])
+
+    def test_malformed_records_are_skipped(self):
+        journal, _ = self.open()
+        journal.append("a", TaskStatus.QUEUED)
+        journal.close()
+        segment = sorted(f for f in os.listdir(self.directory) if f.startswith("journal-"))[-1]
+        with open(os.path.join(self.directory, segment), "a") as f:
+            f.write("bad\tb\tqueued\t\n1.0\tc\tbogus\t\n1.0\td\tcompleted\t\n")
+
+        journal, state = self.open()
+        journal.close()
+        self.assertEqual(state, {"a": TaskStatus.QUEUED, "d": TaskStatus.COMPLETED})
+
+    def test_directory_is_owned_by_one_journal(self):
+        journal, _ = self.open()
+        with self.assertRaises(JournalLocked):
+            TaskJournal(self.directory).open()
+        journal.close()
+        journal, _ = self.open()
+        journal.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
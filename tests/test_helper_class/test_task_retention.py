@@ -0,0 +1,52 @@
+import unittest
+
+from helper_class import Task, TaskRetention, TaskStatus
+
+
+class TestTaskRetention(unittest.TestCase):
+    def setUp(self):
+        self.retention = TaskRetention(
+            max_finished=3, ttl={TaskStatus.COMPLETED: 10, TaskStatus.CANCELLED: 1}
+        )
+
+    def finish(self, task_id, status=TaskStatus.COMPLETED):
+        self.retention.track(task_id, Task(status=status))
+
+    def test_unfinished_not_tracked(self):
+        self.retention.track("a", Task(status=TaskStatus.QUEUED))
+        self.retention.track("a", Task(status=TaskStatus.RUNNING))
+        self.assertEqual(len(self.retention), 0)
+
+    def test_ttl_per_status(self):
+        self.finish("done")
+        self.finish("cancelled", TaskStatus.CANCELLED)
+        self.finish("failed", TaskStatus.FAILED)
+        now = self.retention._deadlines[TaskStatus.CANCELLED]["cancelled"]
+        self.assertEqual(self.retention.expired(now), ["cancelled"])
+        self.assertEqual(self.retention.expired(now + 10), ["done"])
+        # no TTL for failed tasks: kept until pushed out by max_finished
+        self.assertEqual(self.retention.expired(now + 10 ** 6), [])
+
+    def test_max_finished_evicts_oldest(self):
+        for task_id in ("a", "b", "c", "d"):
+            self.finish(task_id, TaskStatus.FAILED)
+        self.assertEqual(self.retention.expired(), ["a"])
+        self.assertEqual(len(self.retention), 3)
+
+    def test_removed_or_requeued_task_untracked(self):
+        self.finish("a")
+        self.finish("b")
+        self.retention.track("a", None)
+        self.retention.track("b", Task(status=TaskStatus.QUEUED))
+        self.assertEqual(len(self.retention), 0)
+        self.assertEqual(self.retention.expired(float("inf")), [])
+
+    def test_repeated_notification_keeps_deadline(self):
+        self.finish("a")
+        deadline = self.retention._deadlines[TaskStatus.COMPLETED]["a"]
+        self.finish("a")
+        self.assertEqual(self.retention._deadlines[TaskStatus.COMPLETED]["a"], deadline)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -56,6 +56,13 @@ class TestTaskManager(unittest.TestCase):
         self.assertTrue(result)
         self.assertEqual(task.status,TaskStatus.CANCELLED)
         
+    def test_add_tasks_all_or_nothing(self):
+        """ a bad entry rolls back the tasks added before it """
+        with self.assertRaises(ValueError):
+            self.manager.add_tasks(["task5", "task6"], status="1234")
+        self.manager.add_tasks(["task5", "task6"])
+        self.assertEqual(self.manager.get_task("task6").status, TaskStatus.QUEUED)
+
     def test_remove_task_existent(self):
         """ remove a existing task """
         task = self.manager.remove_task("task1")
@@ -63,6 +70,26 @@ class TestTaskManager(unittest.TestCase):
         self.assertEqual(task.status, TaskStatus.QUEUED)
         self.assertIsNone(original)
 
+    def test_page_in_id_order(self):
+        """ pages follow the cursor through the ids in order """
+        for i in range(5):
+            self.manager.add_task(f"page{i}")
+        tasks, cursor = self.manager.page(limit=4)
+        self.assertEqual([tid for tid, _ in tasks], ["page0", "page1", "page2", "page3"])
+        tasks, cursor = self.manager.page(cursor=cursor, limit=4)
+        self.assertEqual([tid for tid, _ in tasks], ["page4", "task1", "task2"])
+        self.assertIsNone(cursor)
+
+    def test_page_by_status(self):
+        """ the status index follows updates and removals """
+        self.manager.update_task("task1", TaskStatus.COMPLETED)
+        self.manager.add_task("task3", TaskStatus.COMPLETED)
+        self.manager.remove_task("task3")
+        tasks, _ = self.manager.page(status=TaskStatus.COMPLETED)
+        self.assertEqual([tid for tid, _ in tasks], ["task1"])
+        self.assertEqual(self.manager.count(TaskStatus.QUEUED), 0)
+        self.assertEqual(self.manager.count(), 2)
+
         
 
 if __name__ == "__main__":
@@ -0,0 +1,64 @@
+import asyncio
+import random
+import unittest
+
+from helper_class import LatencySketch, TimingTable
+from utils import timeit, timings
+
+
+class TestTimingTable(unittest.TestCase):
+    def test_sketch_quantiles_within_accuracy(self):
+        rng = random.Random(7)
+        values = sorted(rng.lognormvariate(-5, 1.5) for _ in range(10_000))
+        sketch = LatencySketch(relative_accuracy=0.01)
+        for value in values:
+            sketch.add(value)
+        for q in (0.5, 0.95, 0.99):
+            exact = values[int(q * (len(values) - 1))]
+            self.assertLessEqual(abs(sketch.quantile(q) - exact) / exact, 0.011)
+        self.assertEqual(sketch.max, values[-1])
+        self.assertLess(len(sketch.buckets), 2000)
+
+    def test_sketches_merge(self):
+        left, right, whole = LatencySketch(), LatencySketch(), LatencySketch()
+        for i in range(1, 1001):
+            (left if i % 2 else right).add(i / 1000)
+            whole.add(i / 1000)
+        left.merge(right)
+        self.assertEqual(left.count, whole.count)
+        self.assertEqual(left.quantile(0.95), whole.quantile(0.95))
+        with self.assertRaises(ValueError):
+            left.merge(LatencySketch(relative_accuracy=0.05))
+
+    def test_table_drain_and_merge(self):
+        table = TimingTable()
+        table.record("f", 0.5)
+        table.record("f", None)
+        drained = table.drain()
+        self.assertEqual(len(table), 0)
+        table.record("f", 1.5)
+        table.merge(drained)
+        stats = table.summary()["f"]
+        self.assertEqual((stats["calls"], stats["sampled"]), (3, 2))
+        self.assertAlmostEqual(stats["mean"], 1.0)
+
+    def test_timeit_sampling(self):
+        @timeit(sample_rate=0)
+        def never_timed():
+            return 1
+
+        @timeit()
+        async def always_timed():
+            return 2
+
+        for _ in range(5):
+            self.assertEqual(never_timed(), 1)
+        self.assertEqual(asyncio.run(always_timed()), 2)
+        summary = timings.summary()
+        self.assertEqual(summary[f"{__name__}.{never_timed.__qualname__}"]["sampled"], 0)
+        self.assertEqual(summary[f"{__name__}.{never_timed.__qualname__}"]["calls"], 5)
+        self.assertEqual(summary[f"{__name__}.{always_timed.__qualname__}"]["sampled"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,10 @@
+from .test_pool import TestWorkerPool
+from .test_registry import TestTaskRegistry
+from .test_lanes import TestExecutionLanes
+
+
+__all__ = [
+    "TestWorkerPool",
+    "TestTaskRegistry",
+    "TestExecutionLanes",
+]
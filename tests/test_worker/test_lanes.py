@@ -0,0 +1,71 @@
+import asyncio
+import json
+import unittest
+
+from helper_class import TaskLane
+from worker import AsyncLane, ThreadLane, registry, register_task
+
+
+@register_task("test_lanes_echo", lane=TaskLane.THREAD)
+def echo_task(payload, token):
+    return payload
+
+
+@register_task("test_lanes_fail", lane=TaskLane.THREAD)
+def failing_task(payload, token):
+    raise RuntimeError("boom")
+
+
+class TestExecutionLanes(unittest.TestCase):
+    def run_lane(self, lane, submissions, kill=(), timeout=5):
+        """ submit ``(task_id, task_type, payload)`` and wait until none is in flight """
+        async def run():
+            lane.attach(asyncio.get_running_loop(), lambda: None)
+            for task_id, task_type, payload in submissions:
+                lane.submit(task_id, args=(task_type, payload))
+            for task_id in kill:
+                lane.kill(task_id)
+            async with asyncio.timeout(timeout):
+                while lane.in_flight:
+                    await asyncio.sleep(0.01)
+            lane.shutdown()
+
+        asyncio.run(run())
+
+    def test_async_lane_runs_concurrently(self):
+        lane = AsyncLane(size=100, shared_tasks={})
+        submissions = [(f"t{i}", "sleep", {"duration": 0.2}) for i in range(100)]
+        self.assertEqual(lane.free_slots, 100)
+        self.run_lane(lane, submissions, timeout=2)
+        self.assertEqual(sorted(lane.poll()), sorted(f"t{i}" for i in range(100)))
+        results = dict(lane.results())
+        self.assertEqual(json.loads(results["t0"].body), {"duration": 0.2})
+
+    def test_async_lane_kill_cancels(self):
+        lane = AsyncLane(size=2, shared_tasks={})
+        self.run_lane(lane, [("slow", "sleep", {"duration": 60})], kill=["slow"])
+        self.assertEqual(lane.poll(), ["slow"])
+        self.assertEqual(lane.results(), [])
+        self.assertFalse(lane.kill("slow"))
+
+    def test_thread_lane_results_and_errors(self):
+        lane = ThreadLane(size=2, shared_tasks={})
+        self.run_lane(lane, [("ok", "test_lanes_echo", {"a": 1}), ("bad", "test_lanes_fail", {})])
+        self.assertEqual(sorted(lane.poll()), ["bad", "ok"])
+        self.assertEqual(lane.failed(), [("bad", "RuntimeError: boom")])
+        [(task_id, result)] = lane.results()
+        self.assertEqual((task_id, json.loads(result.body)), ("ok", {"a": 1}))
+
+    def test_lane_must_match_function(self):
+        async def coroutine(payload, token):
+            return None
+
+        with self.assertRaises(ValueError):
+            registry.register("test_lanes_mismatch")(coroutine)
+        with self.assertRaises(ValueError):
+            registry.register("test_lanes_mismatch", lane=TaskLane.ASYNC)(echo_task)
+        self.assertEqual(registry.get("sleep").lane, TaskLane.ASYNC)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,262 @@
+import asyncio
+import os
+import signal
+import tempfile
+import time
+import unittest
+from multiprocessing import Manager
+
+from helper_class import CancellationToken, SharedTaskTable, Task, TaskStatus
+from utils import timeit, timings
+from worker import WorkerPool
+
+
+def finish_task(task_id: str, shared_tasks: dict) -> None:
+    shared_tasks[task_id] = Task(status=TaskStatus.COMPLETED)
+
+
+def hang_task(task_id: str, shared_tasks: dict) -> None:
+    time.sleep(60)
+
+
+def large_result_task(task_id: str, shared_tasks: dict, size: int) -> tuple:
+    return "application/octet-stream", bytes(size)
+
+
+def memory_hog_task(task_id: str, shared_tasks: dict) -> None:
+    # held until the task is killed
+    _ = bytearray(256 * 1024 * 1024)
+    time.sleep(60)
+
+
+@timeit()
+def timed_task(task_id: str, shared_tasks: dict) -> None:
+    time.sleep(0.01)
+
+
+def raising_task(task_id: str, shared_tasks: dict) -> None:
+    raise ValueError("bad input")
+
+
+def crashing_task(task_id: str, shared_tasks: dict, how: str) -> None:
+    if how == "exit":
+        os._exit(3)
+    os.kill(os.getpid(), signal.SIGSEGV)
+
+
+def cooperative_task(task_id: str, shared_tasks: dict) -> None:
+    token = CancellationToken(task_id, shared_tasks)
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        token.raise_if_cancelled()
+        time.sleep(0.01)
+
+
+class TestWorkerPool(unittest.TestCase):
+    def setUp(self):
+        self.manager = Manager()
+        self.shared_tasks = self.manager.dict()
+
+    def tearDown(self):
+        self.pool.shutdown()
+        self.manager.shutdown()
+
+    def wait_for(self, task_id: str, timeout: float = 10) -> None:
+        deadline = time.monotonic() + timeout
+        while task_id in self.pool.in_flight and time.monotonic() < deadline:
+            self.pool.poll(timeout=0.1)
+        self.assertNotIn(task_id, self.pool.in_flight)
+
+    def test_workers_are_reused(self):
+        self.pool = WorkerPool(size=1, target=finish_task, shared_tasks=self.shared_tasks)
+        self.pool.start()
+        pids = set(self.pool.workers)
+        for task_id in ("task1", "task2"):
+            self.shared_tasks[task_id] = Task(status=TaskStatus.RUNNING)
+            self.pool.submit(task_id)
+            self.wait_for(task_id)
+            self.assertEqual(self.shared_tasks[task_id].status, TaskStatus.COMPLETED)
+        self.assertEqual(set(self.pool.workers), pids)
+
+    def test_worker_timings_merged(self):
+        self.pool = WorkerPool(size=1, target=timed_task, shared_tasks=self.shared_tasks)
+        self.pool.start()
+        name = f"{__name__}.timed_task"
+        before = timings.summary().get(name, {}).get("calls", 0)
+        self.shared_tasks["task1"] = Task(status=TaskStatus.RUNNING)
+        self.pool.submit("task1")
+        self.wait_for("task1")
+        deadline = time.monotonic() + 10
+        while timings.summary().get(name, {}).get("calls", 0) == before and time.monotonic() < deadline:
+            self.pool.poll(timeout=0.1)
+        stats = timings.summary()[name]
+        self.assertEqual(stats["calls"], before + 1)
+        self.assertGreaterEqual(stats["max"], 0.01)
+
+    def test_exception_reported_and_worker_kept(self):
+        self.pool = WorkerPool(size=1, target=raising_task, shared_tasks=self.shared_tasks)
+        self.pool.start()
+        pids = set(self.pool.workers)
+        self.shared_tasks["task1"] = Task(status=TaskStatus.RUNNING)
+        self.pool.submit("task1")
+        self.wait_for("task1")
+        self.assertEqual(self.pool.failed(), [("task1", "ValueError: bad input")])
+        self.assertEqual(set(self.pool.workers), pids)
+
+    def test_crash_reported_with_exit_reason(self):
+        self.pool = WorkerPool(size=1, target=crashing_task, shared_tasks=self.shared_tasks)
+        self.pool.start()
+        for task_id, how in (("task1", "exit"), ("task2", "segfault")):
+            self.shared_tasks[task_id] = Task(status=TaskStatus.RUNNING)
+            self.pool.submit(task_id, args=(how,))
+            self.wait_for(task_id)
+        self.assertEqual(self.pool.failed(), [
+            ("task1", "worker exited with code 3"),
+            ("task2", "worker killed by SIGSEGV"),
+        ])
+        # each crashed worker was replaced at once, so the slot is usable again
+        self.assertEqual(len(self.pool.workers), 1)
+        self.assertEqual(self.pool.free_slots, 1)
+
+    def test_resize(self):
+        self.pool = WorkerPool(size=1, target=finish_task, shared_tasks=self.shared_tasks)
+        self.pool.start()
+        self.pool.resize(3)
+        self.assertEqual(len(self.pool.workers), 3)
+        self.assertEqual(self.pool.free_slots, 3)
+        self.pool.resize(1)
+        deadline = time.monotonic() + 10
+        while len(self.pool.workers) > 1 and time.monotonic() < deadline:
+            self.pool.poll(timeout=0.1)
+        # surplus workers retire without being replaced
+        self.pool.poll(timeout=0.5)
+        self.assertEqual(len(self.pool.workers), 1)
+        self.shared_tasks["task1"] = Task(status=TaskStatus.RUNNING)
+        self.pool.submit("task1")
+        self.wait_for("task1")
+        self.assertEqual(self.shared_tasks["task1"].status, TaskStatus.COMPLETED)
+
+    def test_worker_recycled_after_max_tasks(self):
+        self.pool = WorkerPool(
+            size=1, target=finish_task, shared_tasks=self.shared_tasks, max_tasks_per_worker=1
+        )
+        self.pool.start()
+        pids = set(self.pool.workers)
+        self.shared_tasks["task1"] = Task(status=TaskStatus.RUNNING)
+        self.pool.submit("task1")
+        self.wait_for("task1")
+        deadline = time.monotonic() + 10
+        while set(self.pool.workers) == pids and time.monotonic() < deadline:
+            self.pool.poll(timeout=0.1)
+        self.assertEqual(len(self.pool.workers), 1)
+        self.assertNotEqual(set(self.pool.workers), pids)
+
+    def test_kill_in_flight_task(self):
+        self.pool = WorkerPool(size=1, target=hang_task, shared_tasks=self.shared_tasks)
+        self.pool.start()
+        self.shared_tasks["task1"] = Task(status=TaskStatus.RUNNING)
+        self.pool.submit("task1")
+        self.assertEqual(self.pool.free_slots, 0)
+        self.assertTrue(self.pool.kill("task1"))
+        self.wait_for("task1")
+        self.assertEqual(self.pool.free_slots, 1)
+        self.assertEqual(len(self.pool.workers), 1)
+
+    def test_result_sent_back(self):
+        self.pool = WorkerPool(size=1, target=large_result_task, shared_tasks=self.shared_tasks)
+        self.pool.start()
+        self.shared_tasks["task1"] = Task(status=TaskStatus.RUNNING)
+        self.pool.submit("task1", args=(4 * 1024 * 1024,))
+        self.wait_for("task1")
+        [(task_id, result)] = self.pool.results()
+        self.assertEqual(task_id, "task1")
+        self.assertEqual(result.media_type, "application/octet-stream")
+        self.assertEqual(len(result.body), 4 * 1024 * 1024)
+        self.assertIsNone(result.path)
+
+    def test_large_result_spooled(self):
+        spool_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(spool_dir.cleanup)
+        self.pool = WorkerPool(
+            size=1,
+            target=large_result_task,
+            shared_tasks=self.shared_tasks,
+            spool_dir=spool_dir.name,
+            spool_threshold=1024,
+        )
+        self.pool.start()
+        self.shared_tasks["task1"] = Task(status=TaskStatus.RUNNING)
+        self.pool.submit("task1", args=(4096,))
+        self.wait_for("task1")
+        [(_, result)] = self.pool.results()
+        self.assertEqual(result.body, b"")
+        self.assertEqual(result.size, 4096)
+        self.assertEqual(os.path.dirname(result.path), spool_dir.name)
+        with open(result.path, "rb") as f:
+            self.assertEqual(f.read(), bytes(4096))
+
+    def test_kill_unknown_task(self):
+        self.pool = WorkerPool(size=1, target=finish_task, shared_tasks=self.shared_tasks)
+        self.assertFalse(self.pool.kill("task999"))
+
+    def run_attached(self, until, timeout: float = 10) -> None:
+        """ drive the pool from an event loop until ``until()`` holds """
+        async def wait():
+            self.pool.attach(asyncio.get_running_loop(), lambda: None)
+            deadline = time.monotonic() + timeout
+            while not until() and time.monotonic() < deadline:
+                await asyncio.sleep(0.01)
+            self.live_workers = set(self.pool.workers)
+            self.pool.shutdown()
+
+        asyncio.run(wait())
+        self.assertTrue(until())
+
+    def test_cooperative_cancel_keeps_worker(self):
+        table = SharedTaskTable(capacity=8)
+        self.addCleanup(table.unlink)
+        self.addCleanup(table.close)
+        self.pool = WorkerPool(size=1, target=cooperative_task, shared_tasks=table, grace_period=30)
+        self.pool.start()
+        pids = set(self.pool.workers)
+        table["task1"] = Task(status=TaskStatus.RUNNING)
+        self.pool.submit("task1")
+
+        def stopped():
+            if self.pool.in_flight.get("task1"):
+                self.pool.kill("task1")
+            return "task1" not in self.pool.in_flight
+
+        self.run_attached(stopped)
+        # the task returned on its own well within the grace period; nothing was killed
+        self.assertEqual(self.live_workers, pids)
+
+    def test_timeout_reported(self):
+        self.pool = WorkerPool(size=1, target=hang_task, shared_tasks=self.shared_tasks)
+        self.pool.start()
+        self.shared_tasks["task1"] = Task(status=TaskStatus.RUNNING)
+        self.pool.submit("task1", timeout=0.2)
+        expired = []
+        self.run_attached(lambda: bool(expired.extend(self.pool.expired()) or expired))
+        self.assertEqual(expired, ["task1"])
+
+    def test_memory_limit_enforced(self):
+        self.pool = WorkerPool(
+            size=1, target=memory_hog_task, shared_tasks=self.shared_tasks, memory_check_interval=0.1
+        )
+        self.pool.start()
+        self.shared_tasks["task1"] = Task(status=TaskStatus.RUNNING)
+        self.pool.submit("task1", memory_limit=128 * 1024 * 1024)
+        over_memory = []
+
+        def stopped():
+            over_memory.extend(self.pool.over_memory())
+            return bool(over_memory) and "task1" not in self.pool.in_flight
+
+        self.run_attached(stopped)
+        self.assertEqual(over_memory, ["task1"])
+        self.assertEqual([task_id for task_id, _ in self.pool.failed()], ["task1"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import json
+import unittest
+
+from worker import TaskRegistry, registry, run_task
+from worker.task_runner import encode_result
+
+
+class TestTaskRegistry(unittest.TestCase):
+    def setUp(self):
+        self.registry = TaskRegistry()
+
+    def test_register_and_get(self):
+        @self.registry.register()
+        def echo(payload, token):
+            return payload
+
+        @self.registry.register("renamed")
+        def other(payload, token):
+            return None
+
+        self.assertIn("echo", self.registry)
+        self.assertIs(self.registry.get("renamed").func, other)
+        self.assertEqual(sorted(self.registry), ["echo", "renamed"])
+
+    def test_duplicate_and_unknown(self):
+        self.registry.register("echo")(lambda payload, token: payload)
+        with self.assertRaises(ValueError):
+            self.registry.register("echo")(lambda payload, token: payload)
+        with self.assertRaises(KeyError):
+            self.registry.get("missing")
+
+    def test_default_type_registered(self):
+        self.assertIn("complicated", registry)
+
+    def test_encode_result(self):
+        self.assertIsNone(encode_result(None))
+        data = bytearray(b"raw")
+        self.assertIs(encode_result(data)[1].obj, data)
+        self.assertEqual(encode_result("text"), ("text/plain; charset=utf-8", b"text"))
+        media_type, body = encode_result({"a": [1, 2]})
+        self.assertEqual(media_type, "application/json")
+        self.assertEqual(json.loads(body), {"a": [1, 2]})
+
+    def test_run_task(self):
+        media_type, body = run_task("task1", {}, "complicated", {"duration": 0.01})
+        self.assertEqual(media_type, "application/json")
+        self.assertEqual(json.loads(body), {"duration": 0.01})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,6 @@
+from .test_task_feed import TestTaskFeed
+
+
+__all__ = [
+    "TestTaskFeed",
+]
@@ -0,0 +1,42 @@
+import unittest
+
+from helper_class import TaskStatus
+from ws.task_feed import TaskFeed
+
+
+class TestTaskFeed(unittest.TestCase):
+    def setUp(self):
+        self.feed = TaskFeed(max_pending=3)
+
+    def test_updates_are_coalesced(self):
+        self.feed.deliver("task1", TaskStatus.QUEUED, "")
+        self.feed.deliver("task1", TaskStatus.RUNNING, "")
+        self.feed.deliver("task2", TaskStatus.QUEUED, "")
+        self.assertTrue(self.feed.wake.is_set())
+        message = self.feed.next_message(limit=10)
+        self.assertEqual(message, {"updates": [
+            {"task_id": "task1", "status": TaskStatus.RUNNING},
+            {"task_id": "task2", "status": TaskStatus.QUEUED},
+        ]})
+        self.assertIsNone(self.feed.next_message(limit=10))
+
+    def test_batches_respect_limit(self):
+        for i in range(3):
+            self.feed.deliver(f"task{i}", TaskStatus.QUEUED, "")
+        self.assertEqual(len(self.feed.next_message(limit=2)["updates"]), 2)
+        self.assertEqual(len(self.feed.next_message(limit=2)["updates"]), 1)
+
+    def test_overflow_requests_resync(self):
+        for i in range(4):
+            self.feed.deliver(f"task{i}", TaskStatus.QUEUED, "")
+        self.assertEqual(self.feed.next_message(limit=10), {"resync": True})
+        self.assertIsNone(self.feed.next_message(limit=10))
+
+    def test_replies_go_first(self):
+        self.feed.deliver("task1", TaskStatus.QUEUED, "")
+        self.feed.reply({"error": "bad"})
+        self.assertEqual(self.feed.next_message(limit=10), {"error": "bad"})
+
+
+if __name__ == "__main__":
+    unittest.main()
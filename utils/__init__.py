@@ -1,11 +1,18 @@
-from .benchmark_func import timeit
-from .process_utils import cleanup_processes, get_subprocess_count
+from .benchmark_func import timeit, timings
+from .process_utils import cancel_task, cleanup_processes, evict_finished_tasks, get_subprocess_count
 from .max_process import get_optimal_process_count
+from .metrics import metrics, render_metrics, task_latency
 
 __all__ = [
     "timeit",
+    "timings",
     "get_subprocess_count",
+    "cancel_task",
     "cleanup_processes",
+    "evict_finished_tasks",
     "get_optimal_process_count",
+    "metrics",
+    "render_metrics",
+    "task_latency",
     
 ]   
\ No newline at end of file
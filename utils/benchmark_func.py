@@ -1,38 +1,68 @@
 from functools import wraps
 import logging
+import os
+import random
 import time
 from typing import Any, Callable, Optional
 import inspect
 
+from configs import TIMEIT_SAMPLE_RATE
+from helper_class import TimingTable
 
 
-def timeit(logger: Optional[logging.Logger] = None):
+# timings of every @timeit function in this process
+timings = TimingTable()
+os.register_at_fork(after_in_child=timings.reset_after_fork)
+
+
+def timeit(logger: Optional[logging.Logger] = None, sample_rate: Optional[float] = None):
     """
-    Decorator to time async functions and log execution time. Work for both async function and sync function
-    
+    Decorator to time async functions and sync functions. Every call is counted in
+    ``timings`` under the function's qualified name; a ``sample_rate`` fraction of them
+    (default TIMEIT_SAMPLE_RATE) is timed, and logged at DEBUG. Aggregates are read with
+    ``timings.summary()`` or logged with ``timings.log_summary()``.
+
     Usage:
         @timeit()                    # Uses root logger
         @timeit(my_logger)           # Uses custom logger
+        @timeit(sample_rate=0.01)    # Times one call in a hundred
     """
+    rate = TIMEIT_SAMPLE_RATE if sample_rate is None else sample_rate
+
     def decorator(func: Callable) -> Callable:
         log = logger or logging.getLogger(func.__module__)
+        name = f"{func.__module__}.{func.__qualname__}"
         is_async = inspect.iscoroutinefunction(func)
-        
+
+        def sampled() -> bool:
+            return rate >= 1 or random.random() < rate
+
+        def record(start_time: float) -> None:
+            elapsed = time.perf_counter() - start_time
+            timings.record(name, elapsed)
+            log.debug("Function %s took %ss", func.__name__, elapsed)
+
         if is_async:
             @wraps(func)
             async def wrapper(*args, **kwargs) -> Any:
+                if not sampled():
+                    timings.record(name, None)
+                    return await func(*args, **kwargs)
                 start_time = time.perf_counter()
-                result = await func(*args, **kwargs)
-                end_time = time.perf_counter()
-                log.info("Function %s took %ss", func.__name__, end_time - start_time )
-                return result
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    record(start_time)
         else:
             @wraps(func)
             def wrapper(*args,**kwargs) -> Any:
+                if not sampled():
+                    timings.record(name, None)
+                    return func(*args, **kwargs)
                 start_time = time.perf_counter()
-                result = func(*args, **kwargs)
-                end_time = time.perf_counter()
-                log.info("Function %s took %ss", func.__name__, end_time - start_time )
-                return result
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    record(start_time)
         return wrapper
-    return decorator
\ No newline at end of file
+    return decorator
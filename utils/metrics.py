@@ -0,0 +1,47 @@
+from typing import Any
+
+from helper_class import TaskLane
+from helper_class.metrics import IPC_BUCKETS, Counter, Gauge, Histogram, MetricsRegistry, TaskLatency
+from helper_class.task_retention import TERMINAL_STATUSES
+
+
+metrics = MetricsRegistry()
+
+LANES = [(lane.value,) for lane in TaskLane]
+
+queue_depth = metrics.register(Gauge("tasks_queue_depth", "Tasks waiting in each lane's queue.", ["lane"], LANES))
+running_tasks = metrics.register(Gauge("tasks_running", "Tasks running in each lane.", ["lane"], LANES))
+lane_slots = metrics.register(Gauge("tasks_slots", "Concurrency limit of each lane.", ["lane"], LANES))
+max_process = metrics.register(Gauge("tasks_max_process", "Worker processes sized from CPU affinity at startup."))
+queue_wait = metrics.register(Histogram("tasks_queue_wait_seconds", "Time from enqueue to dispatch.", series=[()]))
+run_time = metrics.register(Histogram("tasks_run_seconds", "Time from dispatch to a final status.", series=[()]))
+finished_tasks = metrics.register(Counter(
+    "tasks_finished_total", "Tasks that reached a final status.", ["status"],
+    [(status.value,) for status in TERMINAL_STATUSES],
+))
+ipc_latency = metrics.register(Histogram(
+    "tasks_ipc_seconds", "Time spent handing tasks to executors and collecting their reports.",
+    IPC_BUCKETS, ["op"], [("submit",), ("collect",)],
+))
+rate_limited = metrics.register(Counter("http_rate_limited_total", "Requests rejected by the rate limiter.", series=[()]))
+admission_rejected = metrics.register(Counter(
+    "tasks_admission_rejected_total", "Submissions rejected by admission control.", series=[()]
+))
+ws_connections = metrics.register(Gauge("ws_connections", "Open WebSocket connections.", series=[()]))
+
+
+def task_latency() -> TaskLatency:
+    """ a TaskManager listener feeding the queue wait and run time histograms """
+    return TaskLatency(queue_wait, run_time, finished_tasks)
+
+
+def render_metrics(app: Any) -> str:
+    """ the Prometheus exposition, with gauges read from ``app.state`` at scrape time """
+    state = app.state
+    for lane, queue in state.queues.items():
+        queue_depth.set(queue.qsize(), lane.value)
+    for lane, executor in state.executors.items():
+        running_tasks.set(len(executor.in_flight), lane.value)
+        lane_slots.set(executor.size, lane.value)
+    max_process.set(state.max_process)
+    return metrics.render()
@@ -1,11 +1,13 @@
-import asyncio
-from typing import List, Tuple
+import time
+from typing import Any, List, Optional
 from fastapi import FastAPI
 from psutil import Process
 import psutil
 
-from helper_class import TaskStatus
-from configs import setup_logging
+from helper_class import TaskStatus, remove_spool_file
+from helper_class.task_retention import TERMINAL_STATUSES
+from configs import setup_logging, RETENTION_ARCHIVE
+from utils.metrics import ipc_latency
 
 logger = setup_logging("server")
 
@@ -18,30 +20,104 @@ def get_subprocess_count() -> int:
     return len(get_child_processes())
 
 
+def cancel_task(app: FastAPI, task_id: str) -> Optional[TaskStatus]:
+    """
+    Cancel a task wherever it is: a queued task is tombstoned in its lane's queue, a
+    running one is stopped by its lane's executor right away, and the scheduler is woken to refill the slot. Returns
+    the task's resulting status (unchanged if it had already finished), None if unknown.
+    """
+    task_manager = app.state.task_manager
+    task = task_manager.get_task(task_id)
+    if task is None:
+        return None
+    if task.status in TERMINAL_STATUSES:
+        return task.status
+
+    task_manager.update_task(task_id, TaskStatus.CANCELLED)
+    app.state.task_specs.pop(task_id, None)
+    if any(queue.discard(task_id) for queue in app.state.queues.values()):
+        logger.debug("Task %s removed from the queue", task_id)
+    elif any(executor.kill(task_id) for executor in app.state.executors.values()):
+        logger.debug("Task %s signalled to stop", task_id)
+    app.state.scheduler_event.set()
+    return TaskStatus.CANCELLED
+
+
 async def cleanup_processes(app: FastAPI) -> None:
-    loop = asyncio.get_running_loop()
-    processes_to_clean: List[Tuple[str,Process]] = list(app.state.processes.items())
-    for task_id, proc in processes_to_clean:
-        task = app.state.task_manager.get_task(task_id)
-        if task.status in (TaskStatus.CANCELLED, TaskStatus.COMPLETED, TaskStatus.FAILED):
+    for executor in app.state.executors.values():
+        started = time.perf_counter()
+        collect_finished(app, executor)
+        ipc_latency.observe(time.perf_counter() - started, "collect")
+
+
+def collect_finished(app: FastAPI, pool: Any) -> None:
+    """
+    apply timeouts, stops, failures, results and finishes reported by one lane's executor;
+    the executor has already freed the slots of tasks it reports finished or failed
+    """
+    task_manager = app.state.task_manager
+
+    for task_id in pool.expired():
+        task = task_manager.get_task(task_id)
+        if task is not None and task.status == TaskStatus.RUNNING:
+            logger.warning("Task %s timed out", task_id)
+            fail_task(app, task_id, "timed out")
+
+    for task_id in pool.over_memory():
+        task = task_manager.get_task(task_id)
+        if task is not None and task.status == TaskStatus.RUNNING:
+            logger.warning("Task %s exceeded its memory limit", task_id)
+            fail_task(app, task_id, "exceeded its memory limit")
 
-            if proc.exitcode is None:
-                proc.terminate()
-                logger.debug("Terminated process %s", task_id)
+    for task_id in list(pool.in_flight):
+        task = task_manager.get_task(task_id)
+        if task is None or task.status in (TaskStatus.CANCELLED, TaskStatus.FAILED):
+            if pool.kill(task_id):
+                logger.debug("Stopping task %s", task_id)
 
-            try:
-                await loop.run_in_executor(None, proc.join, 3)
-            except Exception as e:
-                logger.warning("Join failed for %s: %s", task_id, e)
+    finished = pool.poll()
+    for task_id, reason in pool.failed():
+        task = task_manager.get_task(task_id)
+        if task is not None and task.status == TaskStatus.RUNNING:
+            logger.error("Task %s failed: %s", task_id, reason)
+            fail_task(app, task_id, reason)
+    # results arrive ahead of their task's finish event
+    for task_id, result in pool.results():
+        if task_manager.get_task(task_id) is None:
+            if result.path:
+                remove_spool_file(result.path)
+            continue
+        app.state.results.put(task_id, result)
 
-            if proc.is_alive():
-                logger.warning("Process %s did not terminate, forcing kill", task_id)
-                proc.kill()
-                await loop.run_in_executor(None, proc.join)
+    cancel_requested = getattr(app.state.shared_tasks, "cancel_requested", None)
+    for task_id in finished:
+        # finished tasks stay until the retention policy evicts them
+        task = task_manager.refresh(task_id)
+        if task is not None and task.status == TaskStatus.RUNNING:
+            if cancel_requested is not None and cancel_requested(task_id):
+                # the run stopped at its cancellation token, it did not complete
+                task_manager.update_task(task_id, TaskStatus.CANCELLED)
+            else:
+                task_manager.update_task(task_id, TaskStatus.COMPLETED, progress=1.0)
+        logger.info("Cleaned up resources for task %s", task_id)
 
-            app.state.task_manager.remove_task(task_id)
-            app.state.processes.pop(task_id, None)
-            logger.info("Cleaned up resources for task %s", task_id)
 
+def fail_task(app: FastAPI, task_id: str, reason: str) -> None:
+    """ mark a task FAILED, keeping the reason next to where its result would be """
+    app.state.results.fail(task_id, reason)
+    app.state.task_manager.update_task(task_id, TaskStatus.FAILED)
 
 
+def evict_finished_tasks(app: FastAPI, now: float | None = None) -> int:
+    """ remove finished tasks past retention, spilling them to the journal archive if enabled """
+    task_manager = app.state.task_manager
+    journal = app.state.journal if RETENTION_ARCHIVE else None
+    expired = app.state.retention.expired(now)
+    for task_id in expired:
+        task = task_manager.get_task(task_id)
+        if task is not None and journal is not None:
+            journal.archive(task_id, task)
+        task_manager.remove_task(task_id)
+    if expired:
+        logger.debug("Evicted %s finished tasks", len(expired))
+    return len(expired)
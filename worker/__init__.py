@@ -1,6 +1,17 @@
-from .task_runner import complicated_task
+from .registry import TaskRegistry, registry, register_task
+from .task_runner import complicated_task, run_task
+from .pool import WorkerPool
+from .lanes import InProcessLane, ThreadLane, AsyncLane
 
 
 __all__ = [
+    "TaskRegistry",
+    "registry",
+    "register_task",
     "complicated_task",
-]
\ No newline at end of file
+    "run_task",
+    "WorkerPool",
+    "InProcessLane",
+    "ThreadLane",
+    "AsyncLane",
+]
@@ -0,0 +1,162 @@
+import asyncio
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from helper_class import CancellationToken, TaskCancelled, TaskResult
+from worker.pool import describe_exception
+from worker.registry import TaskFunction, registry
+from worker.task_runner import encode_result
+
+
+logger = logging.getLogger("server")
+
+
+class InProcessLane:
+    """
+    Runs tasks inside the server process, at most ``size`` at a time, for I/O-bound task
+    types that do not need a process each. It has the WorkerPool interface the scheduler
+    drives (submit / kill / poll / results / failed / expired), so lanes are interchangeable.
+    A task that raises is reported by :meth:`failed`, like a crashed worker. Memory limits
+    are not enforced, since the tasks share the server's memory.
+    """
+
+    def __init__(self, size: int, shared_tasks: Any) -> None:
+        self.size = size
+        self.shared_tasks = shared_tasks
+        # task id -> future or asyncio task running it
+        self.in_flight: Dict[str, Any] = {}
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+        self._finished: List[str] = []
+        self._results: List[Tuple[str, TaskResult]] = []
+        self._failed: List[Tuple[str, str]] = []
+        self._expired: List[str] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._on_change: Optional[Callable[[], None]] = None
+
+    @property
+    def free_slots(self) -> int:
+        return self.size - len(self.in_flight)
+
+    def start(self) -> None:
+        pass
+
+    def attach(self, loop: asyncio.AbstractEventLoop, on_change: Callable[[], None]) -> None:
+        self._loop = loop
+        self._on_change = on_change
+
+    def submit(
+        self,
+        task_id: str,
+        timeout: Optional[float] = None,
+        args: Tuple[Any, ...] = (),
+        memory_limit: Optional[int] = None,
+    ) -> None:
+        task_type, payload = args
+        token = CancellationToken(task_id, self.shared_tasks)
+        self.in_flight[task_id] = self._start(task_id, registry.get(task_type).func, payload or {}, token)
+        if timeout:
+            self._timers[task_id] = self._loop.call_later(timeout, self._expire, task_id)
+
+    def _start(self, task_id: str, func: TaskFunction, payload: Dict[str, Any], token: CancellationToken) -> Any:
+        raise NotImplementedError
+
+    def _cancel(self, handle: Any) -> None:
+        handle.cancel()
+
+    def kill(self, task_id: str) -> bool:
+        handle = self.in_flight.get(task_id)
+        if handle is None:
+            return False
+        request_cancel = getattr(self.shared_tasks, "request_cancel", None)
+        if request_cancel is not None:
+            request_cancel(task_id)
+        self._cancel(handle)
+        return True
+
+    def _expire(self, task_id: str) -> None:
+        if task_id in self.in_flight:
+            self._expired.append(task_id)
+            self._on_change()
+
+    def _on_done(self, task_id: str, future: Any) -> None:
+        if self.in_flight.get(task_id) is not future:
+            return
+        del self.in_flight[task_id]
+        timer = self._timers.pop(task_id, None)
+        if timer is not None:
+            timer.cancel()
+
+        error = None if future.cancelled() else future.exception()
+        if error is not None and not isinstance(error, TaskCancelled):
+            logger.error("Task %s raised", task_id, exc_info=error)
+            self._failed.append((task_id, describe_exception(error)))
+        elif error is None and not future.cancelled():
+            encoded = encode_result(future.result())
+            if encoded is not None:
+                media_type, body = encoded
+                self._results.append((task_id, TaskResult(media_type=media_type, body=bytes(body))))
+        self._finished.append(task_id)
+        self._on_change()
+
+    def poll(self, timeout: Optional[float] = 0) -> List[str]:
+        finished, self._finished = self._finished, []
+        return finished
+
+    def results(self) -> List[Tuple[str, TaskResult]]:
+        results, self._results = self._results, []
+        return results
+
+    def failed(self) -> List[Tuple[str, str]]:
+        failed, self._failed = self._failed, []
+        return failed
+
+    def expired(self) -> List[str]:
+        expired, self._expired = self._expired, []
+        return expired
+
+    def over_memory(self) -> List[str]:
+        return []
+
+    def shutdown(self) -> None:
+        for handle in self.in_flight.values():
+            self._cancel(handle)
+        for timer in self._timers.values():
+            timer.cancel()
+        self._timers.clear()
+        self.in_flight.clear()
+
+
+class ThreadLane(InProcessLane):
+    """ blocking task functions on a bounded thread pool; stopping them is cooperative only """
+
+    def __init__(self, size: int, shared_tasks: Any) -> None:
+        super().__init__(size, shared_tasks)
+        self.executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix="task-lane")
+
+    def _start(self, task_id: str, func: TaskFunction, payload: Dict[str, Any], token: CancellationToken) -> Future:
+        loop = self._loop
+        future = self.executor.submit(func, payload, token)
+
+        def done(future: Future) -> None:
+            try:
+                loop.call_soon_threadsafe(self._on_done, task_id, future)
+            except RuntimeError:
+                # the loop is already closed at shutdown
+                pass
+
+        future.add_done_callback(done)
+        return future
+
+    def shutdown(self) -> None:
+        super().shutdown()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+class AsyncLane(InProcessLane):
+    """ coroutine task functions as tasks on the server's event loop """
+
+    def _start(self, task_id: str, func: TaskFunction, payload: Dict[str, Any], token: CancellationToken) -> asyncio.Task:
+        task = self._loop.create_task(func(payload, token))
+        task.add_done_callback(lambda task: self._on_done(task_id, task))
+        return task
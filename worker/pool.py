@@ -0,0 +1,494 @@
+import asyncio
+import logging
+import multiprocessing
+import signal
+import tempfile
+import time
+import traceback
+from dataclasses import dataclass
+from multiprocessing.connection import Connection, wait
+from multiprocessing.process import BaseProcess
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+import psutil
+
+from helper_class import TaskCancelled, TaskResult, TaskStatus
+from utils import timings
+
+logger = logging.getLogger("server")
+
+
+def worker_loop(
+    task_queue: Any,
+    events: Connection,
+    target: Callable[..., Any],
+    shared_tasks: Any,
+    max_tasks: int,
+    max_rss_bytes: int,
+    spool_dir: Optional[str] = None,
+    spool_threshold: int = 0,
+    timings_interval: float = 0.0,
+) -> None:
+    """
+    Body of a pooled worker process. Pulls (task id, args) off the shared work channel
+    until it receives ``None`` or hits its recycle limits, reporting every task start and
+    finish. A (media type, body) returned by ``target`` is sent back before the finish:
+    the body as raw bytes rather than pickled, or, from ``spool_threshold`` bytes on,
+    written to a file in ``spool_dir`` of which only the path is sent. An exception
+    raised by ``target`` is sent back as an error and the worker carries on. @timeit
+    timings recorded in the worker are shipped back at most every ``timings_interval``
+    seconds, and when it exits.
+    """
+    process = psutil.Process()
+    handled = 0
+    timings_sent = time.monotonic()
+    while True:
+        item = task_queue.get()
+        if item is None:
+            events.send(("retired", None))
+            break
+        task_id, args = item
+
+        task = shared_tasks.get(task_id)
+        if task is None or task.status != TaskStatus.RUNNING:
+            events.send(("skipped", task_id))
+            continue
+
+        events.send(("started", task_id))
+        result = None
+        try:
+            result = target(task_id, shared_tasks, *args)
+        except TaskCancelled:
+            pass
+        except Exception as e:
+            logger.exception("Task %s raised", task_id)
+            events.send(("error", task_id, describe_exception(e)))
+        if result is not None:
+            media_type, body = result
+            size = memoryview(body).nbytes
+            if spool_dir and size >= spool_threshold:
+                events.send(("result_file", task_id, media_type, spool_result(spool_dir, body), size))
+            else:
+                events.send(("result", task_id, media_type))
+                events.send_bytes(body)
+        events.send(("finished", task_id))
+        if len(timings) and time.monotonic() - timings_sent >= timings_interval:
+            events.send(("timings", None, timings.drain()))
+            timings_sent = time.monotonic()
+
+        handled += 1
+        if max_tasks and handled >= max_tasks:
+            break
+        if max_rss_bytes and process.memory_info().rss >= max_rss_bytes:
+            break
+    if len(timings):
+        events.send(("timings", None, timings.drain()))
+    events.close()
+
+
+def describe_exception(error: BaseException) -> str:
+    return "".join(traceback.format_exception_only(error)).strip()
+
+
+def exit_reason(exitcode: Optional[int]) -> str:
+    """ why a worker process went away, from its exit code """
+    if exitcode is None or exitcode == 0:
+        return "worker exited"
+    if exitcode > 0:
+        return f"worker exited with code {exitcode}"
+    try:
+        name = signal.Signals(-exitcode).name
+    except ValueError:
+        name = f"signal {-exitcode}"
+    if -exitcode == signal.SIGKILL:
+        return f"worker killed by {name} (out of memory?)"
+    return f"worker killed by {name}"
+
+
+def spool_result(spool_dir: str, body: Any) -> str:
+    """ write a result straight from its buffer to a new spool file """
+    fd, path = tempfile.mkstemp(suffix=".result", dir=spool_dir)
+    with open(fd, "wb") as f:
+        f.write(body)
+    return path
+
+
+def process_tree_rss(pid: int) -> int:
+    """ resident memory of a process and all its descendants, 0 once it is gone """
+    try:
+        process = psutil.Process(pid)
+        rss = process.memory_info().rss
+        for child in process.children(recursive=True):
+            try:
+                rss += child.memory_info().rss
+            except psutil.NoSuchProcess:
+                pass
+        return rss
+    except psutil.NoSuchProcess:
+        return 0
+
+
+@dataclass
+class PoolWorker:
+    process: BaseProcess
+    events: Connection
+    task_id: Optional[str] = None
+
+
+class WorkerPool:
+    """
+    Pool of long-lived worker processes sharing one work channel, sized with :meth:`resize`.
+
+    Workers are recycled after ``max_tasks_per_worker`` tasks or once their RSS reaches
+    ``max_rss_bytes`` (0 disables either limit).
+
+    A single in-flight task is stopped with :meth:`kill`, which escalates: the task's
+    cancellation flag is raised, after ``grace_period`` seconds the worker still running
+    it gets SIGTERM and ``kill_after`` seconds later SIGKILL; a replacement worker is
+    forked once it exits. The steps are event loop timers and the exit is noticed on the
+    process sentinel, so nothing blocks. Tasks submitted with a ``timeout`` are reported
+    by :meth:`expired` once they have run that long.
+
+    Tasks submitted with a ``memory_limit`` have the RSS of their worker (and its children)
+    checked every ``memory_check_interval`` seconds; one over the limit is terminated
+    without a grace period and reported by :meth:`over_memory`.
+    """
+
+    def __init__(
+        self,
+        size: int,
+        target: Callable[..., Any],
+        shared_tasks: Any,
+        max_tasks_per_worker: int = 0,
+        max_rss_bytes: int = 0,
+        grace_period: float = 0.0,
+        kill_after: float = 2.0,
+        spool_dir: Optional[str] = None,
+        spool_threshold: int = 0,
+        memory_check_interval: float = 0.5,
+        timings_interval: float = 0.0,
+    ) -> None:
+        self.size = size
+        self.target = target
+        self.shared_tasks = shared_tasks
+        self.max_tasks_per_worker = max_tasks_per_worker
+        self.max_rss_bytes = max_rss_bytes
+        self.grace_period = grace_period
+        self.kill_after = kill_after
+        self.spool_dir = spool_dir
+        self.spool_threshold = spool_threshold
+        self.memory_check_interval = memory_check_interval
+        self.timings_interval = timings_interval
+        self.task_queue = multiprocessing.Queue()
+        self.workers: Dict[int, PoolWorker] = {}
+        # task id -> pid of the worker running it (None until a worker picks it up)
+        self.in_flight: Dict[str, Optional[int]] = {}
+        self._pending_kill: Set[str] = set()
+        self._stopping: Set[str] = set()
+        self._timeouts: Dict[str, float] = {}
+        # escalation and timeout timers per in-flight task
+        self._timers: Dict[str, List[asyncio.TimerHandle]] = {}
+        self._expired: List[str] = []
+        self._memory_limits: Dict[str, int] = {}
+        self._over_memory: List[str] = []
+        self._memory_timer: Optional[asyncio.TimerHandle] = None
+        self._results: List[Tuple[str, TaskResult]] = []
+        # (task id, reason) of tasks that raised or whose worker died mid-task
+        self._failed: List[Tuple[str, str]] = []
+        self._finished: List[str] = []
+        # workers sent a stop sentinel by resize() that have not picked it up yet
+        self._retiring = 0
+        self._closing = False
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._on_change: Optional[Callable[[], None]] = None
+
+    @property
+    def free_slots(self) -> int:
+        return self.size - len(self.in_flight)
+
+    def start(self) -> None:
+        for _ in range(self.size):
+            self._spawn()
+        logger.info("Worker pool started with %s processes", self.size)
+
+    def resize(self, size: int) -> None:
+        """
+        Change the number of workers: new ones are forked right away, surplus ones leave
+        once idle by taking a stop sentinel off the work channel behind queued tasks.
+        """
+        self.size = size
+        active = len(self.workers) - self._retiring
+        for _ in range(size - active):
+            self._spawn()
+        for _ in range(active - size):
+            self.task_queue.put(None)
+            self._retiring += 1
+        logger.info("Worker pool resized to %s processes", size)
+
+    def attach(self, loop: asyncio.AbstractEventLoop, on_change: Callable[[], None]) -> None:
+        """
+        Watch every worker's event pipe and process sentinel from ``loop`` so events and
+        exits are handled as soon as they happen; ``on_change`` runs after each one.
+        """
+        self._loop = loop
+        self._on_change = on_change
+        for pid in self.workers:
+            self._watch(pid)
+        self._memory_timer = loop.call_later(self.memory_check_interval, self._check_memory)
+
+    def _watch(self, pid: int) -> None:
+        worker = self.workers[pid]
+        self._loop.add_reader(worker.events.fileno(), self._on_events, pid)
+        self._loop.add_reader(worker.process.sentinel, self._on_exit, pid)
+
+    def _unwatch(self, worker: PoolWorker) -> None:
+        self._loop.remove_reader(worker.events.fileno())
+        self._loop.remove_reader(worker.process.sentinel)
+
+    def _on_events(self, pid: int) -> None:
+        if pid in self.workers:
+            self._drain(pid)
+            self._on_change()
+
+    def _on_exit(self, pid: int) -> None:
+        if pid in self.workers:
+            self._reap(pid)
+            self._on_change()
+
+    def submit(
+        self,
+        task_id: str,
+        timeout: Optional[float] = None,
+        args: Tuple[Any, ...] = (),
+        memory_limit: Optional[int] = None,
+    ) -> None:
+        """ run ``target(task_id, shared_tasks, *args)`` on a free worker """
+        self.in_flight[task_id] = None
+        if timeout:
+            self._timeouts[task_id] = timeout
+        if memory_limit:
+            self._memory_limits[task_id] = memory_limit
+        self.task_queue.put((task_id, args))
+
+    def kill(self, task_id: str) -> bool:
+        if task_id not in self.in_flight:
+            return False
+        if task_id in self._stopping:
+            return True
+        self._stopping.add(task_id)
+        request_cancel = getattr(self.shared_tasks, "request_cancel", None)
+        if request_cancel is not None:
+            request_cancel(task_id)
+        pid = self.in_flight[task_id]
+        if pid is None:
+            # not picked up yet: the worker will skip it or we stop it on "started"
+            self._pending_kill.add(task_id)
+            return True
+        if self._loop is not None and self.grace_period > 0:
+            self._later(task_id, self.grace_period, self._terminate, task_id, pid)
+        else:
+            self._terminate(task_id, pid)
+        return True
+
+    def expired(self) -> List[str]:
+        """Tasks that ran past their timeout since the last call."""
+        expired, self._expired = self._expired, []
+        return expired
+
+    def failed(self) -> List[Tuple[str, str]]:
+        """(task id, reason) of tasks that raised or lost their worker since the last call."""
+        failed, self._failed = self._failed, []
+        return failed
+
+    def over_memory(self) -> List[str]:
+        """Tasks stopped for exceeding their memory limit since the last call."""
+        over_memory, self._over_memory = self._over_memory, []
+        return over_memory
+
+    def results(self) -> List[Tuple[str, TaskResult]]:
+        """Results received since the last call."""
+        results, self._results = self._results, []
+        return results
+
+    def _later(self, task_id: str, delay: float, callback: Callable[..., None], *args: Any) -> None:
+        self._timers.setdefault(task_id, []).append(self._loop.call_later(delay, callback, *args))
+
+    def _running(self, task_id: str, pid: int) -> Optional[PoolWorker]:
+        worker = self.workers.get(pid)
+        if worker is None or worker.task_id != task_id:
+            return None
+        return worker
+
+    def _terminate(self, task_id: str, pid: int) -> None:
+        worker = self._running(task_id, pid)
+        if worker is None:
+            return
+        worker.process.terminate()
+        logger.debug("Terminated worker %s running task %s", pid, task_id)
+        if self._loop is not None:
+            self._later(task_id, self.kill_after, self._force_kill, task_id, pid)
+
+    def _force_kill(self, task_id: str, pid: int) -> None:
+        worker = self._running(task_id, pid)
+        if worker is not None and worker.process.is_alive():
+            worker.process.kill()
+            logger.warning("Killed worker %s ignoring SIGTERM for task %s", pid, task_id)
+
+    def _check_memory(self) -> None:
+        stopped = False
+        for task_id, limit in list(self._memory_limits.items()):
+            pid = self.in_flight.get(task_id)
+            if pid is None or task_id in self._stopping:
+                continue
+            rss = process_tree_rss(pid)
+            if rss > limit:
+                logger.warning("Task %s uses %s bytes, over its limit of %s", task_id, rss, limit)
+                self._over_memory.append(task_id)
+                self._stopping.add(task_id)
+                self._terminate(task_id, pid)
+                stopped = True
+        if self._loop is not None:
+            self._memory_timer = self._loop.call_later(self.memory_check_interval, self._check_memory)
+        if stopped:
+            self._on_change()
+
+    def _expire(self, task_id: str) -> None:
+        if task_id in self.in_flight:
+            self._expired.append(task_id)
+            self._on_change()
+
+    def poll(self, timeout: Optional[float] = 0) -> List[str]:
+        """Process pending worker events and exits; returns tasks that left the pool."""
+        readers: Dict[Any, int] = {}
+        for pid, worker in self.workers.items():
+            readers[worker.events] = pid
+            readers[worker.process.sentinel] = pid
+
+        for ready in wait(list(readers), timeout=timeout):
+            pid = readers[ready]
+            if pid not in self.workers:
+                continue
+            if ready is self.workers[pid].events:
+                self._drain(pid)
+            else:
+                self._reap(pid)
+
+        finished, self._finished = self._finished, []
+        return finished
+
+    def _drain(self, pid: int) -> None:
+        worker = self.workers[pid]
+        try:
+            while worker.events.poll():
+                event, task_id, *extra = worker.events.recv()
+                if event == "result":
+                    body = worker.events.recv_bytes()
+                    self._results.append((task_id, TaskResult(media_type=extra[0], body=body)))
+                    continue
+                if event == "result_file":
+                    media_type, path, size = extra
+                    self._results.append((task_id, TaskResult(media_type=media_type, path=path, size=size)))
+                    continue
+                if event == "timings":
+                    timings.merge(extra[0])
+                    continue
+                if event == "error":
+                    self._failed.append((task_id, extra[0]))
+                    continue
+                self._handle_event(pid, event, task_id)
+        except (EOFError, OSError):
+            pass
+
+    def _handle_event(self, pid: int, event: str, task_id: str) -> None:
+        worker = self.workers[pid]
+        if event == "started":
+            worker.task_id = task_id
+            self.in_flight[task_id] = pid
+            timeout = self._timeouts.pop(task_id, None)
+            if timeout and self._loop is not None:
+                self._later(task_id, timeout, self._expire, task_id)
+            if task_id in self._pending_kill:
+                self._pending_kill.discard(task_id)
+                self._stopping.discard(task_id)
+                self.kill(task_id)
+        elif event in ("finished", "skipped"):
+            worker.task_id = None
+            self._release(task_id)
+        elif event == "retired":
+            self._retiring = max(self._retiring - 1, 0)
+
+    def _release(self, task_id: str) -> None:
+        self._pending_kill.discard(task_id)
+        self._stopping.discard(task_id)
+        self._timeouts.pop(task_id, None)
+        self._memory_limits.pop(task_id, None)
+        for timer in self._timers.pop(task_id, ()):
+            timer.cancel()
+        if task_id in self.in_flight:
+            self.in_flight.pop(task_id)
+            self._finished.append(task_id)
+
+    def _reap(self, pid: int) -> None:
+        self._drain(pid)
+        worker = self.workers.pop(pid)
+        if self._loop is not None:
+            self._unwatch(worker)
+        worker.process.join()
+        worker.events.close()
+        reason = exit_reason(worker.process.exitcode)
+        if worker.task_id is not None:
+            self._failed.append((worker.task_id, reason))
+            self._release(worker.task_id)
+            logger.error("Worker %s running task %s: %s", pid, worker.task_id, reason)
+        else:
+            logger.debug("Worker %s: %s", pid, reason)
+        if not self._closing and len(self.workers) - self._retiring < self.size:
+            self._spawn()
+
+    def _spawn(self) -> None:
+        reader, writer = multiprocessing.Pipe(duplex=False)
+        process = multiprocessing.Process(
+            target=worker_loop,
+            args=(
+                self.task_queue,
+                writer,
+                self.target,
+                self.shared_tasks,
+                self.max_tasks_per_worker,
+                self.max_rss_bytes,
+                self.spool_dir,
+                self.spool_threshold,
+                self.timings_interval,
+            ),
+            daemon=True,
+        )
+        process.start()
+        writer.close()
+        self.workers[process.pid] = PoolWorker(process=process, events=reader)
+        if self._loop is not None:
+            self._watch(process.pid)
+
+    def shutdown(self, timeout: float = 3) -> None:
+        self._closing = True
+        if self._loop is not None:
+            for worker in self.workers.values():
+                self._unwatch(worker)
+            for timers in self._timers.values():
+                for timer in timers:
+                    timer.cancel()
+            self._timers.clear()
+            if self._memory_timer is not None:
+                self._memory_timer.cancel()
+            self._loop = None
+        for _ in self.workers:
+            self.task_queue.put(None)
+        for worker in list(self.workers.values()):
+            worker.process.join(timeout)
+            if worker.process.is_alive():
+                worker.process.kill()
+                worker.process.join()
+            worker.events.close()
+        self.workers.clear()
+        self.in_flight.clear()
+        self.task_queue.close()
+        logger.info("Worker pool stopped.")
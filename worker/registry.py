@@ -0,0 +1,60 @@
+import inspect
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from helper_class import CancellationToken, TaskLane
+
+
+TaskFunction = Callable[[Dict[str, Any], CancellationToken], Any]
+
+
+@dataclass(frozen=True)
+class TaskType:
+    name: str
+    func: TaskFunction
+    lane: TaskLane = TaskLane.CPU
+
+
+class TaskRegistry:
+    """
+    Task types by name. A task function takes the task's JSON payload and its
+    cancellation token and returns the result: bytes-like values are sent back as they
+    are, str as text and anything else as JSON. Registration happens at import time, so
+    forked workers see the same registry as the server.
+
+    The lane says where a type runs: ``cpu`` in the worker process pool, ``thread`` on
+    the server's thread pool and ``async`` as a coroutine on its event loop (the function
+    must then be ``async def``).
+    """
+
+    def __init__(self) -> None:
+        self._types: Dict[str, TaskType] = {}
+
+    def register(
+        self, name: Optional[str] = None, lane: TaskLane = TaskLane.CPU
+    ) -> Callable[[TaskFunction], TaskFunction]:
+        def decorator(func: TaskFunction) -> TaskFunction:
+            type_name = name or func.__name__
+            if type_name in self._types:
+                raise ValueError(f"Task type {type_name} is already registered")
+            if inspect.iscoroutinefunction(func) != (lane == TaskLane.ASYNC):
+                raise ValueError(f"Task type {type_name}: only the async lane takes coroutine functions")
+            self._types[type_name] = TaskType(name=type_name, func=func, lane=TaskLane(lane))
+            return func
+        return decorator
+
+    def get(self, name: str) -> TaskType:
+        try:
+            return self._types[name]
+        except KeyError:
+            raise KeyError(f"Unknown task type: {name}") from None
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._types
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._types)
+
+
+registry = TaskRegistry()
+register_task = registry.register
@@ -1,14 +1,66 @@
+import asyncio
+import json
 import time
-from helper_class import Task, TaskStatus
+from typing import Any, Dict, Optional, Tuple
+from helper_class import CancellationToken, TaskCancelled, TaskLane
+from helper_class.task_spec import DEFAULT_TASK_TYPE
 import logging
 
 from utils import timeit
+from worker.registry import register_task, registry
 
 
 logger = logging.getLogger("server")
 
+# (media type, body) as sent back to the server
+EncodedResult = Tuple[str, Any]
+
+
+@register_task(DEFAULT_TASK_TYPE)
 @timeit(logger=logger)
-def complicated_task(task_id: str, shared_tasks: dict) -> None:
-    time.sleep(5)
-    if task_id in shared_tasks:
-        shared_tasks[task_id] = Task(status=TaskStatus.COMPLETED)
\ No newline at end of file
+def complicated_task(payload: Dict[str, Any], token: CancellationToken) -> Dict[str, Any]:
+    duration = float(payload.get("duration", 5))
+    steps = max(1, int(duration * 10))
+    for _ in range(steps):
+        token.raise_if_cancelled()
+        time.sleep(duration / steps)
+    return {"duration": duration}
+
+
+@register_task("sleep", lane=TaskLane.ASYNC)
+async def sleep_task(payload: Dict[str, Any], token: CancellationToken) -> Dict[str, Any]:
+    """ I/O-style wait that costs no worker process or thread """
+    duration = float(payload.get("duration", 1))
+    await asyncio.sleep(duration)
+    return {"duration": duration}
+
+
+def encode_result(value: Any) -> Optional[EncodedResult]:
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return "text/plain; charset=utf-8", value.encode()
+    try:
+        # bytes, array.array, NumPy arrays, Arrow buffers...: anything with the buffer protocol
+        view = memoryview(value)
+    except TypeError:
+        return "application/json", json.dumps(value).encode()
+    if not view.contiguous:
+        view = memoryview(view.tobytes())
+    # sent (or spooled) straight from the buffer, never pickled
+    return "application/octet-stream", view
+
+
+def run_task(
+    task_id: str, shared_tasks: Any, task_type: str = DEFAULT_TASK_TYPE, payload: Optional[Dict[str, Any]] = None
+) -> Optional[EncodedResult]:
+    """ pool target: run a registered task type; the server marks the task completed """
+    token = CancellationToken(task_id, shared_tasks)
+    try:
+        result = registry.get(task_type).func(payload or {}, token)
+    except TaskCancelled:
+        logger.info("Task %s stopped on request", task_id)
+        return None
+    if token.cancelled:
+        return None
+    return encode_result(result)
@@ -0,0 +1,53 @@
+import asyncio
+from itertools import islice
+from typing import Any, Dict, List, Optional, Set
+
+from helper_class import TaskStatus
+
+
+class TaskFeed:
+    """
+    Per-connection state of a multiplexed status feed.
+
+    Changes are coalesced per task (only the latest status is kept) until the sender
+    drains them as batches. If more than ``max_pending`` tasks pile up behind a slow
+    consumer the backlog is dropped and the client is told to resync instead. A
+    connection follows at most ``max_subscriptions`` task ids (None for no limit).
+    """
+
+    def __init__(self, max_pending: int, max_subscriptions: Optional[int] = None) -> None:
+        self.max_pending = max_pending
+        self.max_subscriptions = max_subscriptions
+        self.task_ids: Set[str] = set()
+        self.all = False
+        self.pending: Dict[str, Optional[TaskStatus]] = {}
+        self.replies: List[Dict[str, Any]] = []
+        self.overflowed = False
+        self.wake = asyncio.Event()
+
+    def deliver(self, task_id: str, status: Optional[TaskStatus], _: str) -> None:
+        self.pending[task_id] = status
+        if len(self.pending) > self.max_pending:
+            self.pending.clear()
+            self.overflowed = True
+        self.wake.set()
+
+    def reply(self, message: Dict[str, Any]) -> None:
+        self.replies.append(message)
+        self.wake.set()
+
+    def next_message(self, limit: int) -> Optional[Dict[str, Any]]:
+        if self.replies:
+            return self.replies.pop(0)
+
+        if self.overflowed:
+            self.overflowed = False
+            return {"resync": True}
+
+        if not self.pending:
+            return None
+
+        updates = []
+        for task_id in list(islice(self.pending, limit)):
+            updates.append({"task_id": task_id, "status": self.pending.pop(task_id)})
+        return {"updates": updates}
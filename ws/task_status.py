@@ -1,14 +1,17 @@
 import asyncio
 from contextlib import asynccontextmanager
-from typing import AsyncGenerator
+import json
+from typing import Any, AsyncGenerator, Dict, Optional, Tuple
 import logging
 
-from fastapi import APIRouter, WebSocket
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 from fastapi import status
 from websockets import ConnectionClosedError, ConnectionClosedOK
 
-from configs import STATUS_FREQUENCY
+from configs import WS_BATCH_MAX, WS_BATCH_WINDOW, WS_MAX_PENDING, WS_MAX_SUBSCRIPTIONS, WS_SEND_TIMEOUT
 from helper_class import TaskStatus
+from utils.metrics import ws_connections
+from ws.task_feed import TaskFeed
 
 logger = logging.getLogger("server")
 
@@ -20,17 +23,53 @@ ws_router = APIRouter(
 
 @asynccontextmanager
 async def managed_websocket(websocket: WebSocket) -> AsyncGenerator[WebSocket, None]:
+    accepted = False
     try:
         await websocket.accept()
+        accepted = True
+        ws_connections.inc()
         yield websocket
     except (ConnectionClosedOK, ConnectionClosedError):
         return
     except Exception as e:
         logger.warning("WebSocket error: %s", e)
     finally:
+        if accepted:
+            ws_connections.dec()
         if getattr(websocket, "client_state", None) == "connected":
             await websocket.close(code=status.WS_1011_INTERNAL_ERROR, reason="Server Cleanup")
 
+DISCONNECTED = "disconnected"
+
+
+async def watch_disconnect(websocket: WebSocket, updates: asyncio.Queue) -> None:
+    """ wake the sender when the client goes away; status clients never send anything """
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    updates.put_nowait((DISCONNECTED, ""))
+
+
+async def close_if_final(websocket: WebSocket, task_status: Optional[TaskStatus]) -> bool:
+    if task_status is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Task not found")
+        return True
+
+    if task_status == TaskStatus.FAILED:
+        await websocket.close(code=status.WS_1011_INTERNAL_ERROR)
+        return True
+
+    if task_status in (TaskStatus.CANCELLED, TaskStatus.COMPLETED):
+        await websocket.close(code=status.WS_1000_NORMAL_CLOSURE)
+        return True
+
+    return False
+
+
 @ws_router.websocket("/{task_id}")
 async def task_status_ws(websocket: WebSocket, task_id: str) -> None:
     app = websocket.app
@@ -39,21 +78,121 @@ async def task_status_ws(websocket: WebSocket, task_id: str) -> None:
         await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Task not found")
         return
 
-    async with managed_websocket(websocket):
-        while True:
+    hub = app.state.status_hub
+    updates: asyncio.Queue[Tuple[Optional[str], str]] = asyncio.Queue()
+
+    def deliver(_: str, task_status: Optional[TaskStatus], message: str) -> None:
+        updates.put_nowait((task_status, message))
+
+    # subscribe before reading the current status so no change can slip in between
+    hub.subscribe(task_id, deliver)
+    try:
+        async with managed_websocket(websocket):
             task = app.state.task_manager.get_task(task_id)
-            if not task:
-                await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Task not found")
+            if task:
+                await websocket.send_json({"task_id": task_id, "status": task.status})
+            if await close_if_final(websocket, task.status if task else None):
                 return
 
-            await websocket.send_json({"task_id": task_id, "status": task.status})
+            receiver = asyncio.create_task(watch_disconnect(websocket, updates))
+            try:
+                while True:
+                    task_status, message = await updates.get()
+                    if task_status == DISCONNECTED:
+                        return
+                    if task_status is not None:
+                        await websocket.send_text(message)
+                    if await close_if_final(websocket, task_status):
+                        return
+            finally:
+                receiver.cancel()
+    finally:
+        hub.unsubscribe(task_id, deliver)
 
-            if task.status in (TaskStatus.FAILED):
-                await websocket.close(code=status.WS_1011_INTERNAL_ERROR)
-                return
-            
-            if task.status in (TaskStatus.CANCELLED, TaskStatus.COMPLETED):
-                await websocket.close(code=status.WS_1000_NORMAL_CLOSURE)
+
+def handle_feed_command(app: Any, feed: TaskFeed, command: Dict[str, Any]) -> None:
+    hub = app.state.status_hub
+    action = command.get("action")
+    task_ids = command.get("task_ids") or []
+    if not isinstance(task_ids, list) or not all(isinstance(task_id, str) for task_id in task_ids):
+        feed.reply({"error": "task_ids must be a list of strings"})
+        return
+
+    if action == "subscribe":
+        new_ids = [task_id for task_id in dict.fromkeys(task_ids) if task_id not in feed.task_ids]
+        limit = feed.max_subscriptions
+        if limit is not None and len(feed.task_ids) + len(new_ids) > limit:
+            feed.reply({"error": f"At most {limit} task subscriptions per connection"})
+            return
+        if command.get("all"):
+            feed.all = True
+            hub.subscribe_all(feed.deliver)
+        for task_id in new_ids:
+            feed.task_ids.add(task_id)
+            hub.subscribe(task_id, feed.deliver)
+            task = app.state.task_manager.get_task(task_id)
+            feed.deliver(task_id, task.status if task else None, "")
+
+    elif action == "unsubscribe":
+        if command.get("all"):
+            feed.all = False
+            hub.unsubscribe_all(feed.deliver)
+        for task_id in task_ids:
+            feed.task_ids.discard(task_id)
+            feed.pending.pop(task_id, None)
+            hub.unsubscribe(task_id, feed.deliver)
+
+    else:
+        feed.reply({"error": f"Unknown action: {action}"})
+
+
+async def send_feed_batches(websocket: WebSocket, feed: TaskFeed) -> None:
+    """
+    Wait for changes, let them accumulate for one batching window, then drain them.
+    Changes arriving while a send is in flight coalesce into the next batch, and a client
+    that cannot take a batch within WS_SEND_TIMEOUT is disconnected.
+    """
+    while True:
+        await feed.wake.wait()
+        await asyncio.sleep(WS_BATCH_WINDOW)
+        feed.wake.clear()
+        while (payload := feed.next_message(WS_BATCH_MAX)) is not None:
+            try:
+                await asyncio.wait_for(websocket.send_json(payload), WS_SEND_TIMEOUT)
+            except asyncio.TimeoutError:
+                logger.warning("Status feed consumer too slow, closing connection")
+                await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER, reason="Consumer too slow")
                 return
 
-            await asyncio.sleep(STATUS_FREQUENCY)
+
+@ws_router.websocket("")
+async def task_feed_ws(websocket: WebSocket) -> None:
+    """
+    Multiplexed status feed. Clients send ``{"action": "subscribe", "task_ids": [...]}``
+    (or ``"all": true`` for every task) and ``"unsubscribe"`` likewise, and receive
+    ``{"updates": [{"task_id": ..., "status": ...}, ...]}`` batches.
+    """
+    hub = websocket.app.state.status_hub
+    feed = TaskFeed(max_pending=WS_MAX_PENDING, max_subscriptions=WS_MAX_SUBSCRIPTIONS)
+
+    async with managed_websocket(websocket):
+        sender = asyncio.create_task(send_feed_batches(websocket, feed))
+        try:
+            while True:
+                text = await websocket.receive_text()
+                try:
+                    command = json.loads(text)
+                except json.JSONDecodeError:
+                    feed.reply({"error": "Invalid JSON"})
+                    continue
+                if not isinstance(command, dict):
+                    feed.reply({"error": "Expected a JSON object"})
+                    continue
+                handle_feed_command(websocket.app, feed, command)
+        except (WebSocketDisconnect, RuntimeError):
+            pass
+        finally:
+            sender.cancel()
+            hub.unsubscribe_all(feed.deliver)
+            for task_id in feed.task_ids:
+                hub.unsubscribe(task_id, feed.deliver)